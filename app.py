@@ -1,16 +1,17 @@
 # 경로 : app.py
 
 import os
-from flask import Flask, render_template, request, redirect, url_for, session
+import json
+import time
+import uuid
+import click
+from flask import Flask, Response, jsonify, render_template, request, redirect, url_for, session, abort
+from core import ai_helper, storage_local, storage_sqlite, transfer
 from core.storage_local import (
-    append_record,
-    read_last_n,
-    read_records_by_date,
-    get_calendar_data,
     build_record,
     save_upload_file,
-    get_records_last_24h,
-    delete_record_by_datetime,
+    migrate_to_segments,
+    compact,
 )
 from core.ai_helper import get_ai_response, get_closing_message
 from core.color import (
@@ -33,7 +34,74 @@ from core.music_helper import (
 app = Flask(__name__)
 app.secret_key = "dev-secret"  # 개발용 / 배포 시 환경변수로 교체
 
-DATA_PATH = "data/mood_log.jsonl"
+# 저장소 선택 (환경변수 MOOD2IDEA_STORAGE=local|sqlite)
+# - local : data/YYYY/MM.jsonl 월별 세그먼트 (기본)
+# - sqlite: data/mood_log.db (WAL, 인덱스 범위 조회, 다중 프로세스 쓰기)
+STORAGE_BACKEND = os.getenv("MOOD2IDEA_STORAGE", "local")
+if STORAGE_BACKEND == "sqlite":
+    storage = storage_sqlite
+    DATA_PATH = os.getenv("MOOD2IDEA_DATA_PATH", "data/mood_log.db")
+else:
+    storage = storage_local
+    DATA_PATH = os.getenv("MOOD2IDEA_DATA_PATH", "data/mood_log.jsonl")
+JSONL_PATH = "data/mood_log.jsonl"  # 가져오기(import-jsonl) 원본
+
+# 그룹 커밋 (local 저장소): 이 시간(ms) 안에 들어온 저장을 모아 fsync 한 번
+# - 0이면 끔 (기본). 여러 워커로 운영할 때 예: MOOD2IDEA_GROUP_COMMIT_MS=5
+GROUP_COMMIT_MS = float(os.getenv("MOOD2IDEA_GROUP_COMMIT_MS", "0"))
+
+# 내구성 정책: none(기본) / fsync(매 저장) / periodic(주기적으로, MOOD2IDEA_FSYNC_INTERVAL 초)
+# - 그룹 커밋을 켜면 기본값은 fsync (배치당 fsync 한 번)
+DURABILITY = os.getenv("MOOD2IDEA_DURABILITY", "fsync" if GROUP_COMMIT_MS > 0 else "none")
+FSYNC_INTERVAL = float(os.getenv("MOOD2IDEA_FSYNC_INTERVAL", "1.0"))
+storage.set_durability(DURABILITY, FSYNC_INTERVAL)
+
+# 스냅샷 주기(초, local 저장소): 0이면 끔 (기본)
+# - 켜면 파티션을 처음 열 때 snapshot.pkl + 로그 꼬리로 캐시를 채우고, 이 주기로 스냅샷 갱신
+SNAPSHOT_INTERVAL = float(os.getenv("MOOD2IDEA_SNAPSHOT_INTERVAL", "0"))
+
+# 앱 시작 시 끝난 달 세그먼트 자동 압축 (기본 끔)
+# - 켜면 import할 때마다(gunicorn 워커, flask CLI 명령 포함) 백그라운드 압축이 돌므로
+#   보통은 flask --app app compress-segments 를 cron 등으로 따로 실행
+AUTO_COMPRESS = os.getenv("MOOD2IDEA_AUTO_COMPRESS", "0") == "1"
+
+# 사용자별 기록 (기본 끔): 1이면 세션마다 data/users/<user_id>/ 아래에 따로 저장
+# - 끄면 예전처럼 모두가 DATA_PATH 하나를 같이 씀 (기존 설치의 기록이 그대로 보임)
+# - 켜면 기존 DATA_PATH 기록은 어느 세션에도 보이지 않음 (README 참고)
+PER_USER = os.getenv("MOOD2IDEA_PER_USER", "0") == "1"
+
+# 마무리 메시지 캐시: (감정, 모드, AI 사용)별 응답 몇 개를 돌려가며 사용
+# - MOOD2IDEA_CLOSING_CACHE=파일 경로 → 재시작해도 유지 (비우면 메모리에만)
+# - MOOD2IDEA_CLOSING_CACHE_TTL(초, 기본 7일)이 지나면 새로 생성
+ai_helper.configure_closing_cache(
+    ttl_s=float(os.getenv("MOOD2IDEA_CLOSING_CACHE_TTL", str(ai_helper.CLOSING_CACHE_TTL))),
+    path=os.getenv("MOOD2IDEA_CLOSING_CACHE") or None,
+)
+
+# 사전 생성한 마무리 메시지 테이블 (flask --app app pregen-closing-messages)
+# - 있으면 step 7은 API를 부르지 않고 여기서 바로 꺼냄 (없으면 캐시 → 실시간 생성)
+CLOSING_TABLE_PATH = os.getenv("MOOD2IDEA_CLOSING_TABLE", "data/closing_messages.json")
+ai_helper.load_closing_table(CLOSING_TABLE_PATH)
+
+# step 5 AI 응답 스트리밍: 다음 화면으로 넘어갈 때 아직 생성 중이면 최대 이 시간(초)까지 기다림
+AI_STREAM_COLLECT_WAIT = float(os.getenv("MOOD2IDEA_AI_STREAM_WAIT", "30"))
+
+# AI 작업 결과 공유 폴더: gunicorn 워커가 여러 개여도 다른 워커가 끝낸 응답을 가져감
+# - 비우면 메모리에만 (워커 1개일 때)
+ai_helper.configure_ai_results(os.getenv("MOOD2IDEA_AI_RESULTS_DIR", "data/ai_results"))
+
+if STORAGE_BACKEND == "local":
+    if GROUP_COMMIT_MS > 0:
+        storage_local.enable_group_commit(GROUP_COMMIT_MS)
+    # 웜 스타트: 스냅샷 + 로그 꼬리만 파싱해서 캐시 채우기 (scale-to-zero 배포용)
+    if SNAPSHOT_INTERVAL > 0:
+        storage_local.enable_snapshots(SNAPSHOT_INTERVAL)
+    # 시작 시 복구(잘린 마지막 줄은 .torn 으로 격리) + 웜 스타트는 파티션을 처음 쓸 때
+    if not PER_USER:
+        storage_local.open_partition(DATA_PATH)
+    # 끝난 달 세그먼트는 gzip 블록으로 압축 (켰을 때만, 백그라운드, 사용자 파티션 포함)
+    if AUTO_COMPRESS:
+        storage_local.compress_cold_segments_in_background(DATA_PATH)
 UPLOAD_DIR = "static/uploads/user"  # 사용자 업로드 원본
 GENERATED_DIR = "static/uploads/generated"  # DALL-E 생성 이미지
 
@@ -80,6 +148,102 @@ def clear_draft():
     session["draft"] = {}
 
 
+def ai_stream_pending(draft) -> bool:
+    """
+    이 워커에 없는 스트림을 아직 기다릴지
+    - 다른 워커에서 생성 중일 수 있으므로 시작 후 AI_STREAM_TIMEOUT초까지는 진행 중으로 봄
+    """
+    started = draft.get("ai_stream_started") or 0
+    return time.time() - started < ai_helper.AI_STREAM_TIMEOUT
+
+
+def collect_ai_stream(wait: float = 0.0) -> bool:
+    """
+    step 5에서 시작한 AI 스트리밍이 끝났으면 최종 텍스트를 draft["ai_response"]로 옮김
+    - wait초까지 끝나기를 기다림 (다른 워커가 시작한 스트림은 결과 파일로 확인)
+    - 시작 후 AI_STREAM_TIMEOUT초가 지나도 결과가 없으면(서버 재시작 등) 안내 문장으로 대신함
+
+    Returns:
+        draft에 스트리밍 중인 응답이 남아 있지 않으면 True
+    """
+    draft = get_draft()
+    stream_id = draft.get("ai_stream")
+    if not stream_id:
+        return True
+    stream = ai_helper.get_ai_stream(stream_id, wait=wait)
+    if stream is None:
+        if ai_stream_pending(draft):
+            return False
+        print(f"⚠️ AI 스트림 결과 없음 (시간 초과): {stream_id}")
+        update_draft(ai_response="AI 응답을 불러오지 못했어요. 다시 시도해주세요.", ai_stream=None)
+        ai_helper.discard_ai_stream(stream_id)
+        return True
+    if not stream.done and not stream.wait(wait):
+        return False
+    update_draft(ai_response=stream.text, ai_stream=None)
+    ai_helper.discard_ai_stream(stream_id)
+    return True
+
+
+def dalle_job_pending(draft) -> bool:
+    """끝나지 않은(또는 이 워커가 모르는) DALL-E 작업을 아직 기다릴지 - 시작 후 DALLE_JOB_TIMEOUT초까지"""
+    started = draft.get("dalle_job_started") or 0
+    return time.time() - started < ai_helper.DALLE_JOB_TIMEOUT
+
+
+def collect_dalle_job() -> bool:
+    """
+    DALL-E 작업이 끝났으면 응답(과 새 이미지)을 draft로 옮김 (기다리지 않음)
+    - 이미지가 만들어졌을 때만 image_filename을 바꿈 (실패하면 원래 그림 유지)
+    - 다른 워커가 시작한 작업은 결과 파일로 확인
+    - 시작 후 DALLE_JOB_TIMEOUT초가 지나도 안 끝났으면(서버 재시작 등) 안내 문장으로 대신함
+
+    Returns:
+        draft에 진행 중인 DALL-E 작업이 남아 있지 않으면 True
+    """
+    draft = get_draft()
+    job_id = draft.get("dalle_job")
+    if not job_id:
+        return True
+    job = ai_helper.get_dalle_job(job_id)
+    if job is None or not job.done:
+        if dalle_job_pending(draft):
+            return False
+        print(f"⚠️ DALL-E 작업 결과 없음 (시간 초과): {job_id}")
+        update_draft(ai_response="이미지 생성 결과를 찾지 못했어요. 다시 시도해주세요.", dalle_job=None)
+        ai_helper.discard_dalle_job(job_id)
+        return True
+    if job.image_ready:
+        update_draft(image_filename=os.path.basename(job.output_path))
+    update_draft(ai_response=job.message, dalle_job=None)
+    ai_helper.discard_dalle_job(job_id)
+    return True
+
+
+# -------------------------------------------------
+# 공통: 사용자별 기록 경로
+# -------------------------------------------------
+
+def current_data_path():
+    """
+    이 요청의 사용자 기록 경로 (PER_USER가 꺼져 있으면 DATA_PATH)
+    - 세션에 사용자 id가 없으면 새로 만들어 저장 (브라우저를 닫아도 유지)
+    - 조회/저장/24시간 제한/캘린더가 모두 이 사용자 파티션만 건드림
+    """
+    if not PER_USER:
+        return DATA_PATH
+
+    user_id = session.get("user_id")
+    if not user_id:
+        user_id = uuid.uuid4().hex
+        session["user_id"] = user_id
+        session.permanent = True
+
+    data_path = storage.user_data_path(DATA_PATH, user_id)
+    storage.open_partition(data_path)
+    return data_path
+
+
 # -------------------------------------------------
 # ROOT - 랜딩 페이지 (두둥실 떠오르는 달)
 # -------------------------------------------------
@@ -125,9 +289,8 @@ def step1():
             update_draft(mood_color=mood_color)
             return redirect(url_for("step2"))
     
-    # GET: 24시간 내 기록 체크
-    recent_records = get_records_last_24h(DATA_PATH)
-    if len(recent_records) >= 3:
+    # GET: 24시간 내 기록 체크 (개수만 필요하므로 기록은 읽지 않음)
+    if storage.count_records_last_24h(current_data_path()) >= 3:
         # 3개 이상이면 교체 선택 화면으로
         return redirect(url_for("replace_selection"))
 
@@ -357,6 +520,9 @@ def step5():
     - AI는 조력자 역할
     - 감정 판단/평가 금지
     """
+    collect_ai_stream()
+    if not collect_dalle_job():
+        return redirect(url_for("step5_result"))
     draft = get_draft()
     if not draft.get("mode"):
         return redirect(url_for("step3"))
@@ -408,8 +574,7 @@ def step5():
                 # develop 선택 + user_input 있음 → DALL-E로 새 이미지 생성
                 if ai_choice == "develop" and user_input and len(user_input) > 0:
                     # 새 이미지 파일명 생성 (generated 폴더에 저장)
-                    import time
-                    new_image_filename = f"dalle_{int(time.time())}.png"
+                    new_image_filename = f"dalle_{int(time.time())}_{uuid.uuid4().hex[:8]}.png"
                     new_image_path = os.path.join(GENERATED_DIR, new_image_filename)
                     generate_dalle = True
                     print(f"🎨 DALL-E 준비: user_input='{user_input}', new_image_path='{new_image_path}'")
@@ -423,7 +588,31 @@ def step5():
             # AI 응답 받기 (마지막 여부 전달)
             print(f"🤖 AI 호출: mode={draft.get('mode')}, type={ai_choice}, generate_dalle={generate_dalle}")
             print(f"📊 AI 카운트: {new_ai_count}/{MAX_AI_INTERACTIONS}, is_final={is_final}")
-            ai_response = get_ai_response(
+            
+            # DALL-E 생성이 아니면 스트리밍: 결과 화면이 SSE로 토큰을 바로 받아 보여줌
+            # (최종 텍스트는 스트림이 끝난 뒤 collect_ai_stream이 draft에 저장)
+            if not generate_dalle:
+                stream_id = ai_helper.start_ai_response_stream(
+                    mood_color=draft.get("mood_color"),
+                    mood_text=draft.get("mood_text"),
+                    mode=draft.get("mode"),
+                    interaction_type=ai_choice,
+                    user_content=combined_content,
+                    is_final=is_final,
+                    image_path=image_path,
+                )
+                update_draft(
+                    ai_stream=stream_id,
+                    ai_stream_started=time.time(),
+                    ai_used=True,
+                    ai_count=new_ai_count,
+                    ai_limit_exceeded=False,
+                )
+                return redirect(url_for("step5_result"))
+            
+            # DALL-E 생성은 20~40초 걸리므로 작업 큐에 넣고 바로 응답
+            # (결과 화면이 /jobs/<id>를 확인하다가 끝나면 collect_dalle_job이 draft에 저장)
+            job_id = ai_helper.start_dalle_job(
                 mood_color=draft.get("mood_color"),
                 mood_text=draft.get("mood_text"),
                 mode=draft.get("mode"),
@@ -435,13 +624,10 @@ def step5():
                 new_image_path=new_image_path,
             )
             
-            # 새 이미지가 생성되었으면 draft 업데이트
-            if new_image_filename:
-                update_draft(image_filename=new_image_filename)
-            
-            # AI 응답을 draft에 저장 + 카운트 업데이트
+            # 카운트 업데이트 (응답/새 이미지는 작업이 끝나면 저장)
             update_draft(
-                ai_response=ai_response,
+                dalle_job=job_id,
+                dalle_job_started=time.time(),
                 ai_used=True,
                 ai_count=new_ai_count,
                 ai_limit_exceeded=False,
@@ -492,14 +678,19 @@ def step5():
 def step5_result():
     """
     STEP 5 결과
-    - AI 응답 확인
+    - AI 응답 확인 (스트리밍 중이면 SSE로 토큰을 받아 표시)
     - Step 5.9 (다음 행동 선택)으로 이동
     """
+    collect_ai_stream(wait=AI_STREAM_COLLECT_WAIT if request.method == "POST" else 0.0)
+    dalle_done = collect_dalle_job()
     draft = get_draft()
-    if not draft.get("ai_response"):
+    if not draft.get("ai_response") and not draft.get("ai_stream") and dalle_done:
         return redirect(url_for("step5"))
     
     if request.method == "POST":
+        if not dalle_done:
+            # 이미지가 아직 생성 중 → 결과 화면에서 계속 기다림
+            return redirect(url_for("step5_result"))
         # Step 5.9 (다음 행동 선택)으로 이동
         return redirect(url_for("step5_next"))
     
@@ -519,9 +710,76 @@ def step5_result():
         step=5.5,  # 5.5는 결과 화면
         draft=draft,
         current_color=current_color,
+        ai_stream_id=draft.get("ai_stream"),
+        dalle_job_id=None if dalle_done else draft.get("dalle_job"),
+    )
+
+
+@app.route("/step/5/stream/<stream_id>")
+def step5_stream(stream_id):
+    """
+    STEP 5 AI 응답 SSE (text/event-stream)
+    - 연결할 때마다 처음부터 보냄: data: {"text": "..."} 조각들 → event: done
+    - 이 세션에서 시작한 스트림만 허용
+    - 다른 워커에서 생성 중이면 끝날 때 최종 텍스트를 한 번에 보냄
+      (끝나기 전에 연결이 닫히면 브라우저가 다시 연결)
+    """
+    draft = get_draft()
+    if draft.get("ai_stream") != stream_id:
+        abort(404)
+    stream = ai_helper.get_ai_stream(stream_id)
+    if stream is None:
+        if not ai_stream_pending(draft):
+            abort(404)
+        stream = ai_helper.get_ai_stream(stream_id, wait=ai_helper.AI_STREAM_IDLE_TIMEOUT)
+        if stream is None:
+            return Response("retry: 1000\n\n", mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    def events():
+        for chunk in stream.iter_chunks():
+            yield f"data: {json.dumps({'text': chunk}, ensure_ascii=False)}\n\n"
+        if stream.done:
+            yield "event: done\ndata: {}\n\n"
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """
+    DALL-E 작업 상태 (JSON)
+    - {"status": "queued|running|done", "image_ready": bool, ...}
+    - 이 세션에서 시작한 작업만 허용, 끝났으면 결과를 draft에 저장
+    - 메모리에도 결과 파일에도 없는 작업은 404 (가짜 queued 상태를 만들지 않음)
+      → 결과 화면이 새로고침, 시간 초과가 지났으면 안내 문장으로 정리됨
+    """
+    draft = get_draft()
+    if draft.get("dalle_job") != job_id:
+        abort(404)
+    job = ai_helper.get_dalle_job(job_id)
+    if job is None:
+        if not dalle_job_pending(draft):
+            collect_dalle_job()
+        abort(404)
+    status = job.to_json()
+    if job.done or not dalle_job_pending(draft):
+        collect_dalle_job()
+    return jsonify(status)
+
+
+@app.route("/step/5/stream/<stream_id>/done", methods=["POST"])
+def step5_stream_done(stream_id):
+    """스트리밍이 끝났을 때 결과 화면이 호출 → 최종 텍스트를 draft에 저장"""
+    if get_draft().get("ai_stream") != stream_id:
+        return ("", 204)
+    collect_ai_stream(wait=AI_STREAM_COLLECT_WAIT)
+    return ("", 204)
+
+
 # -------------------------------------------------
 # STEP 5.9. 다음 행동 선택
 # -------------------------------------------------
@@ -534,6 +792,9 @@ def step5_next():
       2. AI와 더 대화하기 (최대 2회)
       3. 저장하기
     """
+    collect_ai_stream(wait=AI_STREAM_COLLECT_WAIT)
+    if not collect_dalle_job():
+        return redirect(url_for("step5_result"))
     draft = get_draft()
     if not draft.get("mood_color"):
         return redirect(url_for("step1"))
@@ -624,6 +885,9 @@ def step6():
     - 활동 및 AI 사용에 따른 색 변화 반영
     - 최종 색 정리 여부 선택
     """
+    collect_ai_stream(wait=AI_STREAM_COLLECT_WAIT)
+    if not collect_dalle_job():
+        return redirect(url_for("step5_result"))
     draft = get_draft()
     if not draft.get("mood_color"):
         return redirect(url_for("step1"))
@@ -659,6 +923,17 @@ def step6():
     # ✅ draft에 final_color 저장 (인디케이터 업데이트용)
     update_draft(final_color=final_color_hex, color_intensity=intensity)
     
+    # 마무리 메시지는 지금 필요한 값이 다 있으므로 진하기를 고르는 동안 미리 생성
+    if request.method == "GET" and not ai_helper.is_closing_prefetched(
+        draft.get("closing_prefetch"), mood_name, draft.get("mode"), ai_used
+    ):
+        update_draft(closing_prefetch=ai_helper.prefetch_closing_message(
+            initial_color=mood_name,
+            final_color=final_color_hex,
+            mode=draft.get("mode"),
+            ai_used=ai_used,
+        ))
+    
     if request.method == "POST":
         # 사용자가 선택한 감정 진하기 (intensity)
         intensity_level_str = request.form.get("intensity_level")
@@ -746,7 +1021,7 @@ def step7():
         record["expression_done"] = draft.get("expression_done", False)
         record["ai_interaction_count"] = draft.get("ai_count", 0)
         
-        append_record(DATA_PATH, record)
+        storage.append_record(current_data_path(), record)
         clear_draft()
         return redirect(url_for("history", saved=1, n=1))
     
@@ -754,12 +1029,25 @@ def step7():
     initial_mood_name = MOOD_NAME_MAP.get(draft.get("mood_color"), draft.get("mood_color"))
     
     # AI 마무리 한마디
-    closing_message = get_closing_message(
-        initial_color=initial_mood_name,  # 감정 이름 전달
-        final_color=draft.get("final_color"),
-        mode=draft.get("mode"),
-        ai_used=draft.get("ai_used", False),
-    )
+    # - 이미 보여준 메시지가 있으면 그대로 (새로고침/뒤로가기)
+    # - 아니면 step 6에서 미리 시작한 결과 → 없으면 직접 생성
+    closing_key = [initial_mood_name, draft.get("mode"), bool(draft.get("ai_used", False))]
+    closing_message = draft.get("closing_message") if draft.get("closing_key") == closing_key else None
+    if closing_message is None:
+        closing_message = ai_helper.take_closing_message(
+            draft.get("closing_prefetch"),
+            initial_mood_name,
+            draft.get("mode"),
+            draft.get("ai_used", False),
+        )
+    if closing_message is None:
+        closing_message = get_closing_message(
+            initial_color=initial_mood_name,  # 감정 이름 전달
+            final_color=draft.get("final_color"),
+            mode=draft.get("mode"),
+            ai_used=draft.get("ai_used", False),
+        )
+    update_draft(closing_message=closing_message, closing_key=closing_key, closing_prefetch=None)
     
     return render_template(
         "index.html",
@@ -777,15 +1065,16 @@ def replace_selection():
     """
     24시간 내 3개 기록이 있을 때 교체 선택 화면
     """
-    recent_records = get_records_last_24h(DATA_PATH)
+    recent_records = storage.get_records_last_24h(current_data_path())
     
     if len(recent_records) < 3:
         # 3개 미만이면 그냥 step1로
         return redirect(url_for("step1"))
     
-    # 각 기록에 "몇 시간 전" 표시용 계산
+    # 각 기록에 "몇 시간 전" 표시용 계산 (기록은 읽기 전용이라 따로 리스트로)
     from datetime import datetime
     now = datetime.now()
+    time_ago = []
     for record in recent_records:
         dt_str = record.get("date_time") or record.get("timestamp")
         if dt_str:
@@ -793,21 +1082,18 @@ def replace_selection():
             delta = now - record_dt
             hours = int(delta.total_seconds() / 3600)
             if hours < 1:
-                record["time_ago"] = "방금 전"
+                time_ago.append("방금 전")
             elif hours < 24:
-                record["time_ago"] = f"{hours}시간 전"
+                time_ago.append(f"{hours}시간 전")
             else:
-                record["time_ago"] = f"{int(hours/24)}일 전"
+                time_ago.append(f"{int(hours/24)}일 전")
         else:
-            record["time_ago"] = "알 수 없음"
-        
-        # 감정 이름 추가
-        mood_color = record.get("mood_color") or record.get("initial_color")
-        record["mood_name"] = MOOD_NAME_MAP.get(mood_color, mood_color)
+            time_ago.append("알 수 없음")
     
     return render_template(
         "replace_selection.html",
         records=recent_records,
+        time_ago=time_ago,
     )
 
 
@@ -816,14 +1102,26 @@ def replace_record():
     """
     선택한 기록 삭제 후 step1로
     """
-    selected_datetime = request.form.get("selected_datetime")
+    # 고른 순번 + 기록별 id / date_time (id 없는 예전 기록은 id가 빈 값)
+    record_ids = request.form.getlist("record_id")
+    date_times = request.form.getlist("record_date_time")
+    try:
+        index = int(request.form.get("selected", ""))
+    except ValueError:
+        index = -1
     
-    if selected_datetime:
-        success = delete_record_by_datetime(DATA_PATH, selected_datetime)
+    if 0 <= index < min(len(record_ids), len(date_times)):
+        data_path = current_data_path()
+        record_id, date_time = record_ids[index], date_times[index]
+        if record_id:
+            success = storage.delete_record(data_path, record_id)
+        else:
+            success = bool(date_time) and storage.delete_record_by_datetime(data_path, date_time)
+        target = record_id or date_time
         if success:
-            print(f"✅ 기록 교체를 위해 삭제: {selected_datetime}")
+            print(f"✅ 기록 교체를 위해 삭제: {target}")
         else:
-            print(f"⚠️ 기록 삭제 실패: {selected_datetime}")
+            print(f"⚠️ 기록 삭제 실패: {target}")
     
     # step1으로 리다이렉트 (이제 2개만 남았으므로 진입 가능)
     return redirect(url_for("step1"))
@@ -836,7 +1134,8 @@ def replace_record():
 def history():
     """
     기록 보기 페이지
-    - 최근 기록 N개 표시 (?n=1/5/10)
+    - 최근 기록 N개 표시 (?n=1/5/10, 한 페이지 크기)
+    - ?before=<커서> 더 지난 기록 / ?after=<커서> 더 최근 기록 (무한 스크롤)
     """
     try:
         n = int(request.args.get("n", "1"))
@@ -844,17 +1143,68 @@ def history():
         n = 1
     n = max(1, min(n, 30))
 
-    records = read_last_n(DATA_PATH, n)
+    records, older_cursor, newer_cursor = storage.read_page(
+        current_data_path(),
+        n,
+        before=request.args.get("before"),
+        after=request.args.get("after"),
+    )
 
     return render_template(
         "index.html",
         step=0,
         records=records,
         n=n,
+        older_cursor=older_cursor,
+        newer_cursor=newer_cursor,
         saved=request.args.get("saved"),
+        imported=request.args.get("imported"),
     )
 
 
+@app.route("/history/export")
+def history_export():
+    """
+    내 기록 전체 내려받기 (?format=ndjson|csv, ?gzip=1)
+    - 오래된 순으로 읽으면서 조각으로 흘려보내므로 기록이 많아도 메모리 일정
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in transfer.FORMATS:
+        abort(400)
+    compressed = request.args.get("gzip") == "1"
+
+    records = storage.iter_records(current_data_path())
+    return Response(
+        transfer.iter_export(records, fmt, compressed),
+        content_type="application/gzip" if compressed else transfer.CONTENT_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{transfer.export_filename(fmt, compressed)}"',
+        },
+    )
+
+
+@app.route("/history/import", methods=["POST"])
+def history_import():
+    """
+    내보낸 파일(.ndjson / .jsonl / .csv, .gz 가능) 올려서 가져오기
+    - 검증 + 정규화 후 배치로 저장, 이미 있는 기록(id)은 건너뜀
+    """
+    file = request.files.get("file")
+    if file is None or not file.filename:
+        return redirect(url_for("history"))
+
+    fmt, compressed = transfer.detect_format(file.filename)
+    try:
+        result = transfer.import_records(storage, current_data_path(), file.stream, fmt, compressed)
+    except transfer.IMPORT_ERRORS as e:
+        # 깨진 gzip / CSV 형식 오류 등 → 500 대신 안내와 함께 400
+        print(f"❌ 가져오기 실패: {file.filename} ({e})")
+        abort(400, description=f"가져올 수 없는 파일이에요: {file.filename} ({e})")
+
+    print(f"📥 가져오기: {file.filename} {result}")
+    return redirect(url_for("history", n=10, imported=result["imported"]))
+
+
 # -------------------------------------------------
 # 캘린더
 # -------------------------------------------------
@@ -883,8 +1233,8 @@ def calendar_view(year=None, month=None):
         month = 1
         year += 1
     
-    # 캘린더 데이터 가져오기
-    calendar_data = get_calendar_data(DATA_PATH, year, month)
+    # 캘린더 데이터 가져오기 (날짜별 색/개수 요약만)
+    calendar_data = storage.get_calendar_summary(current_data_path(), year, month)
     
     # 캘린더 생성
     cal_obj = cal.Calendar(firstweekday=6)  # 일요일 시작
@@ -928,22 +1278,8 @@ def calendar_date_detail(date_str):
     - 해당 날짜의 모든 기록 표시
     - 처음 감정 → 마지막 감정 변화
     """
-    records = read_records_by_date(DATA_PATH, date_str)
-    
-    # initial_color를 HEX 코드로 변환 (호환성 처리)
-    for r in records:
-        # initial_color가 없으면 mood_color 사용
-        if not r.get("initial_color") and r.get("mood_color"):
-            r["initial_color"] = r["mood_color"]
-        
-        # initial_color가 색상 이름이면 HEX로 변환
-        initial = r.get("initial_color")
-        if initial and not initial.startswith("#"):
-            r["initial_color_hex"] = lighten_color(initial, 0.0)
-            r["mood_name"] = MOOD_NAME_MAP.get(initial, initial)
-        else:
-            r["initial_color_hex"] = initial
-            r["mood_name"] = initial
+    # initial_color_hex / mood_name은 저장 시 정규화되어 있음 (normalize_record)
+    records = storage.read_records_by_date(current_data_path(), date_str)
     
     return render_template(
         "calendar_date.html",
@@ -952,5 +1288,168 @@ def calendar_date_detail(date_str):
     )
 
 
+# -------------------------------------------------
+# 기록 하나 (id로 조회/삭제)
+# -------------------------------------------------
+@app.route("/record/<record_id>")
+def record_detail(record_id):
+    """
+    기록 하나의 상세 페이지 (날짜 상세 화면을 기록 1개로 재사용)
+    """
+    record = storage.get_record(current_data_path(), record_id)
+    if record is None:
+        abort(404)
+
+    return render_template(
+        "calendar_date.html",
+        date_str=record.get("date_time", "")[:10],
+        records=[record],
+    )
+
+
+@app.route("/record/<record_id>/delete", methods=["POST"])
+def record_delete(record_id):
+    """
+    기록 하나 삭제 후 그 날짜 상세 페이지로
+    """
+    data_path = current_data_path()
+    record = storage.get_record(data_path, record_id)
+    if record is None:
+        abort(404)
+
+    storage.delete_record(data_path, record_id)
+    return redirect(url_for("calendar_date_detail", date_str=record.get("date_time", "")[:10]))
+
+
+# -------------------------------------------------
+# 관리 명령 (flask --app app <명령>)
+# -------------------------------------------------
+def all_data_paths():
+    """관리 명령 대상: 공용 DATA_PATH + 존재하는 사용자 파티션 전부"""
+    return [DATA_PATH, *storage.list_partitions(DATA_PATH)]
+
+
+def cli_data_path(user):
+    """관리 명령의 --user 옵션 → 그 사용자 파티션 (없으면 공용 DATA_PATH)"""
+    return storage.user_data_path(DATA_PATH, user) if user else DATA_PATH
+
+
+@app.cli.command("migrate-segments")
+def migrate_segments_command():
+    """단일 파일 로그(DATA_PATH)를 월별 세그먼트(data/YYYY/MM.jsonl)로 분할"""
+    if STORAGE_BACKEND != "local":
+        print("⚠️ MOOD2IDEA_STORAGE=local 일 때만 사용할 수 있어요")
+        return
+    moved = migrate_to_segments(DATA_PATH)
+    if not moved:
+        print(f"ℹ️ 마이그레이션할 로그 없음: {DATA_PATH}")
+        return
+    for year_month, count in moved.items():
+        print(f"  - {year_month}: {count}줄")
+    print(f"✅ 세그먼트 분할 완료 (원본 백업: {DATA_PATH}.migrated)")
+
+
+@app.cli.command("import-jsonl")
+@click.argument("source", default=JSONL_PATH)
+def import_jsonl_command(source):
+    """jsonl 기록(단일 파일 + 월별 세그먼트)을 SQLite 저장소로 가져오기"""
+    if STORAGE_BACKEND != "sqlite":
+        print("⚠️ MOOD2IDEA_STORAGE=sqlite 일 때만 사용할 수 있어요")
+        return
+    inserted = storage_sqlite.import_jsonl(DATA_PATH, source)
+    print(f"✅ {source} → {DATA_PATH}: {inserted}건 가져옴")
+
+
+@app.cli.command("export-records")
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+@click.option("--user", default=None, help="사용자 파티션 id (없으면 공용 DATA_PATH)")
+def export_records_command(output, user):
+    """기록 전체를 파일로 내보내기 (확장자로 형식 결정: .ndjson/.jsonl/.csv, .gz면 압축)"""
+    fmt, compressed = transfer.detect_format(output)
+    count = 0
+    with open(output, "wb") as f:
+        for chunk in transfer.iter_export(storage.iter_records(cli_data_path(user)), fmt, compressed):
+            f.write(chunk)
+            count += len(chunk)
+    print(f"✅ 내보내기 완료: {output} ({count:,}바이트)")
+
+
+@app.cli.command("import-records")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", default=None, help="사용자 파티션 id (없으면 공용 DATA_PATH)")
+def import_records_command(source, user):
+    """내보낸 파일 가져오기 (확장자로 형식 결정, 이미 있는 기록은 건너뜀)"""
+    fmt, compressed = transfer.detect_format(source)
+    try:
+        with open(source, "rb") as f:
+            result = transfer.import_records(storage, cli_data_path(user), f, fmt, compressed)
+    except transfer.IMPORT_ERRORS as e:
+        print(f"❌ 가져오기 실패: {source} ({e})")
+        return
+    print(
+        f"✅ 가져오기 완료: {result['imported']}건 "
+        f"(중복 {result['duplicates']}건, 잘못된 줄 {result['invalid']}건 건너뜀)"
+    )
+
+
+@app.cli.command("pregen-closing-messages")
+@click.option("--output", default=None, help="저장할 경로 (기본: MOOD2IDEA_CLOSING_TABLE)")
+@click.option("--variants", default=ai_helper.CLOSING_VARIANTS, show_default=True, help="조합마다 만들 메시지 수")
+@click.option("--workers", default=8, show_default=True, help="API 동시 호출 수")
+@click.option("--offline", is_flag=True, help="API 없이 문장 틀로 생성")
+def pregen_closing_messages_command(output, variants, workers, offline):
+    """감정 × 표현 방식 × AI 사용 여부(126개 조합)의 마무리 메시지를 미리 생성"""
+    output = output or CLOSING_TABLE_PATH
+    result = ai_helper.pregenerate_closing_table(output, variants=variants, workers=workers, offline=offline)
+    print(
+        f"✅ 마무리 메시지 테이블 저장: {output} "
+        f"({result['combos']}개 조합, {result['messages']}개 메시지, 실패 {result['failed']}개 조합)"
+    )
+
+
+@app.cli.command("migrate-schema")
+def migrate_schema_command():
+    """예전 스키마로 저장된 기록을 현재 스키마로 제자리 업그레이드 (1회성)"""
+    upgraded = sum(storage.migrate_schema(path) for path in all_data_paths())
+    print(f"✅ 스키마 업그레이드 완료: {upgraded}건")
+
+
+@app.cli.command("compress-segments")
+def compress_segments_command():
+    """끝난 달 세그먼트를 gzip 블록(MM.jsonl.gz)으로 압축"""
+    if STORAGE_BACKEND != "local":
+        print("⚠️ MOOD2IDEA_STORAGE=local 일 때만 사용할 수 있어요")
+        return
+    result = {
+        (path, year_month): sizes
+        for path in all_data_paths()
+        for year_month, sizes in storage_local.compress_cold_segments(path).items()
+    }
+    if not result:
+        print("ℹ️ 압축할 세그먼트 없음")
+        return
+    for (path, year_month), (before, after) in result.items():
+        print(f"  - {os.path.dirname(path)} {year_month}: {before:,} → {after:,}바이트")
+    print("✅ 세그먼트 압축 완료")
+
+
+@app.cli.command("compact")
+@click.option("--force", is_flag=True, help="비율과 상관없이 툼스톤이 있으면 모두 정리")
+def compact_command(force):
+    """툼스톤(삭제 표시)이 쌓인 세그먼트를 다시 써서 정리"""
+    if STORAGE_BACKEND != "local":
+        print("⚠️ MOOD2IDEA_STORAGE=local 일 때만 사용할 수 있어요")
+        return
+    result = {}
+    for path in all_data_paths():
+        result.update(compact(path, force=force))
+    if not result:
+        print("ℹ️ 정리할 세그먼트 없음")
+        return
+    for path, removed in result.items():
+        print(f"  - {path}: {removed}줄 정리")
+    print("✅ 컴팩션 완료")
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -1,11 +1,19 @@
 # 경로 : core/ai_helper.py
 
 import os
+import json
+import time
+import uuid
 import base64
-from typing import Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Iterator, List, Optional, Tuple
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from core.color import MOOD_NAME_MAP
+
 # .env 파일 로드
 load_dotenv()
 
@@ -80,6 +88,9 @@ def analyze_image_for_dalle(image_path: str) -> str:
         return f"이미지 분석 오류: {str(e)}"
 
 
+DALLE_DOWNLOAD_TIMEOUT = 60  # 생성된 이미지 내려받기 제한 시간(초)
+
+
 def generate_image_with_dalle(prompt: str, output_path: str) -> bool:
     """
     DALL-E 3로 이미지 생성
@@ -104,10 +115,19 @@ def generate_image_with_dalle(prompt: str, output_path: str) -> bool:
         image_url = response.data[0].url
         
         # 이미지 다운로드 및 저장
+        # (임시 파일에 다 받은 뒤 os.replace → 작업 상태의 image_ready가 반쯤 쓴 파일을 보지 않음)
         import requests
-        img_data = requests.get(image_url).content
-        with open(output_path, 'wb') as handler:
-            handler.write(img_data)
+        download = requests.get(image_url, timeout=DALLE_DOWNLOAD_TIMEOUT)
+        download.raise_for_status()
+        tmp_path = f"{output_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(tmp_path, 'wb') as handler:
+                handler.write(download.content)
+            os.replace(tmp_path, output_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
         
         return True
     
@@ -186,6 +206,30 @@ def get_ai_response(
     else:
         print(f"❌ DALL-E 조건 불만족 - 일반 응답으로 진행")
     
+    # OpenAI API 호출
+    try:
+        response = client.chat.completions.create(**_ai_request(
+            mood_color, mood_text, mode, interaction_type, user_content, is_final, image_path,
+        ))
+        return response.choices[0].message.content.strip()
+    
+    except Exception as e:
+        return f"AI 응답 중 오류가 발생했습니다: {str(e)}"
+
+
+def _ai_request(
+    mood_color: str,
+    mood_text: str,
+    mode: str,
+    interaction_type: str,
+    user_content: Optional[str] = None,
+    is_final: bool = False,
+    image_path: Optional[str] = None,
+) -> Dict:
+    """
+    get_ai_response / stream_ai_response 공통: chat.completions.create 인자 구성
+    - 이미지가 있으면 Vision(gpt-4o), 없으면 gpt-4o-mini
+    """
     # 공통 시스템 프롬프트 (기획서: 감정 판단 금지)
     if is_final:
         # 2회차: 공감 마무리형
@@ -321,75 +365,777 @@ def get_ai_response(
         else:
             user_prompt += "위 내용을 개선하거나 다듬어주세요. **질문하지 말고, 바로 개선된 버전을 제시하세요.**"
     
-    # OpenAI API 호출
-    try:
-        # 이미지가 있는 경우 (draw 모드 + Vision)
-        if image_path and os.path.exists(image_path):
-            # 이미지를 base64로 인코딩
-            base64_image = encode_image_to_base64(image_path)
-            
-            # Vision API 사용 (gpt-4o 필요)
-            response = client.chat.completions.create(
-                model="gpt-4o",  # Vision 지원 모델
-                messages=[
-                    {"role": "system", "content": system_prompt + "\n\n" + mode_instruction},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": user_prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=300,
-            )
-        else:
-            # 텍스트만 있는 경우 (기존 방식)
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt + "\n\n" + mode_instruction},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=300,
-            )
+    system_content = system_prompt + "\n\n" + mode_instruction
+    
+    # 이미지가 있는 경우 (draw 모드 + Vision)
+    if image_path and os.path.exists(image_path):
+        # 이미지를 base64로 인코딩
+        base64_image = encode_image_to_base64(image_path)
         
-        return response.choices[0].message.content.strip()
+        # Vision API 사용 (gpt-4o 필요)
+        return {
+            "model": "gpt-4o",  # Vision 지원 모델
+            "messages": [
+                {"role": "system", "content": system_content},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": user_prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:image/jpeg;base64,{base64_image}"
+                            }
+                        }
+                    ]
+                }
+            ],
+            "temperature": 0.7,
+            "max_tokens": 300,
+        }
     
-    except Exception as e:
-        return f"AI 응답 중 오류가 발생했습니다: {str(e)}"
+    # 텍스트만 있는 경우 (기존 방식)
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 300,
+    }
 
 
-def get_closing_message(
-    initial_color: str,
-    final_color: str,
+# ---------------------------------------------------------
+# AI 작업 결과 공유 (gunicorn 워커 여러 개)
+# - 스트림/작업 버퍼는 시작한 워커의 메모리에만 있으므로
+#   상태와 최종 결과를 AI_RESULTS_DIR/<id>.json 에도 저장 (임시 파일 → os.replace)
+# - 다른 워커로 간 요청은 이 파일로 끝났는지 확인하고 결과를 가져감
+# - 설정하지 않으면(configure_ai_results(None)) 메모리에만 둠 (워커 1개용)
+# - AI_RESULT_TTL초가 지난 파일은 새 작업을 시작할 때 정리
+# ---------------------------------------------------------
+
+AI_RESULT_TTL = 60 * 60.0
+AI_RESULT_POLL = 0.25       # 다른 워커의 결과를 기다릴 때 파일 확인 간격(초)
+AI_RESULT_PRUNE_EVERY = 60.0
+
+AI_RESULTS_DIR: Optional[str] = None
+_ai_results_pruned = 0.0
+
+
+def configure_ai_results(path: Optional[str]) -> None:
+    """AI 작업 결과를 공유할 폴더 설정 (None이면 메모리에만)"""
+    global AI_RESULTS_DIR
+    AI_RESULTS_DIR = path or None
+    if AI_RESULTS_DIR:
+        os.makedirs(AI_RESULTS_DIR, exist_ok=True)
+
+
+def _ai_result_path(result_id: str) -> Optional[str]:
+    # id는 uuid4 hex만 사용 (경로 조작 방지)
+    if not AI_RESULTS_DIR or not result_id or not result_id.isalnum():
+        return None
+    return os.path.join(AI_RESULTS_DIR, f"{result_id}.json")
+
+
+def save_ai_result(result_id: str, state: Dict) -> None:
+    """작업 상태/결과 저장 (실패해도 메모리 쪽은 계속 동작)"""
+    path = _ai_result_path(result_id)
+    if path is None:
+        return
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ AI 결과 저장 실패: {result_id} ({e})")
+
+
+def load_ai_result(result_id: Optional[str]) -> Optional[Dict]:
+    """저장된 작업 상태 (없으면 None)"""
+    path = _ai_result_path(result_id or "")
+    if path is None:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def wait_ai_result(result_id: Optional[str], timeout: float) -> Optional[Dict]:
+    """다른 워커의 작업이 끝날 때까지 최대 timeout초 파일을 확인 → 마지막으로 읽은 상태"""
+    deadline = time.time() + timeout
+    while True:
+        state = load_ai_result(result_id)
+        if state is None or state.get("status") == "done" or time.time() >= deadline:
+            return state
+        time.sleep(AI_RESULT_POLL)
+
+
+def discard_ai_result(result_id: Optional[str]) -> None:
+    path = _ai_result_path(result_id or "")
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _prune_ai_results() -> None:
+    """AI_RESULT_TTL이 지난 결과 파일 정리 (AI_RESULT_PRUNE_EVERY초에 한 번만)"""
+    global _ai_results_pruned
+    now = time.time()
+    if not AI_RESULTS_DIR or now - _ai_results_pruned < AI_RESULT_PRUNE_EVERY:
+        return
+    _ai_results_pruned = now
+    try:
+        names = os.listdir(AI_RESULTS_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(AI_RESULTS_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > AI_RESULT_TTL:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------
+# DALL-E 생성 작업 큐 (draw + develop)
+# - 이미지 분석(gpt-4o) → DALL-E 생성 → 내려받기가 20~40초 걸리므로
+#   요청 안에서 하지 않고 스레드 풀(DALLE_WORKERS개)에서 get_ai_response를 실행
+# - start_dalle_job은 작업 id만 돌려주고 바로 반환 → /jobs/<id>로 상태 확인
+# - 끝난 지 DALLE_JOB_TTL초가 지난 작업 / DALLE_JOB_MAX개를 넘는 작업은 버림
+# - 상태가 바뀔 때마다 결과 파일에도 저장 → 다른 워커도 get_dalle_job으로 상태/결과를 봄
+# ---------------------------------------------------------
+
+DALLE_WORKERS = 2
+DALLE_JOB_MAX = 256
+DALLE_JOB_TTL = 60 * 60.0
+DALLE_JOB_TIMEOUT = 10 * 60.0  # 시작 후 이 시간(초)이 지나도 결과가 없으면 실패로 처리
+
+
+class DalleJob:
+    """
+    DALL-E 생성 작업 하나
+
+    status: queued(대기) → running(생성 중) → done(끝, image_ready로 성공 여부)
+    """
+
+    def __init__(self, job_id: str, output_path: str):
+        self.id = job_id
+        self.output_path = output_path
+        self.status = "queued"
+        self.message: Optional[str] = None
+        self.created = time.time()
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def image_ready(self) -> bool:
+        return self.done and os.path.exists(self.output_path)
+
+    def wait(self, timeout: float) -> bool:
+        """끝날 때까지 최대 timeout초 기다림 → 끝났는지"""
+        return self._done.wait(timeout)
+
+    @classmethod
+    def from_result(cls, state: Dict) -> "DalleJob":
+        """다른 워커의 작업 (결과 파일) → 상태만 담은 DalleJob"""
+        job = cls(str(state.get("id") or ""), str(state.get("output_path") or ""))
+        job.status = str(state.get("status") or "queued")
+        job.message = state.get("message")
+        job.created = float(state.get("created") or job.created)
+        if job.status == "done":
+            job._done.set()
+        return job
+
+    def save(self) -> None:
+        save_ai_result(self.id, {
+            "kind": "dalle",
+            "id": self.id,
+            "status": self.status,
+            "message": self.message,
+            "output_path": self.output_path,
+            "created": self.created,
+        })
+
+    def to_json(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "message": self.message,
+            "image_ready": self.image_ready,
+            "image_filename": os.path.basename(self.output_path) if self.image_ready else None,
+            "elapsed": round(time.time() - self.created, 1),
+        }
+
+    def _run(self, kwargs: Dict) -> None:
+        self.status = "running"
+        self.save()
+        try:
+            self.message = get_ai_response(**kwargs)
+        except Exception as e:
+            self.message = f"이미지 생성 중 오류가 발생했어요: {str(e)}"
+        finally:
+            self.status = "done"
+            self.save()
+            self._done.set()
+            print(f"✅ DALL-E 작업 끝: {self.id} (이미지 {'있음' if self.image_ready else '없음'})")
+
+
+_dalle_pool: Optional[ThreadPoolExecutor] = None
+_dalle_jobs: "OrderedDict[str, DalleJob]" = OrderedDict()
+_dalle_lock = threading.Lock()
+
+
+def start_dalle_job(**kwargs) -> str:
+    """
+    DALL-E 생성(get_ai_response의 draw + develop 경로)을 백그라운드에서 시작
+    - 인자는 get_ai_response와 같음 (new_image_path 필수)
+
+    Returns:
+        작업 id (get_dalle_job / /jobs/<id>에 사용)
+    """
+    global _dalle_pool
+    job_id = uuid.uuid4().hex
+    job = DalleJob(job_id, kwargs["new_image_path"])
+    _prune_ai_results()
+    job.save()
+    with _dalle_lock:
+        if _dalle_pool is None:
+            _dalle_pool = ThreadPoolExecutor(max_workers=DALLE_WORKERS, thread_name_prefix="dalle")
+        now = time.time()
+        for old_id, old in list(_dalle_jobs.items()):
+            if len(_dalle_jobs) < DALLE_JOB_MAX and now - old.created <= DALLE_JOB_TTL:
+                break
+            del _dalle_jobs[old_id]
+        _dalle_jobs[job_id] = job
+        _dalle_pool.submit(job._run, kwargs)
+    print(f"🎨 DALL-E 작업 등록: {job_id}")
+    return job_id
+
+
+def get_dalle_job(job_id: Optional[str]) -> Optional[DalleJob]:
+    """이 워커의 작업, 없으면 결과 파일의 상태 (둘 다 없으면 None)"""
+    with _dalle_lock:
+        job = _dalle_jobs.get(job_id or "")
+    if job is not None:
+        return job
+    state = load_ai_result(job_id)
+    if state is None or state.get("kind") != "dalle":
+        return None
+    return DalleJob.from_result(state)
+
+
+def discard_dalle_job(job_id: Optional[str]) -> None:
+    with _dalle_lock:
+        _dalle_jobs.pop(job_id or "", None)
+    discard_ai_result(job_id)
+
+
+# ---------------------------------------------------------
+# AI 응답 스트리밍 (step 5 → SSE)
+# - stream_ai_response: stream=True로 받은 토큰 조각을 그대로 yield
+# - start_ai_response_stream: 백그라운드 스레드가 AIResponseStream 버퍼를 채움
+#   → SSE 연결이 끊겨도 생성은 끝까지 진행되고, 최종 텍스트는 서버에 남음
+#   → app.py가 끝난 스트림의 text를 draft["ai_response"]로 옮김
+# - 끝난 지 AI_STREAM_TTL초가 지난 스트림 / AI_STREAM_MAX개를 넘는 스트림은 버림
+# - 최종 텍스트는 결과 파일로도 남김 → 다른 워커도 get_ai_stream으로 끝난 스트림을 꺼냄
+#   (토큰을 실시간으로 받으려면 SSE가 시작한 워커로 가야 함: 워커 1개 또는 sticky session)
+# ---------------------------------------------------------
+
+AI_STREAM_MAX = 256
+AI_STREAM_TTL = 30 * 60.0
+AI_STREAM_IDLE_TIMEOUT = 60.0  # 토큰이 이 시간(초) 동안 안 오면 SSE를 닫음
+AI_STREAM_TIMEOUT = 5 * 60.0   # 시작 후 이 시간(초)이 지나도 결과가 없으면 실패로 처리
+
+
+def stream_ai_response(
+    mood_color: str,
+    mood_text: str,
     mode: str,
-    ai_used: bool = False,
-) -> str:
+    interaction_type: str,
+    user_content: Optional[str] = None,
+    is_final: bool = False,
+    image_path: Optional[str] = None,
+) -> Iterator[str]:
     """
-    AI 한마디 - 세션 마무리 메시지
-    
-    기획서 부록:
-    - 감정을 해석하거나 평가하지 않음
-    - 오늘의 감정 기록이 완료되었음을 부드럽게 안내
-    
+    get_ai_response의 스트리밍 버전 (DALL-E 생성은 하지 않음)
+
+    Yields:
+        응답 텍스트 조각 (오류가 나면 오류 안내 문장)
+    """
+    try:
+        response = client.chat.completions.create(
+            **_ai_request(mood_color, mood_text, mode, interaction_type, user_content, is_final, image_path),
+            stream=True,
+        )
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    except Exception as e:
+        yield f"AI 응답 중 오류가 발생했습니다: {str(e)}"
+
+
+class AIResponseStream:
+    """백그라운드에서 채워지는 응답 버퍼 (여러 SSE 연결이 처음부터 다시 읽을 수 있음)"""
+
+    def __init__(self):
+        self.created = time.time()
+        self.done = False
+        self._chunks: List[str] = []
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_result(cls, state: Dict) -> "AIResponseStream":
+        """다른 워커가 끝낸 스트림 (결과 파일) → 끝난 버퍼"""
+        stream = cls()
+        stream.created = float(state.get("created") or stream.created)
+        stream._chunks.append(str(state.get("text") or ""))
+        stream.done = True
+        return stream
+
+    @property
+    def text(self) -> str:
+        with self._cond:
+            return "".join(self._chunks).strip()
+
+    def append(self, chunk: str) -> None:
+        with self._cond:
+            self._chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+
+    def wait(self, timeout: float) -> bool:
+        """끝날 때까지 최대 timeout초 기다림 → 끝났는지"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done, timeout)
+            return self.done
+
+    def iter_chunks(self, idle_timeout: float = AI_STREAM_IDLE_TIMEOUT) -> Iterator[str]:
+        """처음부터 조각을 yield, 새 조각이 오면 이어서 (끝나거나 idle_timeout 동안 조용하면 멈춤)"""
+        index = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: index < len(self._chunks) or self.done, idle_timeout):
+                    return
+                chunks = self._chunks[index:]
+                done = self.done
+            index += len(chunks)
+            yield from chunks
+            if done:
+                return
+
+
+_ai_streams: "OrderedDict[str, AIResponseStream]" = OrderedDict()
+_ai_streams_lock = threading.Lock()
+
+
+def start_ai_response_stream(**kwargs) -> str:
+    """
+    stream_ai_response를 백그라운드 스레드에서 시작 (인자는 stream_ai_response와 같음)
+
+    Returns:
+        스트림 id (get_ai_stream / SSE 주소에 사용)
+    """
+    stream_id = uuid.uuid4().hex
+    stream = AIResponseStream()
+    _prune_ai_results()
+    save_ai_result(stream_id, {"kind": "stream", "status": "running", "created": stream.created})
+    with _ai_streams_lock:
+        now = time.time()
+        for old_id, old in list(_ai_streams.items()):
+            if len(_ai_streams) < AI_STREAM_MAX and now - old.created <= AI_STREAM_TTL:
+                break
+            del _ai_streams[old_id]
+        _ai_streams[stream_id] = stream
+
+    def produce():
+        try:
+            for chunk in stream_ai_response(**kwargs):
+                stream.append(chunk)
+        finally:
+            # 파일을 먼저 → 이 워커에서 끝난 것을 본 요청은 다른 워커에서도 결과를 찾을 수 있음
+            save_ai_result(stream_id, {
+                "kind": "stream", "status": "done", "created": stream.created, "text": stream.text,
+            })
+            stream.finish()
+            print(f"✅ AI 스트리밍 완료: {stream_id} ({len(stream.text)}자)")
+
+    threading.Thread(target=produce, name=f"ai-stream-{stream_id[:8]}", daemon=True).start()
+    print(f"🤖 AI 스트리밍 시작: {stream_id}")
+    return stream_id
+
+
+def get_ai_stream(stream_id: Optional[str], wait: float = 0.0) -> Optional[AIResponseStream]:
+    """
+    이 워커의 스트림, 없으면 다른 워커가 끝낸 스트림(결과 파일, 최대 wait초 기다림)
+
+    Returns:
+        스트림, 또는 None (다른 워커에서 아직 생성 중이거나 사라짐)
+    """
+    with _ai_streams_lock:
+        stream = _ai_streams.get(stream_id or "")
+    if stream is not None:
+        return stream
+    state = wait_ai_result(stream_id, wait)
+    if state is None or state.get("kind") != "stream" or state.get("status") != "done":
+        return None
+    return AIResponseStream.from_result(state)
+
+
+def discard_ai_stream(stream_id: Optional[str]) -> None:
+    with _ai_streams_lock:
+        _ai_streams.pop(stream_id or "", None)
+    discard_ai_result(stream_id)
+
+
+# ---------------------------------------------------------
+# 마무리 메시지 캐시
+# - 프롬프트가 (감정 이름, 표현 방식, AI 사용 여부)로만 정해지므로 이 조합을 키로 저장
+# - 키마다 CLOSING_VARIANTS개까지 서로 다른 응답을 모은 뒤 돌아가며 보여줌
+#   → step 7 새로고침/뒤로가기에 API를 다시 부르지 않음
+# - 최대 CLOSING_CACHE_SIZE개 키 (LRU), CLOSING_CACHE_TTL초가 지나면 새로 생성
+# - (선택) configure_closing_cache(path=...)로 JSON 파일에 저장 → 재시작해도 유지
+# ---------------------------------------------------------
+
+CLOSING_VARIANTS = 3
+CLOSING_CACHE_SIZE = 256
+CLOSING_CACHE_TTL = 7 * 24 * 3600.0
+CLOSING_CACHE_VERSION = 1
+
+ClosingKey = Tuple[str, str, bool]
+
+
+class ClosingMessageCache:
+    """
+    (감정, 모드, AI 사용) → 마무리 메시지 변형 목록
+
+    - get(key): 변형이 다 모였으면 다음 변형(돌려가며), 아니면 None (→ 새로 생성)
+    - add(key, message): 새로 생성한 변형 추가
+    - 파일 저장은 키의 변형이 다 모인 순간에만 (add마다 전체 파일을 다시 쓰지 않음)
+      → 덜 모인 변형은 재시작하면 다시 생성될 수 있음
+    """
+
+    def __init__(
+        self,
+        max_size: int = CLOSING_CACHE_SIZE,
+        ttl_s: float = CLOSING_CACHE_TTL,
+        variants: int = CLOSING_VARIANTS,
+        path: Optional[str] = None,
+    ):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.variants = variants
+        self.path = path
+        self._entries: "OrderedDict[ClosingKey, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def get(self, key: ClosingKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry["created"] > self.ttl_s:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            if len(entry["messages"]) < self.variants:
+                return None
+            message = entry["messages"][entry["next"] % len(entry["messages"])]
+            entry["next"] += 1
+            return message
+
+    def add(self, key: ClosingKey, message: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"messages": [], "created": time.time(), "next": 0}
+                self._entries[key] = entry
+            completed = False
+            if len(entry["messages"]) < self.variants:
+                entry["messages"].append(message)
+                completed = len(entry["messages"]) == self.variants
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            if self.path and completed:
+                self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # 디스크 저장 (잠금 안에서 호출)
+
+    def _save(self) -> None:
+        data = {
+            "version": CLOSING_CACHE_VERSION,
+            "entries": [
+                {"key": list(key), "messages": entry["messages"], "created": entry["created"]}
+                for key, entry in self._entries.items()
+            ],
+        }
+        # 워커/프로세스마다 다른 임시 파일 → 같은 경로를 쓰는 다른 워커와 섞이지 않음
+        tmp_path = f"{self.path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ 마무리 메시지 캐시 저장 실패: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 마무리 메시지 캐시 읽기 실패 (무시): {e}")
+            return
+        if not isinstance(data, dict) or data.get("version") != CLOSING_CACHE_VERSION:
+            return
+
+        now = time.time()
+        for item in data.get("entries", []):
+            try:
+                mood, mode, ai_used = item["key"]
+                messages = [m for m in item["messages"] if isinstance(m, str)][: self.variants]
+                created = float(item["created"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if messages and now - created <= self.ttl_s:
+                self._entries[(str(mood), str(mode), bool(ai_used))] = {
+                    "messages": messages, "created": created, "next": 0,
+                }
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        print(f"🌙 마무리 메시지 캐시 {len(self._entries)}개 불러옴: {self.path}")
+
+
+_closing_cache = ClosingMessageCache()
+
+
+def configure_closing_cache(
+    ttl_s: float = CLOSING_CACHE_TTL,
+    path: Optional[str] = None,
+    max_size: int = CLOSING_CACHE_SIZE,
+    variants: int = CLOSING_VARIANTS,
+) -> ClosingMessageCache:
+    """마무리 메시지 캐시 설정 (path를 주면 디스크에 저장/복원)"""
+    global _closing_cache
+    _closing_cache = ClosingMessageCache(max_size=max_size, ttl_s=ttl_s, variants=variants, path=path)
+    return _closing_cache
+
+
+def closing_cache_key(mood_name: str, mode: str, ai_used: bool) -> ClosingKey:
+    return (mood_name or "", mode or "", bool(ai_used))
+
+
+# ---------------------------------------------------------
+# 마무리 메시지 사전 생성 테이블
+# - 감정 21개 × 표현 방식 3개 × AI 사용 여부 2 = 126개 조합을 미리 만들어 둔 JSON 파일
+#   (flask --app app pregen-closing-messages, API 동시 호출 또는 --offline 문장 틀)
+# - get_closing_message는 테이블 → 캐시 → 실시간 생성 순서로 찾음
+#   → 테이블이 있으면 step 7에서 모델을 기다리지 않음
+# - 프롬프트를 바꾸면 CLOSING_PROMPT_VERSION을 올릴 것 (예전 테이블은 무시됨)
+# ---------------------------------------------------------
+
+CLOSING_TABLE_VERSION = 1
+CLOSING_PROMPT_VERSION = 1
+CLOSING_MODEL = "gpt-4o-mini"
+CLOSING_FALLBACK = "오늘의 감정이 기록되었어요. 🌙"
+
+# 표현 방식 한글화
+MODE_NAMES_KR = {
+    "write": "글쓰기",
+    "draw": "그림",
+    "music": "음악",
+}
+
+_closing_table: Dict[ClosingKey, List[str]] = {}
+_closing_table_next: Dict[ClosingKey, int] = {}
+_closing_table_lock = threading.Lock()
+
+
+def closing_table_keys() -> List[ClosingKey]:
+    """사전 생성할 모든 조합 (감정 이름, 표현 방식, AI 사용 여부)"""
+    return [
+        (mood_name, mode, ai_used)
+        for mood_name in MOOD_NAME_MAP.values()
+        for mode in MODE_NAMES_KR
+        for ai_used in (False, True)
+    ]
+
+
+def load_closing_table(path: str) -> int:
+    """
+    사전 생성 테이블 읽기 (없거나 버전이 다르면 비워 둠)
+
+    Returns:
+        읽어 들인 조합 수
+    """
+    global _closing_table, _closing_table_next
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 마무리 메시지 테이블 읽기 실패 (무시): {e}")
+        return 0
+    if not isinstance(data, dict) or data.get("version") != CLOSING_TABLE_VERSION:
+        print(f"⚠️ 마무리 메시지 테이블 버전이 달라서 무시: {path}")
+        return 0
+    if data.get("prompt_version") != CLOSING_PROMPT_VERSION:
+        print(f"⚠️ 마무리 메시지 테이블이 예전 프롬프트로 만들어져서 무시: {path} (다시 생성해주세요)")
+        return 0
+
+    table: Dict[ClosingKey, List[str]] = {}
+    for item in data.get("entries", []):
+        try:
+            key = closing_cache_key(item["mood"], item["mode"], item["ai_used"])
+            messages = [m for m in item["messages"] if isinstance(m, str) and m]
+        except (KeyError, TypeError):
+            continue
+        if messages:
+            table[key] = messages
+    with _closing_table_lock:
+        _closing_table, _closing_table_next = table, {}
+    print(f"🌙 마무리 메시지 테이블 {len(table)}개 조합 불러옴: {path}")
+    return len(table)
+
+
+def _closing_from_table(key: ClosingKey) -> Optional[str]:
+    with _closing_table_lock:
+        messages = _closing_table.get(key)
+        if not messages:
+            return None
+        index = _closing_table_next.get(key, 0)
+        _closing_table_next[key] = index + 1
+        return messages[index % len(messages)]
+
+
+def pregenerate_closing_table(
+    path: str,
+    variants: int = CLOSING_VARIANTS,
+    workers: int = 8,
+    offline: bool = False,
+) -> Dict[str, int]:
+    """
+    모든 조합의 마무리 메시지를 미리 만들어 path에 저장 (임시 파일 → os.replace)
+
     Args:
-        initial_color: 시작 색
-        final_color: 최종 색
-        mode: 표현 방식
-        ai_used: AI 사용 여부
-    
+        variants: 조합마다 만들 메시지 수
+        workers: API 동시 호출 수
+        offline: True면 API 없이 문장 틀로 생성 (키 없는 환경/개발용)
+
     Returns:
-        마무리 메시지
+        {"combos": 저장한 조합 수, "messages": 메시지 수, "failed": 실패한 조합 수}
     """
-    
+    keys = closing_table_keys()
+
+    def generate(key: ClosingKey) -> List[str]:
+        if offline:
+            return offline_closing_messages(*key)[:variants]
+        messages = []
+        for _ in range(variants):
+            try:
+                messages.append(_generate_closing_message(*key))
+            except Exception as e:
+                print(f"❌ 마무리 메시지 생성 실패 {key}: {e}")
+        return messages
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(generate, keys))
+
+    entries = [
+        {"mood": mood, "mode": mode, "ai_used": ai_used, "messages": messages}
+        for (mood, mode, ai_used), messages in zip(keys, results)
+        if messages
+    ]
+    data = {
+        "version": CLOSING_TABLE_VERSION,
+        "prompt_version": CLOSING_PROMPT_VERSION,
+        "model": "offline" if offline else CLOSING_MODEL,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "entries": entries,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+    return {
+        "combos": len(entries),
+        "messages": sum(len(entry["messages"]) for entry in entries),
+        "failed": len(keys) - len(entries),
+    }
+
+
+def _has_final_consonant(word: str) -> Optional[bool]:
+    """마지막 글자에 받침이 있는지 (한글이 아니면 None)"""
+    if not word or not ("가" <= word[-1] <= "힣"):
+        return None
+    return (ord(word[-1]) - ord("가")) % 28 != 0
+
+
+def _josa(word: str, with_final: str, without_final: str) -> str:
+    """받침에 맞는 조사 붙이기 (예: 설렘+을, 지침+이, 그리움+으로)"""
+    has_final = _has_final_consonant(word)
+    if has_final is None:
+        return f"{word}{with_final}({without_final})"
+    if with_final == "으로" and (ord(word[-1]) - ord("가")) % 28 == 8:  # ㄹ 받침은 '로'
+        return word + without_final
+    return word + (with_final if has_final else without_final)
+
+
+def offline_closing_messages(mood_name: str, mode: str, ai_used: bool) -> List[str]:
+    """
+    API 없이 만드는 마무리 메시지 (사전 생성 --offline 용 문장 틀)
+    - 시스템 프롬프트와 같은 원칙: 감정을 평가하지 않고 따뜻한 바람만 전함
+    """
+    mode_kr = MODE_NAMES_KR.get(mode, mode)
+    how = "AI와 함께 " if ai_used else "스스로 "
+    return [
+        f"오늘의 {_josa(mood_name, '이', '가')} {_josa(mode_kr, '으로', '로')} 기록되었어요. 편안한 시간 되길 바랄게요.",
+        f"{_josa(mood_name, '을', '를')} 담은 오늘이 남았어요. 차분한 저녁 보내길 바랍니다.",
+        f"{how}{_josa(mood_name, '을', '를')} {_josa(mode_kr, '으로', '로')} 표현했어요. 오늘 하루 포근하게 마무리되길 바래요.",
+    ]
+
+
+def _closing_prompts(mood_name: str, mode: str, ai_used: bool) -> Tuple[str, str]:
+    """마무리 메시지 (시스템, 사용자) 프롬프트 - 바꾸면 CLOSING_PROMPT_VERSION도 올릴 것"""
     system_prompt = """당신은 감정 기록 세션을 마무리하는 따뜻한 조력자입니다.
 
 **원칙:**
@@ -408,39 +1154,166 @@ def get_closing_message(
 - "외로움이 담긴 오늘이 기록되었어요. 차분한 시간 되길 바랄게요."
 """
     
-    # 표현 방식 한글화
-    mode_kr = {
-        "write": "글쓰기",
-        "draw": "그림",
-        "music": "음악"
-    }.get(mode, mode)
+    mode_kr = MODE_NAMES_KR.get(mode, mode)
     
     user_prompt = f"""오늘의 감정 기록이 완료되었습니다.
-- 감정: {initial_color}
+- 감정: {mood_name}
 - 표현 방식: {mode_kr}
 - AI 사용: {"예" if ai_used else "아니오"}
 
 이 감정에 맞는 따뜻한 마무리 인사를 해주세요.
 감정 이름을 언급하며 "~풀렸길 바래요", "~되길 바랍니다" 같은 따뜻한 바람을 전해주세요."""
+    return system_prompt, user_prompt
+
+
+def _generate_closing_message(mood_name: str, mode: str, ai_used: bool) -> str:
+    """마무리 메시지 한 번 생성 (API 호출, 실패하면 예외)"""
+    system_prompt, user_prompt = _closing_prompts(mood_name, mode, ai_used)
+    response = client.chat.completions.create(
+        model=CLOSING_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=0.6,
+        max_tokens=100,
+    )
+    return response.choices[0].message.content.strip()
+
+
+def get_closing_message(
+    initial_color: str,
+    final_color: str,
+    mode: str,
+    ai_used: bool = False,
+) -> str:
+    """
+    AI 한마디 - 세션 마무리 메시지
+    
+    기획서 부록:
+    - 감정을 해석하거나 평가하지 않음
+    - 오늘의 감정 기록이 완료되었음을 부드럽게 안내
+    
+    찾는 순서: 사전 생성 테이블 → 캐시 → 실시간 생성 (API)
+    
+    Args:
+        initial_color: 시작 색 (감정 이름)
+        final_color: 최종 색
+        mode: 표현 방식
+        ai_used: AI 사용 여부
+    
+    Returns:
+        마무리 메시지
+    """
+    
+    key = closing_cache_key(initial_color, mode, ai_used)
+    pregenerated = _closing_from_table(key)
+    if pregenerated is not None:
+        print(f"🌙 마무리 메시지 (테이블): {pregenerated}")
+        return pregenerated
+    cached = _closing_cache.get(key)
+    if cached is not None:
+        print(f"🌙 마무리 메시지 (캐시): {cached}")
+        return cached
     
     print(f"🌙 마무리 메시지 생성 중... (색: {initial_color} → {final_color}, 모드: {mode})")
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.6,
-            max_tokens=100,
-        )
-        
-        closing_msg = response.choices[0].message.content.strip()
+        closing_msg = _generate_closing_message(initial_color, mode, ai_used)
         print(f"✅ 마무리 메시지: {closing_msg}")
+        _closing_cache.add(key, closing_msg)  # 실패 시 기본 메시지는 저장하지 않음
         return closing_msg
     
     except Exception as e:
         # 오류 시 기본 메시지
         print(f"❌ 마무리 메시지 생성 실패: {e}")
-        return "오늘의 감정이 기록되었어요. 🌙"
+        return CLOSING_FALLBACK
+
+
+# ---------------------------------------------------------
+# 마무리 메시지 미리 가져오기 (step 6 → step 7)
+# - step 6을 그릴 때 이미 draft에 감정/모드/AI 사용이 다 있으므로
+#   그때 스레드 풀에서 get_closing_message를 시작하고 토큰만 draft에 저장
+# - step 7은 토큰으로 결과를 꺼냄 (아직이면 CLOSING_PREFETCH_WAIT초까지 기다림)
+#   → 사용자가 진하기를 고르는 동안 LLM 지연이 가려짐
+# - 그래도 안 끝났으면 같은 조합을 또 호출하지 않고 기본 메시지를 보여줌
+#   (진행 중인 호출은 끝나면 get_closing_message 안에서 캐시에 들어가 다음 세션이 씀)
+# - 토큰은 조합 키와 같이 저장 → step 6 이후 draft가 바뀌면 결과를 버림
+# ---------------------------------------------------------
+
+CLOSING_PREFETCH_WORKERS = 4
+CLOSING_PREFETCH_WAIT = 5.0      # step 7에서 기다리는 최대 시간(초)
+CLOSING_PREFETCH_MAX = 256       # 아직 안 찾아간 결과 최대 개수
+CLOSING_PREFETCH_TTL = 30 * 60.0  # 안 찾아간 결과를 버리는 시간(초)
+
+_prefetch_pool: Optional[ThreadPoolExecutor] = None
+_prefetched: "OrderedDict[str, Tuple[ClosingKey, float, Future]]" = OrderedDict()
+_prefetch_lock = threading.Lock()
+
+
+def prefetch_closing_message(
+    initial_color: str,
+    final_color: str,
+    mode: str,
+    ai_used: bool = False,
+) -> str:
+    """
+    마무리 메시지 생성을 백그라운드에서 시작
+
+    Returns:
+        take_closing_message에 넘길 토큰
+    """
+    global _prefetch_pool
+    key = closing_cache_key(initial_color, mode, ai_used)
+    token = uuid.uuid4().hex
+    with _prefetch_lock:
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(
+                max_workers=CLOSING_PREFETCH_WORKERS, thread_name_prefix="closing-prefetch"
+            )
+        now = time.time()
+        while _prefetched:
+            oldest_token, (_, created, _) = next(iter(_prefetched.items()))
+            if len(_prefetched) < CLOSING_PREFETCH_MAX and now - created <= CLOSING_PREFETCH_TTL:
+                break
+            del _prefetched[oldest_token]
+        future = _prefetch_pool.submit(get_closing_message, initial_color, final_color, mode, ai_used)
+        _prefetched[token] = (key, now, future)
+    print(f"🌙 마무리 메시지 미리 생성 시작: {key}")
+    return token
+
+
+def is_closing_prefetched(token: Optional[str], initial_color: str, mode: str, ai_used: bool = False) -> bool:
+    """이 조합으로 시작한 미리 가져오기가 아직 남아 있는지 (step 6 새로고침 시 중복 방지)"""
+    with _prefetch_lock:
+        entry = _prefetched.get(token or "")
+    return entry is not None and entry[0] == closing_cache_key(initial_color, mode, ai_used)
+
+
+def take_closing_message(
+    token: Optional[str],
+    initial_color: str,
+    mode: str,
+    ai_used: bool = False,
+    timeout: float = CLOSING_PREFETCH_WAIT,
+) -> Optional[str]:
+    """
+    미리 가져온 마무리 메시지 꺼내기 (한 번만)
+
+    Returns:
+        메시지 (timeout 안에 못 끝나면 CLOSING_FALLBACK - 같은 조합을 두 번 호출하지 않도록)
+        또는 None (토큰이 없음 / 조합이 바뀜 → 직접 생성)
+    """
+    with _prefetch_lock:
+        entry = _prefetched.pop(token or "", None)
+    if entry is None:
+        return None
+    key, _, future = entry
+    if key != closing_cache_key(initial_color, mode, ai_used):
+        print(f"ℹ️ draft가 바뀌어서 미리 만든 마무리 메시지는 버림: {key}")
+        return None
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        print(f"⏱️ 마무리 메시지 미리 생성이 {timeout}초 안에 안 끝남 - 기본 메시지 사용 (결과는 캐시로)")
+        return CLOSING_FALLBACK
@@ -6,48 +6,158 @@
 기획서 기준:
 - 하루의 감정 기록을 하나의 객체로 관리
 - 감정의 시작(기준 색) – 과정(활동, AI 사용) – 결과(최종 색)를 포함
+- 저장소(storage_local / storage_sqlite)의 조회 함수는 MoodRecord를 돌려줌
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import FrozenInstanceError
 from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
 
 
-@dataclass
 class MoodRecord:
     """
-    감정 기록 데이터 모델
-    
+    감정 기록 데이터 모델 (저장소가 읽어서 돌려주는 기록 한 건)
+
     기획서 기준:
     - 시작 색 (initial_color)
     - 최종 색 (final_color)
     - 활동 과정 추적
+
+    - __slots__: 기록마다 dict를 두지 않아 캐시/인덱스에 올려둘 때 메모리가 적음
+    - 읽기 전용(frozen): 캐시의 인스턴스를 복사 없이 여러 요청이 같이 씀
+      (바꿀 때는 replace()로 새 인스턴스)
+    - None = 값 없음 → to_json()에서 빠지고, get()은 기본값을 돌려줌
+    - 모르는 필드는 extra에 그대로 보관 (저장했다 다시 읽어도 사라지지 않음)
+    - 템플릿에서는 record.mood_text / record.get('mood_name') 둘 다 사용 가능
     """
-    # 기본 정보
-    date_time: str
-    mood_text: str
-    mode: str  # write / draw / music
-    
-    # 색상 정보 (핵심!)
-    initial_color: str  # 시작 색 (원색)
-    final_color: str    # 최종 색 (활동 후)
-    color_intensity: float  # 옅어진 정도 (0.0 ~ 0.8)
-    
-    # 활동 정보
-    expression_done: bool = False  # 표현 활동 완료 여부
-    ai_used: bool = False         # AI 사용 여부
-    ai_interaction_count: int = 0  # AI 사용 횟수
-    
-    # 내용
-    text_content: Optional[str] = None
-    draw_note: Optional[str] = None
-    background: Optional[str] = None
-    image_filename: Optional[str] = None
-    music_keywords: Optional[str] = None
-    ai_response: Optional[str] = None
-    
-    # 메타
-    color_confirmed: bool = False  # 최종 색 확인 여부
+
+    # 직렬화 순서 = 이 순서 (date_time이 맨 앞, 그 다음 id → STEP 3-I 빠른 디코딩)
+    FIELDS: Tuple[str, ...] = (
+        # 기본 정보
+        "date_time",
+        "id",
+        "mood_color",
+        "mood_text",
+        "mode",  # write / draw / music
+
+        # 내용
+        "text_content",
+        "draw_note",
+        "background",
+        "image_filename",
+        "music_keywords",
+        "ai_response",
+
+        # 활동 정보
+        "ai_used",               # AI 사용 여부
+        "initial_color",         # 시작 색 (원색)
+        "final_color",           # 최종 색 (활동 후)
+        "color_intensity",       # 옅어진 정도 (0.0 ~ 0.8)
+        "expression_done",       # 표현 활동 완료 여부
+        "ai_interaction_count",  # AI 사용 횟수
+
+        # 정규화 때 채우는 표시용 필드 + 메타
+        "initial_color_hex",
+        "mood_name",
+        "color_confirmed",       # 최종 색 확인 여부
+        "schema_version",
+    )
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, **fields: Any):
+        for name in self.FIELDS:
+            object.__setattr__(self, name, fields.pop(name, None))
+        object.__setattr__(self, "extra", fields or None)
+
+    @classmethod
+    def from_json(cls, obj: Dict[str, Any]) -> "MoodRecord":
+        """json.loads 결과(dict) → MoodRecord (__init__을 거치지 않는 빠른 경로)"""
+        self = object.__new__(cls)
+        get = obj.get
+        for name, setter in _SETTERS:
+            setter(self, get(name))
+        _set_extra(self, {k: v for k, v in obj.items() if k not in _FIELD_SET} or None)
+        return self
+
+    def to_json(self) -> Dict[str, Any]:
+        """json.dumps에 그대로 넘길 dict (필드 순서 유지, None인 필드는 뺌)"""
+        obj = {
+            name: value
+            for name, value in zip(self.FIELDS, self._values())
+            if value is not None
+        }
+        if self.extra:
+            obj.update(self.extra)
+        return obj
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """dict.get과 같은 모양 (템플릿과 예전 dict 코드 호환)"""
+        if name in _FIELD_SET:
+            value = getattr(self, name)
+        elif self.extra:
+            value = self.extra.get(name)
+        else:
+            value = None
+        return default if value is None else value
+
+    def __getitem__(self, name: str) -> Any:
+        # record["mood_text"] 같은 예전 dict 방식 읽기 호환 (값이 없으면 KeyError)
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    __iter__ = None  # __getitem__이 있어도 시퀀스처럼 순회되지 않게 (필드 목록은 to_json())
+
+    def replace(self, **changes: Any) -> "MoodRecord":
+        """일부 필드만 바꾼 새 인스턴스"""
+        obj = self.to_json()
+        obj.update(changes)
+        return MoodRecord.from_json(obj)
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def __getattr__(self, name: str) -> Any:
+        # slot에 없는 이름만 여기로 옴 → extra에서 찾기
+        extra = object.__getattribute__(self, "extra")
+        if extra and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, MoodRecord):
+            return NotImplemented
+        return self._values() == other._values() and self.extra == other.extra
+
+    __hash__ = None  # extra(dict)가 있을 수 있어 해시 불가
+
+    def __reduce__(self):
+        # 스냅샷(pickle): 값 튜플만 저장 → 읽을 때 from_json보다 빠르게 복원
+        return (_from_values, (self._values(), self.extra))
+
+    def __repr__(self) -> str:
+        return f"MoodRecord(date_time={self.date_time!r}, id={self.id!r}, mode={self.mode!r})"
+
+
+_FIELD_SET = frozenset(MoodRecord.FIELDS)
+_SETTERS = tuple((name, getattr(MoodRecord, name).__set__) for name in MoodRecord.FIELDS)
+_set_extra = MoodRecord.extra.__set__
+
+
+def _from_values(values: Tuple[Any, ...], extra: Optional[Dict[str, Any]]) -> MoodRecord:
+    self = object.__new__(MoodRecord)
+    for (_, setter), value in zip(_SETTERS, values):
+        setter(self, value)
+    _set_extra(self, extra)
+    return self
 
 
 def create_mood_record(
@@ -2,184 +2,2413 @@
 
 from __future__ import annotations
 
+import atexit
+import base64
+import gzip
+import hashlib
 import json
 import os
+import pickle
+import queue
+import re
+import threading
+import time
 import uuid
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import groupby, islice
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 프로세스 내 잠금만 사용
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # 설치되어 있지 않으면 표준 json으로 디코딩
+    orjson = None
 
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 
+from core.color import COLOR_MAP, MOOD_NAME_MAP, lighten_color, rgb_to_hex
+from core.models import MoodRecord
+
+
+# ---------------------------------------------------------
+# STEP 3-B. jsonl 저장/읽기
+# - 1줄 = 1기록
+# - 서버 껐다 켜도 남아있음
+# ---------------------------------------------------------
+
+def ensure_parent_dir(path: str) -> None:
+    """파일 저장 경로의 상위 폴더가 없으면 생성"""
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+
+def append_record(data_path: str, record: Dict[str, Any]) -> None:
+    """
+    jsonl에 한 줄 append
+    - 실제로는 레코드 날짜의 월 세그먼트(data/YYYY/MM.jsonl)에 기록
+    - 저장 전에 현재 스키마로 정규화 (읽을 때는 보정 작업 없음)
+    """
+    record = normalize_record(record)
+    year_month = _record_year_month(record) or datetime.now().strftime("%Y-%m")
+    path = segment_path(data_path, year_month)
+    if os.path.exists(path + COMPRESSED_SUFFIX):
+        # 이미 압축된 지난 달 → 압축 파일에 시간순으로 합침
+        _merge_into_compressed(data_path, year_month, [record])
+        return
+    _append_line(path, record)
+
+
+def append_records(data_path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    여러 건을 한꺼번에 저장 (가져오기용 배치 쓰기)
+    - 월 세그먼트별로 모아서 잠금 한 번 + write 한 번
+    - 세그먼트에 이미 더 최근 기록이 있으면 쓴 뒤 시간순으로 다시 정렬
+      (역방향 읽기가 파일 순서 = 시간 순서라고 가정하므로)
+    - 이미 압축된 달은 일반 파일을 새로 만들지 않고 압축 파일에 시간순으로 합침
+
+    Returns:
+        저장한 건수
+    """
+    batches: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        record = normalize_record(record)
+        year_month = _record_year_month(record) or datetime.now().strftime("%Y-%m")
+        batches.setdefault(year_month, []).append(record)
+
+    for year_month, batch in batches.items():
+        path = segment_path(data_path, year_month)
+        if os.path.exists(path + COMPRESSED_SUFFIX):
+            _merge_into_compressed(data_path, year_month, batch)
+            continue
+        batch.sort(key=_record_timestamp)
+        latest = next(_iter_file(path, reverse=True), None)
+        _write_lines(path, batch)
+        if latest is not None and _record_timestamp(batch[0]) < _record_timestamp(latest):
+            _sort_segment(path)
+    return sum(len(batch) for batch in batches.values())
+
+
+def _append_line(path: str, record: Dict[str, Any]) -> None:
+    """
+    세그먼트 파일 하나에 한 줄 append
+    - 그룹 커밋이 켜져 있으면 writer 스레드에 맡기고 fsync까지 기다림
+    """
+    if _group_writer is not None:
+        _group_writer.submit(path, record)
+    else:
+        _write_lines(path, [record])
+
+
+def _encode_line(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _write_lines(path: str, records: List[Dict[str, Any]]) -> None:
+    """
+    잠금을 잡고 여러 줄을 write 한 번으로 append + 캐시/인덱스 갱신
+    - fsync 여부는 내구성 정책(set_durability)을 따름
+    - 실행 중에 잘린 쓰기(디스크 가득 참, 쓰던 워커가 죽음)가 남아 있으면
+      먼저 그 꼬리를 .torn으로 격리 (안 그러면 새 줄이 깨진 바이트 뒤에 붙어서 같이 사라짐)
+    """
+    ensure_parent_dir(path)
+    data = b"".join(_encode_line(record) for record in records)
+    with _file_lock(path):
+        recover_segment(path)
+        before = _stat_signature(path)
+        with open(path, "ab") as f:
+            f.write(data)
+            _sync_after_write(f, path)
+        _extend_cache(path, before, records)
+        # 날짜 인덱스는 방금 쓴 줄만 추가로 읽어서 따라잡음
+        _load_date_index(path)
+        after = _stat_signature(path)
+        _update_rollup(path, before, after, records)
+        _update_recent(path, before, after, records)
+
+
+def read_last_n(data_path: str, n: int = 1) -> List[MoodRecord]:
+    """
+    최근 n개 레코드 반환 (최신이 먼저 오도록)
+    - 파일이 없으면 []
+    - 깨진 줄이 있어도 가능한 줄만 읽음(내구성)
+    """
+    if n <= 0:
+        return []
+    # 최신 세그먼트 끝에서부터 거꾸로, 필요한 만큼만 읽고 멈춤
+    return list(islice(iter_records(data_path, reverse=True), n))
+
+
+def read_all_records(data_path: str) -> List[MoodRecord]:
+    """
+    모든 레코드 반환 (최신이 먼저 오도록)
+    - 전체를 훑기만 하면 되는 곳은 iter_records를 직접 쓰는 편이 메모리에 유리
+    """
+    return list(iter_records(data_path, reverse=True))
+
+
+def read_records_by_date(data_path: str, date_str: str) -> List[MoodRecord]:
+    """
+    특정 날짜의 레코드만 반환
+    
+    Args:
+        data_path: jsonl 파일 경로
+        date_str: 날짜 문자열 (YYYY-MM-DD 형식)
+    
+    Returns:
+        해당 날짜의 레코드 리스트 (최신순)
+    """
+    start, end = _prefix_bounds(date_str)
+    return list(iter_records(data_path, start, end, reverse=True))
+
+
+def get_calendar_data(data_path: str, year: int, month: int) -> Dict[str, List[MoodRecord]]:
+    """
+    특정 년월의 캘린더 데이터 반환
+    
+    Args:
+        data_path: jsonl 파일 경로
+        year: 년도
+        month: 월
+    
+    Returns:
+        {
+            "2024-01-15": [record1, record2, ...],
+            "2024-01-16": [record3, ...],
+            ...
+        }
+    """
+    # 해당 년월 문자열 (예: "2024-01")
+    year_month_str = f"{year:04d}-{month:02d}"
+    start, end = _prefix_bounds(year_month_str)
+
+    calendar_data: Dict[str, List[MoodRecord]] = {}
+    # 최신순으로 읽으므로 날짜별 리스트도 그대로 최신순
+    for record in iter_records(data_path, start, end, reverse=True):
+        calendar_data.setdefault(_record_timestamp(record)[:10], []).append(record)
+
+    return dict(sorted(calendar_data.items()))
+
+
+# ---------------------------------------------------------
+# STEP 3-I. 빠른 디코딩
+# - build_record가 date_time을 항상 맨 앞에 직렬화하므로
+#   원문 바이트에서 timestamp만 먼저 잘라내 필터링 → 맞는 줄만 전체 디코딩
+# - orjson이 설치되어 있으면 그걸로 디코딩 (없으면 표준 json)
+# ---------------------------------------------------------
+
+_loads: Callable[[Any], Any] = orjson.loads if orjson is not None else json.loads
+
+# json.dumps 기본 형식 / 공백 없는 형식 둘 다 허용
+_TIMESTAMP_PREFIXES = (b'{"date_time": "', b'{"date_time":"')
+
+
+def _line_timestamp(line: bytes) -> Optional[str]:
+    """
+    줄 맨 앞의 date_time 값을 디코딩 없이 꺼냄
+    - 형식이 다르면(예전 timestamp 필드 등) None → 호출하는 쪽에서 전체 디코딩
+    """
+    for prefix in _TIMESTAMP_PREFIXES:
+        if line.startswith(prefix):
+            end = line.find(b'"', len(prefix))
+            if end == -1:
+                return None
+            try:
+                return line[len(prefix):end].decode("ascii")
+            except UnicodeDecodeError:
+                return None
+    return None
+
+
+_ID_PREFIXES = (b', "id": "', b',"id":"')
+
+
+def _line_id(line: bytes) -> Optional[str]:
+    """
+    date_time 바로 뒤에 오는 id 값을 디코딩 없이 꺼냄
+    - 형식이 다르면(id 없는 예전 줄 등) None → 호출하는 쪽에서 전체 디코딩
+    """
+    for prefix in _TIMESTAMP_PREFIXES:
+        if line.startswith(prefix):
+            end = line.find(b'"', len(prefix))
+            break
+    else:
+        return None
+    if end == -1:
+        return None
+    for id_prefix in _ID_PREFIXES:
+        if line.startswith(id_prefix, end + 1):
+            start = end + 1 + len(id_prefix)
+            close = line.find(b'"', start)
+            if close == -1:
+                return None
+            try:
+                return line[start:close].decode("ascii")
+            except UnicodeDecodeError:
+                return None
+    return None
+
+
+def _record_timestamp(obj: Any) -> str:
+    """디코딩된 줄 / MoodRecord의 timestamp (없거나 기록이 아니면 "")"""
+    if not isinstance(obj, (dict, MoodRecord)):
+        return ""
+    return obj.get("timestamp") or obj.get("date_time") or ""
+
+
+# ---------------------------------------------------------
+# STEP 3-E. 월별 세그먼트 파일
+# - data_path(data/mood_log.jsonl)는 '논리 경로'로만 사용
+# - 실제 기록은 data/YYYY/MM.jsonl 에 월별로 나눠 저장
+# - 조회는 필요한 월 세그먼트만 열고,
+#   아직 마이그레이션 안 된 단일 파일(data_path)이 있으면 가장 오래된 세그먼트로 취급
+# ---------------------------------------------------------
+
+_SEGMENT_YEAR_RE = re.compile(r"^\d{4}$")
+_SEGMENT_MONTH_RE = re.compile(r"^(\d{2})\.jsonl(\.gz)?$")
+
+
+def _record_year_month(record: Dict[str, Any]) -> Optional[str]:
+    """레코드의 "YYYY-MM" (날짜 필드가 없으면 None)"""
+    timestamp = record.get("date_time") or record.get("timestamp") or ""
+    if len(timestamp) >= 7 and timestamp[4] == "-":
+        return timestamp[:7]
+    return None
+
+
+def segment_path(data_path: str, year_month: str) -> str:
+    """("data/mood_log.jsonl", "2026-02") → data/2026/02.jsonl"""
+    root = os.path.dirname(data_path)
+    return os.path.join(root, year_month[:4], f"{year_month[5:7]}.jsonl")
+
+
+def list_segments(data_path: str) -> List[Tuple[str, str]]:
+    """
+    존재하는 월 세그먼트 목록 (오래된 순)
+    - 압축된 달(MM.jsonl.gz)은 같은 달의 일반 파일(압축 뒤에 추가된 줄)보다 앞
+
+    Returns:
+        [("2026-01", "data/2026/01.jsonl"), ...]
+    """
+    root = os.path.dirname(data_path) or "."
+    segments: List[Tuple[str, str]] = []
+    try:
+        year_dirs = os.listdir(root)
+    except FileNotFoundError:
+        return []
+
+    for year in year_dirs:
+        year_dir = os.path.join(root, year)
+        if not _SEGMENT_YEAR_RE.match(year) or not os.path.isdir(year_dir):
+            continue
+        for name in os.listdir(year_dir):
+            match = _SEGMENT_MONTH_RE.match(name)
+            if match:
+                segments.append((f"{year}-{match.group(1)}", os.path.join(year_dir, name)))
+
+    segments.sort(key=lambda item: (item[0], not _is_compressed(item[1])))
+    return segments
+
+
+def _segment_files(
+    data_path: str,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+) -> List[str]:
+    """
+    [start_month, end_month] 범위에 걸치는 파일 목록 (오래된 순)
+    - 마이그레이션 전 단일 파일은 어느 달이든 포함될 수 있으므로 항상 맨 앞에 포함
+    """
+    paths: List[str] = []
+    if os.path.exists(data_path):
+        paths.append(data_path)
+
+    if start_month is not None and start_month == end_month:
+        # 한 달짜리 조회는 디렉터리를 뒤질 필요 없음
+        path = segment_path(data_path, start_month)
+        for candidate in (path + COMPRESSED_SUFFIX, path):
+            if os.path.exists(candidate):
+                paths.append(candidate)
+        return paths
+
+    for year_month, path in list_segments(data_path):
+        if start_month is not None and year_month < start_month:
+            continue
+        if end_month is not None and year_month > end_month:
+            continue
+        paths.append(path)
+    return paths
+
+
+def migrate_to_segments(data_path: str) -> Dict[str, int]:
+    """
+    단일 파일 로그(data_path)를 월별 세그먼트로 분할 (1회성 마이그레이션)
+    - 이미 세그먼트가 있는 달은 "기존 로그 줄 + 세그먼트 줄" 순서로 합침
+      (단일 파일 쪽이 항상 더 오래된 기록이므로)
+    - 날짜를 알 수 없는 줄은 원본 백업에만 남김
+    - 끝나면 원본은 data_path + ".migrated" 로 이름을 바꿔 보관
+
+    Returns:
+        {"2026-01": 5, "2026-02": 8, ...} 월별 이동한 줄 수
+    """
+    if not os.path.exists(data_path):
+        return {}
+
+    by_month: Dict[str, List[bytes]] = {}
+    with open(data_path, "rb") as f:
+        for raw in f:
+            line = raw.strip()
+            if not line:
+                continue
+            timestamp = _line_timestamp(line)
+            if timestamp is None:
+                try:
+                    timestamp = _record_timestamp(_loads(line))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+            year_month = timestamp[:7] if len(timestamp) >= 7 and timestamp[4] == "-" else None
+            if year_month:
+                by_month.setdefault(year_month, []).append(line + b"\n")
+
+    for year_month, lines in by_month.items():
+        path = segment_path(data_path, year_month)
+        ensure_parent_dir(path)
+        with _file_lock(path):
+            existing = b""
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    existing = f.read()
+            _atomic_write(path, lines + [existing])
+            _invalidate_cache(path)
+            rebuild_date_index(path)
+
+    os.replace(data_path, data_path + ".migrated")
+    _invalidate_cache(data_path)
+    rebuild_date_index(data_path)
+    index_path = date_index_path(data_path)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    return {year_month: len(lines) for year_month, lines in sorted(by_month.items())}
+
+
+# ---------------------------------------------------------
+# STEP 3-C. 파싱된 레코드 캐시 (프로세스 내)
+# - 매 요청마다 jsonl 전체를 json.loads 하지 않도록 메모리에 보관
+# - 파일의 (inode, size, mtime)이 그대로면 캐시 그대로 사용
+# - 같은 파일 뒤에 줄만 늘어났으면 늘어난 부분만 파싱해서 이어붙임
+# - 파일이 다시 쓰였으면(inode 변경, 크기 감소 등) 버리고 새로 읽음
+# - 캐시에는 dict 대신 MoodRecord(슬롯, 읽기 전용)를 보관
+#   → 기록당 메모리가 적고, 읽기 전용이라 복사 없이 그대로 내보냄
+# - 읽기(_iter_file)가 세그먼트를 처음 읽을 때 채움, 최대 CACHE_MAX_SEGMENTS개 (LRU)
+# - CACHE_MAX_FILE_BYTES보다 큰 파일(마이그레이션 전 단일 로그 등)은 캐시하지 않고 스트리밍
+# ---------------------------------------------------------
+
+CACHE_MAX_SEGMENTS = 64
+CACHE_MAX_FILE_BYTES = 8 * 1024 * 1024
+
+@dataclass
+class _CachedLog:
+    inode: int
+    size: int       # 파싱이 끝난 바이트 위치 (완결된 줄까지)
+    mtime_ns: int
+    records: List[MoodRecord]
+    lines: int = 0  # 파싱한 줄 수 (툼스톤 포함)
+    dead: int = 0   # 툼스톤 줄 + 툼스톤으로 지워진 줄 수 (컴팩션 판단용)
+
+
+_RECORD_CACHE: "OrderedDict[str, _CachedLog]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _store_cache(key: str, entry: _CachedLog) -> None:
+    """캐시에 넣고 오래 안 쓴 세그먼트부터 버림 (_CACHE_LOCK 안에서 호출)"""
+    _RECORD_CACHE[key] = entry
+    _RECORD_CACHE.move_to_end(key)
+    while len(_RECORD_CACHE) > CACHE_MAX_SEGMENTS:
+        _RECORD_CACHE.popitem(last=False)
+
+
+def _stat_signature(data_path: str) -> Optional[os.stat_result]:
+    """파일 stat (없으면 None)"""
+    try:
+        return os.stat(data_path)
+    except FileNotFoundError:
+        return None
+
+
+def _parse_lines(f, entry: _CachedLog) -> int:
+    """
+    현재 위치부터 완결된 줄(\n로 끝나는 줄)만 파싱해서 entry에 반영
+    - 깨진 줄은 스킵 (UX/내구성 우선)
+    - 쓰는 중인 마지막 줄은 건드리지 않음
+    - 툼스톤은 앞서 나온 기록을 지움
+
+    Returns:
+        파싱이 끝난 바이트 위치
+    """
+    consumed = f.tell()
+    for raw in f:
+        if not raw.endswith(b"\n"):
+            break
+        consumed += len(raw)
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            obj = _loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        entry.lines += 1
+        entry.dead += _apply_line(entry.records, obj)
+    return consumed
+
+
+def _cache_entry(data_path: str) -> Optional[_CachedLog]:
+    """
+    최신 상태의 캐시 항목 (파일이 없으면 None)
+    - CACHE_MAX_FILE_BYTES보다 큰 파일은 파싱만 하고 캐시에 남기지 않음
+    - 파싱은 _CACHE_LOCK 밖에서 (다른 세그먼트를 읽는 요청이 기다리지 않게)
+      잠금은 찾기와 넣기/버리기에만 잡음
+    """
+    key = os.path.abspath(data_path)
+    st = _stat_signature(data_path)
+    if st is None:
+        with _CACHE_LOCK:
+            _RECORD_CACHE.pop(key, None)
+        return None
+
+    with _CACHE_LOCK:
+        entry = _RECORD_CACHE.get(key)
+        if (
+            entry is not None
+            and entry.inode == st.st_ino
+            and entry.size == st.st_size
+            and entry.mtime_ns == st.st_mtime_ns
+        ):
+            _RECORD_CACHE.move_to_end(key)
+            return entry
+
+    # 같은 파일이 뒤로만 늘어난 경우 → 늘어난 부분만 파싱
+    # (기존 리스트를 읽고 있는 요청이 있을 수 있으므로 새 항목으로 교체)
+    if entry is not None and entry.inode == st.st_ino and st.st_size > entry.size:
+        new_entry = _CachedLog(
+            inode=st.st_ino,
+            size=entry.size,
+            mtime_ns=st.st_mtime_ns,
+            records=list(entry.records),
+            lines=entry.lines,
+            dead=entry.dead,
+        )
+    else:
+        new_entry = _CachedLog(inode=st.st_ino, size=0, mtime_ns=st.st_mtime_ns, records=[])
+
+    with open(data_path, "rb") as f:
+        f.seek(new_entry.size)
+        new_entry.size = _parse_lines(f, new_entry)
+
+    with _CACHE_LOCK:
+        if st.st_size > CACHE_MAX_FILE_BYTES:
+            _RECORD_CACHE.pop(key, None)
+            return new_entry
+        # 파싱하는 사이 다른 스레드가 같은 파일을 더 뒤까지 넣어 뒀으면 그쪽을 남김
+        current = _RECORD_CACHE.get(key)
+        if (
+            current is not None
+            and current is not entry
+            and current.inode == new_entry.inode
+            and current.size >= new_entry.size
+        ):
+            _RECORD_CACHE.move_to_end(key)
+            return current
+        _store_cache(key, new_entry)
+    return new_entry
+
+
+def _load_records(data_path: str) -> List[MoodRecord]:
+    """
+    파일 순서(오래된 것 먼저)대로 파싱된 살아있는 레코드 리스트 반환
+    - 반환된 리스트는 캐시 원본이므로 수정 금지
+    """
+    entry = _cache_entry(data_path)
+    return entry.records if entry is not None else []
+
+
+def _extend_cache(
+    data_path: str,
+    before: Optional[os.stat_result],
+    appended: List[Dict[str, Any]],
+) -> None:
+    """
+    append 직후 캐시에 방금 쓴 레코드만 이어붙임
+    - append 전 파일 상태가 캐시와 정확히 같았을 때만 (다른 프로세스가 끼어들었으면 무효화)
+    """
+    key = os.path.abspath(data_path)
+    after = _stat_signature(data_path)
+    with _CACHE_LOCK:
+        entry = _RECORD_CACHE.get(key)
+        if entry is None:
+            return
+        if (
+            before is None
+            or after is None
+            or entry.inode != before.st_ino
+            or entry.size != before.st_size
+            or entry.mtime_ns != before.st_mtime_ns
+        ):
+            _RECORD_CACHE.pop(key, None)
+            return
+        records = list(entry.records)
+        dead = sum(_apply_line(records, record) for record in appended)
+        _RECORD_CACHE[key] = _CachedLog(
+            inode=after.st_ino,
+            size=after.st_size,
+            mtime_ns=after.st_mtime_ns,
+            records=records,
+            lines=entry.lines + len(appended),
+            dead=entry.dead + dead,
+        )
+
+
+def _invalidate_cache(data_path: str) -> None:
+    """파일을 다시 쓴 뒤 캐시 폐기"""
+    with _CACHE_LOCK:
+        _RECORD_CACHE.pop(os.path.abspath(data_path), None)
+
+
+# ---------------------------------------------------------
+# STEP 3-F. 툼스톤 삭제 + 컴팩션
+# - 삭제 = 파일을 다시 쓰지 않고 툼스톤 한 줄을 append
+#   {"date_time": 대상, "_tombstone": true, "deleted_at": ...}
+# - 툼스톤은 같은 파일에서 자기보다 앞에 있는 같은 id 기록을 지움
+#   (id 없는 예전 기록을 지운 툼스톤은 id 없이 같은 date_time 기록을 지움)
+#   (date_time이 맨 앞이라 날짜 인덱스에도 대상 날짜로 잡힘)
+# - 모든 읽기 경로가 툼스톤을 반영
+# - 툼스톤 비율이 높아지면 백그라운드에서 임시 파일 + rename으로 재작성
+# ---------------------------------------------------------
+
+TOMBSTONE_KEY = "_tombstone"
+COMPACT_THRESHOLD = 0.3   # 죽은 줄 비율이 이 이상이면 컴팩션
+COMPACT_MIN_DEAD = 4      # 너무 작은 파일을 매번 다시 쓰지 않도록
+
+_COMPACTING: set = set()
+
+
+def _is_tombstone(obj: Any) -> bool:
+    return isinstance(obj, dict) and obj.get(TOMBSTONE_KEY) is True
+
+
+def _build_tombstone(date_time_str: str, record_id: Optional[str] = None) -> Dict[str, Any]:
+    tombstone: Dict[str, Any] = {"date_time": date_time_str}
+    if record_id:
+        tombstone["id"] = record_id
+    tombstone[TOMBSTONE_KEY] = True
+    tombstone["deleted_at"] = datetime.now().isoformat(timespec="seconds")
+    return tombstone
+
+
+def _tombstone_key(tombstone: Dict[str, Any]) -> Tuple[str, Any]:
+    """툼스톤이 지우는 대상: ("id", id) 또는 id가 없으면 ("date_time", date_time)"""
+    if tombstone.get("id"):
+        return ("id", tombstone["id"])
+    return ("date_time", tombstone.get("date_time"))
+
+
+def _record_key(record: Any) -> Tuple[str, Any]:
+    """이 기록(dict / MoodRecord)을 지우는 툼스톤의 대상 (id 없는 툼스톤은 id 없는 기록만 지움)"""
+    record_id = record.get("id")
+    if record_id:
+        return ("id", record_id)
+    return ("date_time", record.get("date_time"))
+
+
+def _tombstone_hits(tombstone: Dict[str, Any], record: Any) -> bool:
+    return _tombstone_key(tombstone) == _record_key(record)
+
+
+def _apply_line(records: List[MoodRecord], obj: Any) -> int:
+    """
+    파일 순서대로 읽은 한 줄을 records에 반영 (기록은 MoodRecord로 바꿔서 보관)
+
+    Returns:
+        늘어난 '죽은 줄' 수 (일반 기록이면 0)
+    """
+    if not _is_tombstone(obj):
+        records.append(MoodRecord.from_json(obj))
+        return 0
+
+    kept = [r for r in records if not _tombstone_hits(obj, r)]
+    removed = len(records) - len(kept)
+    records[:] = kept
+    return removed + 1
+
+
+def tombstone_share(path: str) -> float:
+    """세그먼트 파일 하나의 죽은 줄 비율 (0.0 ~ 1.0)"""
+    entry = _cache_entry(path)
+    if entry is None or entry.lines == 0:
+        return 0.0
+    return entry.dead / entry.lines
+
+
+def compact_segment(path: str) -> int:
+    """
+    세그먼트 파일 하나에서 툼스톤과 지워진 줄을 걷어내고 다시 씀
+    - 잠금을 잡은 채 임시 파일에 쓰고 os.replace (중간에 죽어도 원본 유지)
+
+    Returns:
+        걷어낸 줄 수
+    """
+    with _file_lock(path):
+        entry = _cache_entry(path)
+        if entry is None or entry.dead == 0:
+            return 0
+
+        before = _stat_signature(path)
+        _atomic_write(path, (_encode_line(record.to_json()) for record in entry.records))
+        _invalidate_cache(path)
+        rebuild_date_index(path)
+        after = _stat_signature(path)
+        _refresh_rollup_source(path, before, after)
+        _update_recent(path, before, after, [])
+
+    print(f"🧹 컴팩션 완료: {path} ({entry.dead}줄 정리)")
+    return entry.dead
+
+
+def _sort_segment(path: str) -> None:
+    """
+    세그먼트 파일을 시간순으로 다시 씀 (툼스톤과 지워진 줄도 같이 걷어냄)
+    - 요약(rollup)은 날짜별 순서가 바뀌므로 다음 조회 때 새로 만들어지게 둠
+    """
+    with _file_lock(path):
+        entry = _cache_entry(path)
+        if entry is None:
+            return
+        records = sorted(entry.records, key=_record_timestamp)
+        before = _stat_signature(path)
+        _atomic_write(path, (_encode_line(record.to_json()) for record in records))
+        _invalidate_cache(path)
+        rebuild_date_index(path)
+        _update_recent(path, before, _stat_signature(path), [])
+
+
+def compact(data_path: str, force: bool = False) -> Dict[str, int]:
+    """
+    모든 세그먼트 컴팩션 (관리 명령 / 수동 실행용)
+
+    Args:
+        force: True면 비율과 상관없이 툼스톤이 하나라도 있으면 정리
+
+    Returns:
+        {파일 경로: 걷어낸 줄 수}
+    """
+    result: Dict[str, int] = {}
+    for path in _segment_files(data_path):
+        if _is_compressed(path):
+            # 압축 세그먼트에는 툼스톤이 없음
+            continue
+        if force or _needs_compaction(path):
+            removed = compact_segment(path)
+            if removed:
+                result[path] = removed
+    return result
+
+
+def _needs_compaction(path: str) -> bool:
+    entry = _cache_entry(path)
+    if entry is None or entry.dead < COMPACT_MIN_DEAD:
+        return False
+    return entry.dead / entry.lines >= COMPACT_THRESHOLD
+
+
+def _maybe_compact_in_background(path: str) -> None:
+    """툼스톤 비율이 임계값을 넘으면 백그라운드 스레드로 컴팩션"""
+    if not _needs_compaction(path):
+        return
+    key = os.path.abspath(path)
+    with _CACHE_LOCK:
+        if key in _COMPACTING:
+            return
+        _COMPACTING.add(key)
+
+    def run() -> None:
+        try:
+            compact_segment(path)
+        except OSError as e:
+            print(f"❌ 컴팩션 실패: {path} ({e})")
+        finally:
+            with _CACHE_LOCK:
+                _COMPACTING.discard(key)
+
+    threading.Thread(target=run, name="mood-log-compact", daemon=True).start()
+
+
+# ---------------------------------------------------------
+# STEP 3-G. 파일 잠금 + 원자적 재작성 + 그룹 커밋
+# - gunicorn 워커 여러 개가 같은 세그먼트에 써도 줄이 섞이거나 사라지지 않도록
+#   쓰기는 항상 세그먼트 옆 .lock 파일에 fcntl.flock을 잡고 수행
+#   (세그먼트 자체는 컴팩션 때 새 inode로 바뀌므로 잠금 대상으로 쓰지 않음)
+# - 다시 쓰기는 임시 파일 → fsync → os.replace → 디렉터리 fsync
+# - 그룹 커밋: 몇 ms 안에 들어온 append를 모아 write 1번 + fsync 1번 (fsync는 STEP 3-L 정책)
+# - 프로세스 안의 잠금도 파일별 → 다른 달/다른 사용자 파일 쓰기는 서로 기다리지 않음
+#   (두 파일을 같이 잡는 곳은 압축 합치기 한 곳뿐: 항상 MM.jsonl → MM.jsonl.gz 순서)
+# ---------------------------------------------------------
+
+_PATH_LOCKS: Dict[str, threading.Lock] = {}   # 파일별 프로세스 내 쓰기 잠금 (세그먼트 수만큼만 생김)
+_PATH_LOCKS_GUARD = threading.Lock()
+_held_locks = threading.local()
+
+
+def _path_lock(key: str) -> threading.Lock:
+    with _PATH_LOCKS_GUARD:
+        lock = _PATH_LOCKS.get(key)
+        if lock is None:
+            lock = _PATH_LOCKS[key] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """
+    세그먼트 쓰기 잠금 (프로세스 내 파일별 Lock + 프로세스 간 flock)
+    - 같은 스레드에서 같은 파일을 다시 잡으면 그대로 통과
+    """
+    key = os.path.abspath(path)
+    held = getattr(_held_locks, "paths", None)
+    if held is None:
+        held = _held_locks.paths = set()
+    if key in held:
+        yield
+        return
+
+    with _path_lock(key):
+        fd = None
+        if fcntl is not None:
+            ensure_parent_dir(path)
+            fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        held.add(key)
+        try:
+            yield
+        finally:
+            held.discard(key)
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+def _fsync_dir(path: str) -> None:
+    """rename 결과가 디스크에 남도록 디렉터리 fsync (지원 안 하는 OS는 무시)"""
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: str, chunks: Iterable[bytes]) -> None:
+    """임시 파일에 전부 쓰고 fsync 후 rename (읽는 쪽은 옛 파일 또는 새 파일만 봄)"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(path))
+
+
+@dataclass
+class _PendingAppend:
+    path: str
+    record: Dict[str, Any]
+    done: threading.Event = field(default_factory=threading.Event)
+    error: Optional[BaseException] = None
+
+
+class GroupCommitWriter:
+    """
+    그룹 커밋 writer 스레드
+    - 첫 append가 들어온 뒤 window_ms 동안 들어온 append를 한 배치로 묶음
+    - 파일별로 write 1번 (+ fsync 모드면 fsync 1번)
+    - append_record를 부른 쪽은 자기 배치가 기록될 때까지 기다림
+    """
+
+    def __init__(self, window_ms: float = 5.0):
+        self.window = window_ms / 1000.0
+        self._queue: "queue.Queue[_PendingAppend]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="mood-log-group-commit", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, path: str, record: Dict[str, Any]) -> None:
+        pending = _PendingAppend(path=path, record=record)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+
+    def _collect_batch(self) -> List[_PendingAppend]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                return batch
+
+    def _run(self) -> None:
+        while True:
+            by_path: Dict[str, List[_PendingAppend]] = {}
+            for pending in self._collect_batch():
+                by_path.setdefault(pending.path, []).append(pending)
+
+            for path, items in by_path.items():
+                try:
+                    _write_lines(path, [p.record for p in items])
+                except Exception as e:
+                    for p in items:
+                        p.error = e
+                finally:
+                    for p in items:
+                        p.done.set()
+
+
+_group_writer: Optional[GroupCommitWriter] = None
+
+
+def enable_group_commit(window_ms: float = 5.0) -> None:
+    """
+    그룹 커밋 켜기 (프로세스당 한 번, 앱 시작 시 호출)
+    - fsync 모드(set_durability("fsync"))와 함께 쓰면
+      모든 append가 fsync까지 보장되지만, 요청마다 fsync하지 않고 배치당 1번
+    """
+    global _group_writer
+    if _group_writer is None:
+        _group_writer = GroupCommitWriter(window_ms)
+
+
+# ---------------------------------------------------------
+# STEP 3-L. 내구성(fsync) 정책 + 시작 시 복구
+# - none    : write만 (OS가 알아서 디스크에 씀, 가장 빠름 / 전원 장애 시 최근 기록 유실 가능)
+# - fsync   : 매 write마다 fsync (그룹 커밋이 켜져 있으면 배치당 1번)
+# - periodic: write만 하고, 백그라운드 스레드가 interval마다 변경된 파일을 fsync
+#             (유실 범위 = 최대 interval초)
+# - 쓰는 도중 프로세스가 죽으면 마지막 줄이 \n 없이 잘려 남음
+#   → 시작할 때 recover()로 잘린 꼬리를 잘라내고 .torn 파일에 격리
+# ---------------------------------------------------------
+
+DURABILITY_MODES = ("none", "fsync", "periodic")
+
+_durability = "none"
+
+
+class PeriodicSyncer:
+    """
+    periodic 모드의 fsync 스레드
+    - write된 파일을 표시만 해두고 interval마다 한꺼번에 fsync
+    - 프로세스가 정상 종료될 때도 한 번 fsync
+    """
+
+    def __init__(self, interval_s: float = 1.0):
+        self.interval = interval_s
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="mood-log-periodic-sync", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def mark(self, path: str) -> None:
+        with self._lock:
+            self._dirty.add(path)
+
+    def flush(self) -> None:
+        with self._lock:
+            paths, self._dirty = self._dirty, set()
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                print(f"❌ fsync 실패: {path} ({e})")
+            finally:
+                os.close(fd)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+_syncer: Optional[PeriodicSyncer] = None
+
+
+def set_durability(mode: str, interval_s: float = 1.0) -> None:
+    """
+    내구성 정책 설정 (프로세스당 한 번, 앱 시작 시 호출)
+
+    Args:
+        mode: "none" | "fsync" | "periodic"
+        interval_s: periodic 모드의 fsync 주기(초)
+    """
+    global _durability, _syncer
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"알 수 없는 내구성 모드: {mode} (가능: {', '.join(DURABILITY_MODES)})")
+    if mode == "periodic" and _syncer is None:
+        _syncer = PeriodicSyncer(interval_s)
+    _durability = mode
+
+
+def _sync_after_write(f, path: str) -> None:
+    """append 직후 (잠금 안에서) 내구성 정책 적용"""
+    if _durability == "fsync":
+        f.flush()
+        os.fsync(f.fileno())
+    elif _durability == "periodic" and _syncer is not None:
+        _syncer.mark(path)
+
+
+def _torn_tail_offset(f) -> Optional[int]:
+    """마지막 \n 바로 다음 위치 (파일이 비었거나 \n으로 끝나면 None)"""
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return None
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return None
+
+    pos = end
+    while pos > 0:
+        read_size = min(TAIL_BLOCK_SIZE, pos)
+        pos -= read_size
+        f.seek(pos)
+        newline = f.read(read_size).rfind(b"\n")
+        if newline != -1:
+            return pos + newline + 1
+    return 0
+
+
+def recover_segment(path: str, quarantine: bool = True) -> int:
+    """
+    세그먼트 파일 하나의 잘린 마지막 줄(\n 없이 끝난 꼬리)을 정리
+    - 잠금을 잡고 확인하므로, 다른 워커가 쓰는 중인 줄을 잘못 자르지 않음
+
+    Args:
+        quarantine: True면 잘라낸 바이트를 <파일>.torn 에 보관, False면 그냥 버림
+
+    Returns:
+        잘라낸 바이트 수
+    """
+    with _file_lock(path):
+        try:
+            f = open(path, "r+b")
+        except FileNotFoundError:
+            return 0
+        with f:
+            start = _torn_tail_offset(f)
+            if start is None:
+                return 0
+            f.seek(start)
+            torn = f.read()
+            if quarantine:
+                with open(path + ".torn", "ab") as q:
+                    q.write(torn + b"\n")
+                    q.flush()
+                    os.fsync(q.fileno())
+            f.truncate(start)
+            f.flush()
+            os.fsync(f.fileno())
+        _invalidate_cache(path)
+
+    where = f" → {path}.torn" if quarantine else ""
+    print(f"🩹 잘린 마지막 줄 정리: {path} ({len(torn)}바이트{where})")
+    return len(torn)
+
+
+def recover(data_path: str, quarantine: bool = True) -> Dict[str, int]:
+    """
+    시작 시 복구: 모든 세그먼트(+ 마이그레이션 전 단일 파일)의 잘린 마지막 줄 정리
+
+    Returns:
+        {파일 경로: 잘라낸 바이트 수} (정리한 파일만)
+    """
+    result: Dict[str, int] = {}
+    for path in _segment_files(data_path):
+        if _is_compressed(path):
+            # 압축 세그먼트는 항상 임시 파일 + rename으로만 쓰임
+            continue
+        removed = recover_segment(path, quarantine)
+        if removed:
+            result[path] = removed
+    return result
+
+
+# ---------------------------------------------------------
+# STEP 3-D. 날짜별 바이트 오프셋 인덱스 (사이드카 파일)
+# - mood_log.jsonl 옆에 mood_log.idx.json 으로 저장
+# - {"YYYY-MM-DD": [[시작 바이트, 끝 바이트], ...]} 형태
+# - 하루치 줄은 보통 연속이라 구간 하나로 합쳐짐
+# - 같은 파일에 {id: [시작 바이트, 끝 바이트]} 도 함께 유지 (살아있는 기록만)
+#   → id로 기록 하나를 찾을 때 해시 조회 + seek 한 번
+# - 인덱스가 파일보다 짧으면 뒤에 늘어난 줄만 읽어서 따라잡음
+# - inode가 다르거나 인덱스가 파일보다 길면(재작성) 새로 만듦
+# ---------------------------------------------------------
+
+DATE_INDEX_VERSION = 2
+
+_INDEX_CACHE: Dict[str, Dict[str, Any]] = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def date_index_path(data_path: str) -> str:
+    """data/mood_log.jsonl → data/mood_log.idx.json"""
+    root, _ = os.path.splitext(data_path)
+    return root + ".idx.json"
+
+
+def _new_date_index(st: os.stat_result) -> Dict[str, Any]:
+    return {
+        "version": DATE_INDEX_VERSION,
+        "inode": st.st_ino,
+        "size": 0,
+        "days": {},
+        "ids": {},
+    }
+
+
+def _add_range(days: Dict[str, List[List[int]]], day: str, start: int, end: int) -> None:
+    """day의 구간 목록에 [start, end) 추가 (바로 이어지면 마지막 구간을 늘림)"""
+    ranges = days.setdefault(day, [])
+    if ranges and ranges[-1][1] == start:
+        ranges[-1][1] = end
+    else:
+        ranges.append([start, end])
+
+
+def _index_new_lines(data_path: str, index: Dict[str, Any]) -> None:
+    """index["size"] 이후의 완결된 줄을 인덱스에 추가"""
+    days = index["days"]
+    ids = index["ids"]
+    with open(data_path, "rb") as f:
+        offset = f.seek(index["size"])
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            start = offset
+            offset += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            timestamp = _line_timestamp(line)
+            record_id = _line_id(line)
+            if timestamp is None or record_id is None or _TOMBSTONE_MARK in line:
+                try:
+                    obj = _loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if not isinstance(obj, dict):
+                    continue
+                timestamp = _record_timestamp(obj)
+                record_id = obj.get("id")
+                if _is_tombstone(obj):
+                    if record_id:
+                        ids.pop(record_id, None)
+                    record_id = None
+            if len(timestamp) >= 10:
+                _add_range(days, timestamp[:10], start, offset)
+            if record_id:
+                ids[record_id] = [start, offset]
+    index["size"] = offset
+
+
+def _save_date_index(data_path: str, index: Dict[str, Any]) -> None:
+    """임시 파일에 쓰고 rename (읽는 쪽이 반쯤 쓰인 인덱스를 보지 않도록)"""
+    path = date_index_path(data_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _load_date_index(data_path: str) -> Optional[Dict[str, Any]]:
+    """
+    최신 상태의 날짜 인덱스 반환 (로그 파일이 없으면 None)
+    - 메모리 → 사이드카 파일 → 새로 만들기 순으로 시도
+    """
+    st = _stat_signature(data_path)
+    if st is None:
+        return None
+
+    key = os.path.abspath(data_path)
+    with _INDEX_LOCK:
+        index = _INDEX_CACHE.get(key)
+        if index is None:
+            try:
+                with open(date_index_path(data_path), "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = None
+
+        if (
+            not isinstance(index, dict)
+            or index.get("version") != DATE_INDEX_VERSION
+            or index.get("inode") != st.st_ino
+            or index.get("size", 0) > st.st_size
+        ):
+            index = _new_date_index(st)
+
+        if index["size"] < st.st_size:
+            before = index["size"]
+            _index_new_lines(data_path, index)
+            if index["size"] != before:
+                _save_date_index(data_path, index)
+
+        _INDEX_CACHE[key] = index
+        return index
+
+
+def rebuild_date_index(data_path: str) -> int:
+    """
+    날짜 인덱스를 처음부터 다시 생성 (기존 로그 / 재작성 후 사용)
+
+    Returns:
+        인덱스에 들어간 날짜 수 (로그가 없으면 0)
+    """
+    st = _stat_signature(data_path)
+    key = os.path.abspath(data_path)
+    with _INDEX_LOCK:
+        _INDEX_CACHE.pop(key, None)
+        if st is None:
+            return 0
+        index = _new_date_index(st)
+        _index_new_lines(data_path, index)
+        _save_date_index(data_path, index)
+        _INDEX_CACHE[key] = index
+        return len(index["days"])
+
+
+
+def _read_record_at(data_path: str, record_id: str) -> Optional[Dict[str, Any]]:
+    """
+    id 인덱스로 seek해서 줄 하나만 읽음
+    - 없거나 지워졌거나 인덱스가 어긋나 있으면 None
+    """
+    if _is_compressed(data_path):
+        return _read_compressed_record(data_path, record_id)
+
+    index = _load_date_index(data_path)
+    if index is None:
+        return None
+    span = index["ids"].get(record_id)
+    if span is None:
+        return None
+    try:
+        with open(data_path, "rb") as f:
+            f.seek(span[0])
+            line = f.read(span[1] - span[0]).strip()
+        obj = _loads(line)
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(obj, dict) or obj.get("id") != record_id or _is_tombstone(obj):
+        return None
+    return obj
+
+
+def _record_id_files(data_path: str, record_id: str) -> Iterator[str]:
+    """id가 있을 만한 파일부터 (ULID 시각의 월 세그먼트 → 나머지 세그먼트)"""
+    year_month = _id_year_month(record_id)
+    hinted = _segment_files(data_path, year_month, year_month) if year_month else []
+    yield from hinted
+    for path in _segment_files(data_path):
+        if path not in hinted:
+            yield path
+
+# ---------------------------------------------------------
+# STEP 3-J. 스트리밍 읽기 (iter_records)
+# - 모든 조회 함수의 바탕이 되는 제너레이터
+# - 리스트를 통째로 만들지 않고 한 줄씩 디코딩해서 바로 내보냄
+#   → 내보내기/통계처럼 전체를 훑는 작업도 메모리 사용량이 로그 크기와 무관
+# - 범위 조회는 날짜 인덱스에서 해당 날짜 구간만 seek해서 읽음
+# - 툼스톤 반영 (메모리는 툼스톤 수만큼만 사용)
+#   역방향: 툼스톤이 대상보다 먼저 나오므로 만난 툼스톤만 기억
+#   정방향: 같은 구간을 한 번 훑어 툼스톤 위치만 먼저 모아둠
+# - 캐시(STEP 3-C)가 이미 최신이면 디스크 대신 캐시의 MoodRecord를 그대로 내보냄
+# ---------------------------------------------------------
+
+TAIL_BLOCK_SIZE = 64 * 1024
+
+_TOMBSTONE_MARK = f'"{TOMBSTONE_KEY}"'.encode("ascii")
+
+
+def iter_records(
+    data_path: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    reverse: bool = False,
+) -> Iterator[MoodRecord]:
+    """
+    기록을 한 건씩 yield하는 제너레이터
+
+    Args:
+        data_path: jsonl 파일 경로
+        start, end: date_time 범위 (ISO 문자열 비교, 양끝 포함, None이면 제한 없음)
+        reverse: True면 최신순, False면 오래된 순
+
+    Yields:
+        MoodRecord (읽기 전용, 캐시와 같은 인스턴스일 수 있음 → 바꿀 때는 replace())
+    """
+    paths = _segment_files(
+        data_path,
+        start[:7] if start else None,
+        end[:7] if end else None,
+    )
+    if reverse:
+        paths.reverse()
+    for path in paths:
+        yield from _iter_file(path, start, end, reverse)
+
+
+def _prefix_bounds(prefix: str) -> Tuple[str, str]:
+    """"2026-02" 같은 앞부분 → 그 앞부분으로 시작하는 date_time 전체를 덮는 (start, end)"""
+    return prefix, prefix + "\uffff"
+
+
+def _in_span(timestamp: str, start: Optional[str], end: Optional[str]) -> bool:
+    return (start is None or timestamp >= start) and (end is None or timestamp <= end)
+
+
+def _iter_file(
+    path: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    reverse: bool = False,
+) -> Iterator[MoodRecord]:
+    """세그먼트 파일 하나에서 범위 안의 살아있는 기록을 yield"""
+    if _is_compressed(path):
+        for obj in _iter_compressed(path, start, end, reverse):
+            yield MoodRecord.from_json(obj)
+        return
+
+    # 캐시할 만한 크기면 한 번 파싱해서 캐시에서 답함, 큰 파일은 스트리밍
+    st = _stat_signature(path)
+    if st is None:
+        return
+    if st.st_size <= CACHE_MAX_FILE_BYTES:
+        entry = _cache_entry(path)
+        records = entry.records if entry is not None else []
+        for record in reversed(records) if reverse else records:
+            if _in_span(_record_timestamp(record), start, end):
+                yield record
+        return
+
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+
+    # 한 번 연 파일만 끝까지 읽음 (도중에 컴팩션으로 교체돼도 옛 파일 기준으로 일관)
+    with f:
+        windows = _span_windows(f, path, start, end)
+        if reverse:
+            yield from _stream_reverse(f, windows, start, end)
+        else:
+            yield from _stream_forward(f, windows, start, end)
+
+
+def _span_windows(f, path: str, start: Optional[str], end: Optional[str]) -> List[Tuple[int, int]]:
+    """
+    읽어야 할 [시작 바이트, 끝 바이트) 구간 목록 (파일 순서)
+    - 범위가 없으면 파일 전체, 있으면 날짜 인덱스에서 해당 날짜 구간만
+    """
+    if start is None and end is None:
+        return [(0, os.fstat(f.fileno()).st_size)]
+
+    index = _load_date_index(path)
+    if index is None:
+        return []
+    start_day = start[:10] if start else None
+    end_day = end[:10] if end else None
+    ranges = sorted(
+        (rng[0], rng[1])
+        for day, day_ranges in index["days"].items()
+        if _in_span(day, start_day, end_day)
+        for rng in day_ranges
+    )
+
+    windows: List[Tuple[int, int]] = []
+    for lo, hi in ranges:
+        if windows and windows[-1][1] == lo:
+            windows[-1] = (windows[-1][0], hi)
+        else:
+            windows.append((lo, hi))
+    return windows
+
+
+def _decode_in_span(line: bytes, start: Optional[str], end: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    timestamp를 원문 바이트에서 먼저 꺼내 범위 밖이면 디코딩 없이 None
+    - 깨진 줄도 None (UX/내구성 우선)
+    """
+    timestamp = _line_timestamp(line)
+    if timestamp is not None and not _in_span(timestamp, start, end):
+        return None
+    try:
+        obj = _loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(obj, dict):
+        return None
+    if timestamp is None and not _in_span(_record_timestamp(obj), start, end):
+        return None
+    return obj
+
+
+def _stream_forward(
+    f,
+    windows: List[Tuple[int, int]],
+    start: Optional[str],
+    end: Optional[str],
+) -> Iterator[MoodRecord]:
+    # 툼스톤 위치 먼저: {툼스톤 대상: 마지막 툼스톤 위치}
+    tombstones: Dict[Tuple[str, Any], int] = {}
+    for lo, hi in windows:
+        for offset, line in _iter_lines_forward(f, lo, hi):
+            if _TOMBSTONE_MARK not in line:
+                continue
+            obj = _decode_in_span(line, start, end)
+            if _is_tombstone(obj):
+                tombstones[_tombstone_key(obj)] = offset
+
+    for lo, hi in windows:
+        for offset, line in _iter_lines_forward(f, lo, hi):
+            obj = _decode_in_span(line, start, end)
+            if obj is None or _is_tombstone(obj):
+                continue
+            # 툼스톤은 자기보다 앞에 있는 기록만 지움
+            if offset < tombstones.get(_record_key(obj), -1):
+                continue
+            yield MoodRecord.from_json(obj)
+
+
+def _stream_reverse(
+    f,
+    windows: List[Tuple[int, int]],
+    start: Optional[str],
+    end: Optional[str],
+) -> Iterator[MoodRecord]:
+    deleted: set = set()
+    for lo, hi in reversed(windows):
+        for line in _iter_lines_reverse(f, lo, hi):
+            obj = _decode_in_span(line, start, end)
+            if obj is None:
+                continue
+            if _is_tombstone(obj):
+                deleted.add(_tombstone_key(obj))
+                continue
+            if _record_key(obj) in deleted:
+                continue
+            yield MoodRecord.from_json(obj)
+
+
+def _iter_lines_forward(f, lo: int = 0, hi: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+    """
+    [lo, hi) 구간의 완결된 줄을 파일 순서대로 (줄 시작 위치, 줄) yield
+    - 빈 줄은 건너뜀
+    - \n으로 끝나지 않은 마지막 줄(쓰는 중인 줄)은 무시
+    """
+    offset = f.seek(lo)
+    for raw in f:
+        if hi is not None and offset >= hi:
+            break
+        if not raw.endswith(b"\n"):
+            break
+        start = offset
+        offset += len(raw)
+        line = raw.strip()
+        if line:
+            yield start, line
+
+
+def _iter_lines_reverse(
+    f,
+    lo: int = 0,
+    hi: Optional[int] = None,
+    block_size: int = TAIL_BLOCK_SIZE,
+) -> Iterator[bytes]:
+    """
+    [lo, hi) 구간을 끝에서부터 블록 단위로 거꾸로 읽으며 완결된 줄을 최신순으로 yield
+    - 필요한 만큼만 읽으므로 로그가 아무리 커도 최근 n개 읽기 비용은 일정
+    - 빈 줄은 건너뜀
+    - \n으로 끝나지 않은 마지막 줄(쓰는 중인 줄)은 무시
+    """
+    pos = hi if hi is not None else f.seek(0, os.SEEK_END)
+    buffer = b""
+    at_end = True
+    while pos > lo:
+        read_size = min(block_size, pos - lo)
+        pos -= read_size
+        f.seek(pos)
+        lines = (f.read(read_size) + buffer).split(b"\n")
+        # 맨 앞 조각은 이전 블록과 이어질 수 있으므로 보류
+        buffer = lines[0]
+        complete = lines[1:]
+        if at_end:
+            if not complete:
+                continue
+            # 마지막 \n 뒤의 조각은 미완성 줄 (정상 파일이면 b"")
+            complete.pop()
+            at_end = False
+        for line in reversed(complete):
+            line = line.strip()
+            if line:
+                yield line
+    buffer = buffer.strip()
+    if buffer and not at_end:
+        yield buffer
+
+
+# ---------------------------------------------------------
+# STEP 3-P. 커서 페이지 (기록 보기 무한 스크롤)
+# - 커서 = 페이지 경계 기록의 (date_time, id)를 base64로 감싼 불투명 문자열
+#   (바이트 위치가 아니라 기록 키 → 컴팩션/압축으로 파일이 바뀌어도 그대로 유효)
+# - before: 날짜 인덱스로 커서 날짜부터 거꾸로 seek해서 limit+1건만 읽음
+#   → 몇 페이지째든 페이지당 비용이 일정
+# - after: 커서 이후를 앞으로 읽어 limit+1건 (최근 쪽으로 돌아갈 때)
+# ---------------------------------------------------------
+
+def encode_cursor(record: Any) -> str:
+    """기록 → 불투명 커서 (URL에 그대로 넣을 수 있는 문자열)"""
+    key = f"{_record_timestamp(record)}|{record.get('id') or ''}"
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, str]]:
+    """커서 → (date_time, id) (잘못된 커서면 None)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        return None
+    timestamp, sep, record_id = raw.partition("|")
+    if not sep or not timestamp:
+        return None
+    return timestamp, record_id
+
+
+def _cursor_key(record: Any) -> Tuple[str, str]:
+    return _record_timestamp(record), record.get("id") or ""
+
+
+def _key_ordered(records: Iterable[MoodRecord], reverse: bool) -> Iterator[MoodRecord]:
+    """같은 date_time끼리는 id 순으로 (파일 순서를 커서 키 순서와 맞춤)"""
+    for _, same_second in groupby(records, key=_record_timestamp):
+        yield from sorted(same_second, key=_cursor_key, reverse=reverse)
+
+
+def read_page(
+    data_path: str,
+    limit: int = 10,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Tuple[List[MoodRecord], Optional[str], Optional[str]]:
+    """
+    기록 한 페이지 (최신순)
+
+    Args:
+        limit: 페이지 크기
+        before: 이 커서보다 오래된 기록 페이지
+        after: 이 커서보다 최근 기록 페이지 (before보다 우선)
+        둘 다 없거나 잘못된 커서면 첫 페이지(가장 최근)
+
+    Returns:
+        (기록들, 더 오래된 페이지 커서 / 없으면 None, 더 최근 페이지 커서 / 없으면 None)
+    """
+    after_key = decode_cursor(after) if after else None
+    if after_key is not None:
+        newer = islice(
+            (
+                r for r in _key_ordered(iter_records(data_path, start=after_key[0]), reverse=False)
+                if _cursor_key(r) > after_key
+            ),
+            limit + 1,
+        )
+        page = list(newer)
+        records = page[:limit][::-1]
+        if not records:
+            return [], after, None
+        newer_cursor = encode_cursor(records[0]) if len(page) > limit else None
+        return records, encode_cursor(records[-1]), newer_cursor
+
+    before_key = decode_cursor(before) if before else None
+    older = _key_ordered(
+        iter_records(data_path, end=before_key[0] if before_key else None, reverse=True),
+        reverse=True,
+    )
+    if before_key is not None:
+        older = (r for r in older if _cursor_key(r) < before_key)
+    page = list(islice(older, limit + 1))
+    records = page[:limit]
+    older_cursor = encode_cursor(records[-1]) if len(page) > limit else None
+    newer_cursor = encode_cursor(records[0]) if before_key is not None and records else None
+    return records, older_cursor, newer_cursor
+
+
+# ---------------------------------------------------------
+# STEP 3-H. 월별 캘린더 요약(rollup)
+# - 캘린더 화면은 날짜별 색/진하기/모드/개수만 필요
+#   → data/YYYY/MM.rollup.json 에 날짜별 요약만 따로 유지
+# - append / 삭제(툼스톤) 때 같은 잠금 안에서 바로 갱신
+# - 요약이 만들어질 때의 원본 파일 (inode, size)를 같이 저장해서
+#   어긋나면(다른 경로로 파일이 바뀌었으면) 그때만 원본에서 다시 만듦
+# ---------------------------------------------------------
+
+ROLLUP_VERSION = 2
+ROLLUP_FIELDS = ("date_time", "id", "mood_color", "final_color", "color_intensity", "mode")
+
+
+def _rollup_file(segment: str) -> str:
+    """data/2026/02.jsonl → data/2026/02.rollup.json"""
+    root, _ = os.path.splitext(segment)
+    return root + ".rollup.json"
+
+
+def _summarize(record: Any) -> Dict[str, Any]:
+    return {name: record.get(name) for name in ROLLUP_FIELDS}
+
+
+def _source_key(path: str) -> str:
+    """세그먼트는 "2026/02.jsonl", 단일 파일은 "mood_log.jsonl" 형태의 키"""
+    segment_match = _SEGMENT_MONTH_RE.match(os.path.basename(path))
+    parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    if segment_match and _SEGMENT_YEAR_RE.match(parent):
+        return f"{parent}/{os.path.basename(path)}"
+    return os.path.basename(path)
+
+
+def _source_signatures(paths: List[str]) -> Dict[str, List[int]]:
+    signatures: Dict[str, List[int]] = {}
+    for path in paths:
+        st = _stat_signature(path)
+        if st is not None:
+            signatures[_source_key(path)] = [st.st_ino, st.st_size]
+    return signatures
+
+
+def _load_rollup(rollup_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(rollup_path, "r", encoding="utf-8") as f:
+            rollup = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(rollup, dict) or rollup.get("version") != ROLLUP_VERSION:
+        return None
+    return rollup
+
+
+def _save_sidecar(path: str, data: Dict[str, Any]) -> None:
+    """요약/링 같은 작은 JSON 사이드카를 임시 파일에 쓰고 rename"""
+    ensure_parent_dir(path)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _build_rollup(data_path: str, year_month: str) -> Dict[str, Any]:
+    """원본 로그에서 한 달치 요약을 새로 만들어 저장"""
+    paths = _segment_files(data_path, year_month, year_month)
+    # 서명을 먼저 떠야, 읽는 사이 append가 끼어들어도 다음 조회 때 다시 만들어짐
+    rollup: Dict[str, Any] = {
+        "version": ROLLUP_VERSION,
+        "sources": _source_signatures(paths),
+        "days": {},
+    }
+    start, end = _prefix_bounds(year_month)
+    for record in iter_records(data_path, start, end):
+        rollup["days"].setdefault(_record_timestamp(record)[:10], []).append(_summarize(record))
+    _save_sidecar(_rollup_file(segment_path(data_path, year_month)), rollup)
+    return rollup
+
+
+def _update_rollup(
+    segment: str,
+    before: Optional[os.stat_result],
+    after: Optional[os.stat_result],
+    appended: List[Dict[str, Any]],
+) -> None:
+    """
+    세그먼트에 줄을 append한 직후 (잠금 안에서) 요약 갱신
+    - 요약이 append 직전 파일 상태와 맞을 때만 증분 반영, 아니면 그대로 둠(다음 조회 때 재생성)
+    """
+    rollup_path = _rollup_file(segment)
+    rollup = _load_rollup(rollup_path)
+    if rollup is None or after is None:
+        return
+
+    key = _source_key(segment)
+    expected = [before.st_ino, before.st_size] if before is not None else None
+    if rollup["sources"].get(key) != expected:
+        return
+
+    days = rollup["days"]
+    for record in appended:
+        timestamp = record.get("timestamp") or record.get("date_time") or ""
+        day = timestamp[:10]
+        if _is_tombstone(record):
+            kept = [item for item in days.get(day, []) if not _tombstone_hits(record, item)]
+            if kept:
+                days[day] = kept
+            else:
+                days.pop(day, None)
+        elif day:
+            days.setdefault(day, []).append(_summarize(record))
+
+    rollup["sources"][key] = [after.st_ino, after.st_size]
+    _save_sidecar(rollup_path, rollup)
+
+
+def _refresh_rollup_source(
+    segment: str,
+    before: Optional[os.stat_result],
+    after: Optional[os.stat_result],
+) -> None:
+    """내용은 그대로이고 파일만 다시 쓴 경우(컴팩션) 요약의 원본 서명만 교체"""
+    _update_rollup(segment, before, after, [])
+
+
+def get_calendar_summary(data_path: str, year: int, month: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    캘린더 화면용 월별 요약 (원본 로그를 읽지 않고 rollup에서 바로)
+
+    Returns:
+        {
+            "2024-01-15": [{"date_time", "id", "mood_color", "final_color", "color_intensity", "mode"}, ...],
+            ...
+        } (날짜별 최신순)
+    """
+    year_month = f"{year:04d}-{month:02d}"
+    paths = _segment_files(data_path, year_month, year_month)
+    if not paths:
+        return {}
+
+    rollup = _load_rollup(_rollup_file(segment_path(data_path, year_month)))
+    if rollup is None or rollup.get("sources") != _source_signatures(paths):
+        rollup = _build_rollup(data_path, year_month)
+
+    return {day: list(reversed(items)) for day, items in sorted(rollup["days"].items())}
+
+
+# ---------------------------------------------------------
+# STEP 3-K. 최근 기록 링 (24시간 3개 제한용)
+# - step1 진입 때마다 로그를 읽지 않도록 최근 기록의 [date_time, id]만 따로 유지
+#   → data/recent.json
+# - floor: 링에는 date_time > floor 인 살아있는 기록이 '전부' 들어 있음
+#   (24시간 창이 floor보다 뒤에서 시작하면 링만으로 정확한 답)
+# - append / 삭제(툼스톤) 때 같은 잠금 안에서 바로 갱신
+# - rollup처럼 원본 파일 (inode, size)를 같이 저장해서
+#   어긋나면(다른 경로로 파일이 바뀌었으면) 날짜 인덱스로 최근 24시간만 읽어 다시 만듦
+# ---------------------------------------------------------
+
+RECENT_VERSION = 1
+RECENT_HOURS = 24
+RECENT_SIZE = 16   # 링에 보관할 최대 기록 수 (제한 개수보다 넉넉하게)
+
+
+def _data_root(path: str) -> str:
+    """세그먼트(data/2026/02.jsonl)든 논리 경로(data/mood_log.jsonl)든 → data"""
+    parent = os.path.dirname(os.path.abspath(path))
+    if _SEGMENT_MONTH_RE.match(os.path.basename(path)) and _SEGMENT_YEAR_RE.match(os.path.basename(parent)):
+        return os.path.dirname(parent)
+    return parent
+
+
+def _recent_file(path: str) -> str:
+    return os.path.join(_data_root(path), "recent.json")
+
+
+def _recent_cutoff(now: Optional[datetime] = None) -> str:
+    return ((now or datetime.now()) - timedelta(hours=RECENT_HOURS)).isoformat(timespec="seconds")
+
+
+def _load_recent(ring_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(ring_path, "r", encoding="utf-8") as f:
+            ring = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(ring, dict) or ring.get("version") != RECENT_VERSION:
+        return None
+    return ring
+
+
+def _trim_recent(ring: Dict[str, Any], cutoff: str) -> None:
+    """
+    24시간 창 밖 / RECENT_SIZE 초과 항목을 걷어내고 floor를 올림
+    - 항목을 버릴 때는 같은 date_time끼리 함께 버려야 floor 약속이 유지됨
+    """
+    entries = sorted(ring["entries"], key=lambda e: (e[0], e[1] or ""), reverse=True)
+    floors = [ring["floor"], (datetime.fromisoformat(cutoff) - timedelta(seconds=1)).isoformat(timespec="seconds")]
+    if len(entries) > RECENT_SIZE:
+        floors.append(entries[RECENT_SIZE][0])
+    ring["floor"] = max(floors)
+    ring["entries"] = [e for e in entries if e[0] > ring["floor"]]
+
+
+def _build_recent(data_path: str, now: datetime) -> List[List[Any]]:
+    """
+    날짜 인덱스로 최근 24시간 구간만 읽어서 링을 새로 만들어 저장
+
+    Returns:
+        24시간 창 안의 [date_time, id] 전체 (최신순)
+        - 창 안 기록이 RECENT_SIZE보다 많으면 링에는 잘려서 저장되므로 읽은 목록을 그대로 반환
+    """
+    cutoff = _recent_cutoff(now)
+    floor = (datetime.fromisoformat(cutoff) - timedelta(seconds=1)).isoformat(timespec="seconds")
+    # 서명을 먼저 떠야, 읽는 사이 append가 끼어들어도 다음 조회 때 다시 만들어짐
+    sources = _source_signatures(_segment_files(data_path, floor[:7], now.strftime("%Y-%m")))
+    entries = sorted(
+        (
+            [record.get("date_time") or record.get("timestamp") or "", record.get("id")]
+            for record in iter_records(data_path, start=cutoff)
+        ),
+        key=lambda e: (e[0], e[1] or ""),
+        reverse=True,
+    )
+    ring: Dict[str, Any] = {
+        "version": RECENT_VERSION,
+        "floor": floor,
+        "sources": sources,
+        "entries": list(entries),
+    }
+    _trim_recent(ring, cutoff)
+    _save_sidecar(_recent_file(data_path), ring)
+    return entries
+
+
+def _recent_entries(data_path: str) -> List[List[Any]]:
+    """
+    최근 24시간 기록의 [date_time, id] 목록 (최신순)
+    - 링이 원본과 맞고 floor가 24시간 창보다 앞이면 로그를 읽지 않음
+    """
+    now = datetime.now()
+    cutoff = _recent_cutoff(now)
+    ring = _load_recent(_recent_file(data_path))
+    if ring is not None and ring["floor"] < cutoff and _recent_is_fresh(ring, data_path, now):
+        return [entry for entry in ring["entries"] if entry[0] >= cutoff]
+    return _build_recent(data_path, now)
+
+
+def _recent_is_fresh(ring: Dict[str, Any], data_path: str, now: datetime) -> bool:
+    """floor 이후 달의 파일들이 링이 마지막으로 본 상태 그대로인지 (stat만)"""
+    paths = _segment_files(data_path, ring["floor"][:7], now.strftime("%Y-%m"))
+    sources = ring["sources"]
+    for key, signature in _source_signatures(paths).items():
+        if sources.get(key) != signature:
+            return False
+    return True
+
+
+def _update_recent(
+    segment: str,
+    before: Optional[os.stat_result],
+    after: Optional[os.stat_result],
+    appended: List[Dict[str, Any]],
+) -> None:
+    """
+    세그먼트에 줄을 append한 직후 (잠금 안에서) 링 갱신
+    - 링이 append 직전 파일 상태와 맞을 때만 증분 반영, 아니면 그대로 둠(다음 조회 때 재생성)
+    """
+    ring_path = _recent_file(segment)
+    ring = _load_recent(ring_path)
+    if ring is None or after is None:
+        return
+
+    key = _source_key(segment)
+    expected = [before.st_ino, before.st_size] if before is not None else None
+    if ring["sources"].get(key) != expected:
+        return
+
+    entries = ring["entries"]
+    for record in appended:
+        if _is_tombstone(record):
+            entries = [
+                e for e in entries
+                if not _tombstone_hits(record, {"date_time": e[0], "id": e[1]})
+            ]
+            continue
+        date_time = record.get("date_time") or record.get("timestamp") or ""
+        if date_time > ring["floor"]:
+            entries.append([date_time, record.get("id")])
+    ring["entries"] = entries
+    _trim_recent(ring, _recent_cutoff())
+
+    ring["sources"][key] = [after.st_ino, after.st_size]
+    _save_sidecar(ring_path, ring)
+
+
+def count_records_last_24h(data_path: str) -> int:
+    """최근 24시간 내 기록 수 (링만 보고 답함)"""
+    return len(_recent_entries(data_path))
+
 
 # ---------------------------------------------------------
-# STEP 3-B. jsonl 저장/읽기
-# - 1줄 = 1기록
-# - 서버 껐다 켜도 남아있음
+# STEP 3-M. 지난 달 세그먼트 압축
+# - 끝난 달은 더 이상 append되지 않으므로 gzip으로 압축해서 보관
+#   data/2026/01.jsonl → data/2026/01.jsonl.gz (+ 01.blocks.json 블록 인덱스)
+# - 약 64KB(압축 전)씩 끊어서 gzip member 하나로 압축 → 파일 전체도 그대로 gunzip 가능
+# - 블록 인덱스: 블록별 [시작 바이트, 길이, 가장 이른 date_time, 가장 늦은 date_time] + {id: 블록 번호}
+#   → 조회는 범위에 걸치는 블록만, id 조회는 블록 하나만 풀어서 읽음
+# - 압축 파일에는 살아있는 기록만 들어감 (툼스톤 없음)
+#   지울 때는 압축 파일을 다시 씀 (지난 달 삭제는 드묾)
+# - 압축 뒤 그 달에 append가 생기면 일반 파일을 만들지 않고 압축 파일에 시간순으로 합쳐서 다시 씀
+#   (_merge_into_compressed, 예전 버전이 남긴 MM.jsonl 꼬리도 이때 같이 합쳐짐)
 # ---------------------------------------------------------
 
-def ensure_parent_dir(path: str) -> None:
-    """파일 저장 경로의 상위 폴더가 없으면 생성"""
-    parent = os.path.dirname(path)
-    if parent:
-        os.makedirs(parent, exist_ok=True)
+COMPRESSED_SUFFIX = ".gz"
+COMPRESS_BLOCK_SIZE = 64 * 1024
+COMPRESS_LEVEL = 6
+BLOCK_INDEX_VERSION = 1
 
+_BLOCK_INDEX_CACHE: Dict[str, Dict[str, Any]] = {}
 
-def append_record(data_path: str, record: Dict[str, Any]) -> None:
-    """jsonl에 한 줄 append"""
-    ensure_parent_dir(data_path)
-    with open(data_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
+def _is_compressed(path: str) -> bool:
+    return path.endswith(COMPRESSED_SUFFIX)
 
-def read_last_n(data_path: str, n: int = 1) -> List[Dict[str, Any]]:
+
+def block_index_path(path: str) -> str:
+    """data/2026/01.jsonl.gz → data/2026/01.blocks.json"""
+    root = path[: -len(COMPRESSED_SUFFIX)] if _is_compressed(path) else path
+    root, _ = os.path.splitext(root)
+    return root + ".blocks.json"
+
+
+def _write_compressed(path: str, records: Iterable[Dict[str, Any]]) -> int:
     """
-    최근 n개 레코드 반환 (최신이 먼저 오도록)
-    - 파일이 없으면 []
-    - 깨진 줄이 있어도 가능한 줄만 읽음(내구성)
+    레코드를 블록 단위 gzip member로 압축해서 path에 원자적으로 씀 (+ 블록 인덱스 저장)
+
+    Returns:
+        압축한 레코드 수
     """
-    if n <= 0:
-        return []
+    members: List[bytes] = []
+    index: Dict[str, Any] = {"version": BLOCK_INDEX_VERSION, "blocks": [], "ids": {}}
+    offset = 0
+    count = 0
+    lines: List[bytes] = []
+    timestamps: List[str] = []
 
-    if not os.path.exists(data_path):
-        return []
+    def close_block() -> None:
+        nonlocal offset
+        member = gzip.compress(b"".join(lines), compresslevel=COMPRESS_LEVEL, mtime=0)
+        stamps = [t for t in timestamps if t]
+        index["blocks"].append([offset, len(member), min(stamps, default=""), max(stamps, default="")])
+        members.append(member)
+        offset += len(member)
+        lines.clear()
+        timestamps.clear()
 
-    records: List[Dict[str, Any]] = []
-    with open(data_path, "r", encoding="utf-8") as f:
-        for line in f:
+    size = 0
+    for record in records:
+        if record.get("id"):
+            index["ids"][record["id"]] = len(index["blocks"])
+        line = _encode_line(record)
+        lines.append(line)
+        timestamps.append(_record_timestamp(record))
+        size += len(line)
+        count += 1
+        if size >= COMPRESS_BLOCK_SIZE:
+            close_block()
+            size = 0
+    if lines:
+        close_block()
+
+    _atomic_write(path, members)
+    st = os.stat(path)
+    index["inode"] = st.st_ino
+    index["size"] = st.st_size
+    _save_sidecar(block_index_path(path), index)
+    with _INDEX_LOCK:
+        _BLOCK_INDEX_CACHE[os.path.abspath(path)] = index
+    return count
+
+
+def _scan_blocks(path: str, st: os.stat_result) -> Dict[str, Any]:
+    """블록 인덱스가 없거나 어긋났을 때 gzip member 경계를 따라 다시 만듦"""
+    index: Dict[str, Any] = {
+        "version": BLOCK_INDEX_VERSION,
+        "inode": st.st_ino,
+        "size": st.st_size,
+        "blocks": [],
+        "ids": {},
+    }
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+    offset = 0
+    while offset < len(data):
+        decompressor = zlib.decompressobj(31)
+        raw = decompressor.decompress(data[offset:])
+        length = len(data) - offset - len(decompressor.unused_data)
+        stamps: List[str] = []
+        for line in raw.split(b"\n"):
             line = line.strip()
             if not line:
                 continue
+            timestamp = _line_timestamp(line)
+            record_id = _line_id(line)
+            if timestamp is None or record_id is None:
+                try:
+                    obj = _loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                timestamp = _record_timestamp(obj)
+                record_id = obj.get("id") if isinstance(obj, dict) else None
+            if timestamp:
+                stamps.append(timestamp)
+            if record_id:
+                index["ids"][record_id] = len(index["blocks"])
+        index["blocks"].append([offset, length, min(stamps, default=""), max(stamps, default="")])
+        offset += length
+    return index
+
+
+def _load_block_index(path: str) -> Optional[Dict[str, Any]]:
+    """최신 상태의 블록 인덱스 (파일이 없으면 None) - 메모리 → 사이드카 → 다시 만들기"""
+    st = _stat_signature(path)
+    if st is None:
+        return None
+
+    key = os.path.abspath(path)
+    with _INDEX_LOCK:
+        index = _BLOCK_INDEX_CACHE.get(key)
+        if index is None:
             try:
-                records.append(json.loads(line))
-            except json.JSONDecodeError:
-                # 깨진 줄은 스킵 (UX/내구성 우선)
-                continue
+                with open(block_index_path(path), "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = None
+
+        if (
+            not isinstance(index, dict)
+            or index.get("version") != BLOCK_INDEX_VERSION
+            or index.get("inode") != st.st_ino
+            or index.get("size") != st.st_size
+        ):
+            index = _scan_blocks(path, st)
+            _save_sidecar(block_index_path(path), index)
+
+        _BLOCK_INDEX_CACHE[key] = index
+        return index
+
 
-    return list(reversed(records[-n:]))
+def _read_block(f, block: List[Any]) -> List[bytes]:
+    """블록 하나를 풀어서 줄 목록으로 (빈 줄 제외, 파일 순서)"""
+    f.seek(block[0])
+    raw = zlib.decompress(f.read(block[1]), 31)
+    return [line for line in (l.strip() for l in raw.split(b"\n")) if line]
 
 
-def read_all_records(data_path: str) -> List[Dict[str, Any]]:
+def _iter_compressed(
+    path: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    reverse: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """압축 세그먼트에서 범위에 걸치는 블록만 풀어서 기록을 yield"""
+    index = _load_block_index(path)
+    if index is None:
+        return
+    blocks = [
+        block for block in index["blocks"]
+        if (start is None and end is None)
+        or ((end is None or block[2] <= end) and (start is None or block[3] >= start))
+    ]
+    if reverse:
+        blocks.reverse()
+
+    with open(path, "rb") as f:
+        for block in blocks:
+            lines = _read_block(f, block)
+            for line in reversed(lines) if reverse else lines:
+                obj = _decode_in_span(line, start, end)
+                if obj is not None:
+                    yield obj
+
+
+def _read_compressed_record(path: str, record_id: str) -> Optional[Dict[str, Any]]:
+    """id가 들어 있는 블록 하나만 풀어서 찾음"""
+    index = _load_block_index(path)
+    if index is None:
+        return None
+    block_no = index["ids"].get(record_id)
+    if block_no is None:
+        return None
+    with open(path, "rb") as f:
+        lines = _read_block(f, index["blocks"][block_no])
+    for line in lines:
+        line_id = _line_id(line)
+        if line_id is not None and line_id != record_id:
+            continue
+        try:
+            obj = _loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if isinstance(obj, dict) and obj.get("id") == record_id:
+            return obj
+    return None
+
+
+def _rewrite_compressed(path: str, keep: Callable[[Dict[str, Any]], bool]) -> int:
     """
-    모든 레코드 반환 (최신이 먼저 오도록)
+    압축 세그먼트에서 keep이 False인 기록을 빼고 다시 압축
+
+    Returns:
+        빠진 기록 수
     """
-    if not os.path.exists(data_path):
-        return []
+    with _file_lock(path):
+        records = list(_iter_compressed(path))
+        kept = [record for record in records if keep(record)]
+        if len(kept) != len(records):
+            _write_compressed(path, kept)
+    return len(records) - len(kept)
 
-    records: List[Dict[str, Any]] = []
-    with open(data_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                records.append(json.loads(line))
-            except json.JSONDecodeError:
-                continue
 
-    return list(reversed(records))
+def compress_segment(data_path: str, year_month: str) -> Optional[Tuple[int, int]]:
+    """
+    한 달치 세그먼트를 압축 (이미 압축된 부분 + 일반 파일의 살아있는 기록을 합침)
+    - 예전 스키마 줄은 이때 현재 스키마로 정규화 (id 포함)
+    - 일반 파일과 그 날짜 인덱스는 압축 후 삭제
+
+    Returns:
+        (압축 전 바이트, 압축 후 바이트) / 압축할 일반 파일이 없으면 None
+    """
+    sizes = _merge_into_compressed(data_path, year_month, [])
+    if sizes is not None:
+        packed = segment_path(data_path, year_month) + COMPRESSED_SUFFIX
+        print(f"🗜️ 세그먼트 압축: {packed} ({sizes[0]:,} → {sizes[1]:,}바이트)")
+    return sizes
 
 
-def read_records_by_date(data_path: str, date_str: str) -> List[Dict[str, Any]]:
+def _merge_into_compressed(
+    data_path: str,
+    year_month: str,
+    extra: List[Dict[str, Any]],
+) -> Optional[Tuple[int, int]]:
     """
-    특정 날짜의 레코드만 반환
-    
-    Args:
-        data_path: jsonl 파일 경로
-        date_str: 날짜 문자열 (YYYY-MM-DD 형식)
-    
+    압축 파일 + 일반 파일 + extra(새 기록)를 시간순으로 합쳐 다시 압축
+    - 역방향 읽기/커서 페이지는 "압축 파일 → 일반 파일" 순서가 곧 시간 순서라고 가정하므로
+      지난 달에 기록을 더할 때 일반 파일을 새로 만들지 않고 여기로 합침
+
     Returns:
-        해당 날짜의 레코드 리스트 (최신순)
+        (합치기 전 바이트, 합친 후 바이트) / 합칠 것이 없으면 None
     """
-    if not os.path.exists(data_path):
-        return []
+    plain = segment_path(data_path, year_month)
+    packed = plain + COMPRESSED_SUFFIX
 
-    records: List[Dict[str, Any]] = []
-    with open(data_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
+    with _file_lock(plain), _file_lock(packed):
+        # 다른 워커가 먼저 압축했을 수 있으므로 잠금 안에서 확인
+        has_plain = os.path.exists(plain)
+        if not has_plain and not extra:
+            return None
+        before = os.path.getsize(plain) if has_plain else 0
+        if os.path.exists(packed):
+            before += os.path.getsize(packed)
+        records = list(_iter_compressed(packed)) if os.path.exists(packed) else []
+        if has_plain:
+            records.extend(record.to_json() for record in _iter_file(plain))
+        records.extend(extra)
+        records.sort(key=_record_timestamp)
+        _write_compressed(
+            packed,
+            (normalize_record(r) if _needs_upgrade(r) else r for r in records),
+        )
+        if has_plain:
+            os.remove(plain)
+            _invalidate_cache(plain)
+            rebuild_date_index(plain)
+            for sidecar in (date_index_path(plain), plain + ".torn"):
+                if os.path.exists(sidecar):
+                    os.remove(sidecar)
+        after = os.path.getsize(packed)
+
+    return before, after
+
+
+def compress_cold_segments(data_path: str, now: Optional[datetime] = None) -> Dict[str, Tuple[int, int]]:
+    """
+    끝난 달(최근 24시간 창이 걸치지 않는 달)의 일반 세그먼트를 모두 압축
+
+    Returns:
+        {"2026-01": (압축 전 바이트, 압축 후 바이트), ...}
+    """
+    # 24시간 창(최근 기록 링)이 걸치는 달은 아직 append/삭제가 잦으므로 제외
+    open_month = _recent_cutoff(now)[:7]
+    result: Dict[str, Tuple[int, int]] = {}
+    for year_month, path in list_segments(data_path):
+        if year_month >= open_month or _is_compressed(path):
+            continue
+        sizes = compress_segment(data_path, year_month)
+        if sizes is not None:
+            result[year_month] = sizes
+    return result
+
+
+def compress_cold_segments_in_background(data_path: str) -> None:
+    """앱 시작 시 호출: 끝난 달 압축을 백그라운드 스레드로 (사용자 파티션 포함)"""
+
+    def run() -> None:
+        for path in [data_path, *list_partitions(data_path)]:
             try:
-                obj = json.loads(line)
-                # timestamp 또는 date_time에서 날짜 부분만 추출 (YYYY-MM-DD)
-                timestamp = obj.get("timestamp") or obj.get("date_time", "")
-                if timestamp.startswith(date_str):
-                    # 오래된 데이터 호환: final_color가 없으면 mood_color 사용
-                    if "final_color" not in obj and "mood_color" in obj:
-                        from core.color import COLOR_MAP, rgb_to_hex
-                        color_rgb = COLOR_MAP.get(obj["mood_color"])
-                        if color_rgb:
-                            obj["final_color"] = rgb_to_hex(*color_rgb)
-                        else:
-                            obj["final_color"] = "#808080"
-                    records.append(obj)
-            except json.JSONDecodeError:
-                continue
+                compress_cold_segments(path)
+            except (OSError, ValueError, zlib.error) as e:
+                print(f"❌ 세그먼트 압축 실패: {path} ({e})")
+
+    threading.Thread(target=run, name="mood-log-compress", daemon=True).start()
+
+
+# ---------------------------------------------------------
+# STEP 3-N. 스냅샷 + 로그 꼬리 재생 (워커 웜 스타트)
+# - 파싱된 레코드 캐시(STEP 3-C)를 data/snapshot.pkl 로 주기적으로 저장
+#   세그먼트별 (inode, 어디까지 파싱했는지, 레코드들)
+# - 시작할 때 스냅샷으로 캐시를 채우고, 그 뒤에 늘어난 줄(꼬리)만 파싱
+#   → scale-to-zero 배포에서도 첫 요청이 전체 파싱 비용을 내지 않음
+# - 파일 맨 앞에 sha256 체크섬 → 깨진 스냅샷은 버리고 처음부터 파싱
+#   (앱이 직접 쓰는 로컬 파일만 읽음, 외부에서 받은 파일을 넣지 말 것 - pickle)
+# - 압축 세그먼트는 캐시하지 않음 (필요한 블록만 풀어서 읽으므로)
+# ---------------------------------------------------------
+
+SNAPSHOT_VERSION = 2  # 2: 레코드를 MoodRecord로 보관
+_SNAPSHOT_MAGIC = b"MOOD2IDEA-SNAPSHOT\n"
+
 
-    return list(reversed(records))
+def snapshot_path(data_path: str) -> str:
+    """data/mood_log.jsonl → data/snapshot.pkl"""
+    return os.path.join(_data_root(data_path), "snapshot.pkl")
 
 
-def get_calendar_data(data_path: str, year: int, month: int) -> Dict[str, List[Dict[str, Any]]]:
+def _plain_segments(data_path: str) -> List[str]:
+    return [path for path in _segment_files(data_path) if not _is_compressed(path)]
+
+
+def save_snapshot(data_path: str) -> int:
     """
-    특정 년월의 캘린더 데이터 반환
-    
-    Args:
-        data_path: jsonl 파일 경로
-        year: 년도
-        month: 월
-    
+    캐시를 최신으로 맞춘 뒤 스냅샷 저장
+
     Returns:
-        {
-            "2024-01-15": [record1, record2, ...],
-            "2024-01-16": [record3, ...],
-            ...
-        }
+        스냅샷에 담긴 레코드 수
     """
-    if not os.path.exists(data_path):
-        return {}
+    segments: Dict[str, Tuple[Any, ...]] = {}
+    for path in _plain_segments(data_path):
+        entry = _cache_entry(path)
+        if entry is not None:
+            segments[_source_key(path)] = (
+                entry.inode, entry.size, entry.mtime_ns, entry.records, entry.lines, entry.dead,
+            )
 
-    # 해당 년월 문자열 (예: "2024-01")
-    year_month_str = f"{year:04d}-{month:02d}"
-    
-    calendar_data: Dict[str, List[Dict[str, Any]]] = {}
-    
-    with open(data_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+    payload = pickle.dumps(
+        {"version": SNAPSHOT_VERSION, "segments": segments},
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    _atomic_write(snapshot_path(data_path), [_SNAPSHOT_MAGIC, hashlib.sha256(payload).digest(), payload])
+    return sum(len(saved[3]) for saved in segments.values())
+
+
+def _read_snapshot(path: str) -> Optional[Dict[str, Tuple[Any, ...]]]:
+    """스냅샷의 세그먼트 목록 (없거나 체크섬/버전이 맞지 않으면 None)"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    header = len(_SNAPSHOT_MAGIC)
+    digest, payload = data[header:header + 32], data[header + 32:]
+    if not data.startswith(_SNAPSHOT_MAGIC) or hashlib.sha256(payload).digest() != digest:
+        print(f"⚠️ 스냅샷 체크섬 불일치, 무시: {path}")
+        return None
+    try:
+        snapshot = pickle.loads(payload)
+    except (pickle.UnpicklingError, EOFError, AttributeError, ValueError) as e:
+        print(f"⚠️ 스냅샷 읽기 실패, 무시: {path} ({e})")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot["segments"]
+
+
+def warm_start(data_path: str) -> Dict[str, int]:
+    """
+    스냅샷으로 캐시를 채우고 로그 꼬리만 재생 (앱 시작 시 호출)
+    - 스냅샷 이후 파일이 다시 쓰였으면(inode 변경, 크기 감소) 그 세그먼트만 처음부터 파싱
+
+    Returns:
+        {"restored": 스냅샷에서 가져온 레코드 수, "replayed": 새로 파싱한 줄 수}
+    """
+    segments = _read_snapshot(snapshot_path(data_path)) or {}
+    restored = 0
+    replayed = 0
+    for path in _plain_segments(data_path):
+        saved = segments.get(_source_key(path))
+        st = _stat_signature(path)
+        seeded_lines = 0
+        if saved is not None and st is not None and saved[0] == st.st_ino and saved[1] <= st.st_size:
+            inode, size, mtime_ns, records, lines, dead = saved
+            with _CACHE_LOCK:
+                _store_cache(os.path.abspath(path), _CachedLog(
+                    inode=inode, size=size, mtime_ns=mtime_ns,
+                    records=records, lines=lines, dead=dead,
+                ))
+            restored += len(records)
+            seeded_lines = lines
+
+        entry = _cache_entry(path)
+        if entry is not None:
+            replayed += max(entry.lines - seeded_lines, 0)
+
+    print(f"🔥 웜 스타트: 스냅샷 {restored}건 + 꼬리 {replayed}줄 파싱")
+    return {"restored": restored, "replayed": replayed}
+
+
+class SnapshotWriter:
+    """
+    주기적 스냅샷 스레드 (프로세스에 하나, 열린 파티션 전부 담당)
+    - interval마다 파티션별로 캐시를 최신으로 맞추고, 지난 스냅샷 이후 바뀐 게 있으면 저장
+    - 프로세스가 정상 종료될 때도 한 번 저장
+    """
+
+    def __init__(self, interval_s: float = 300.0):
+        self.interval = interval_s
+        self._last: Dict[str, Optional[Tuple[Any, ...]]] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="mood-log-snapshot", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.save)
+
+    def add(self, data_path: str) -> None:
+        """파티션을 웜 스타트하고 주기적 저장 대상에 추가"""
+        warm_start(data_path)
+        with self._lock:
+            self._last.setdefault(data_path, None)
+
+    def _signature(self, data_path: str) -> Tuple[Any, ...]:
+        return tuple(
+            (path, st.st_ino, st.st_size)
+            for path in _plain_segments(data_path)
+            for st in [_stat_signature(path)]
+            if st is not None
+        )
+
+    def save(self) -> None:
+        with self._lock:
+            data_paths = list(self._last)
+        for data_path in data_paths:
+            signature = self._signature(data_path)
+            if signature == self._last.get(data_path):
                 continue
             try:
-                obj = json.loads(line)
-                # timestamp 또는 date_time 사용
-                timestamp = obj.get("timestamp") or obj.get("date_time", "")
-                
-                # 해당 년월인지 확인
-                if timestamp.startswith(year_month_str):
-                    # 날짜 추출 (YYYY-MM-DD)
-                    date_str = timestamp[:10]
-                    
-                    # 오래된 데이터 호환: final_color가 없으면 mood_color 사용
-                    if "final_color" not in obj and "mood_color" in obj:
-                        from core.color import COLOR_MAP, rgb_to_hex
-                        color_rgb = COLOR_MAP.get(obj["mood_color"])
-                        if color_rgb:
-                            obj["final_color"] = rgb_to_hex(*color_rgb)
-                        else:
-                            obj["final_color"] = "#808080"
-                    
-                    if date_str not in calendar_data:
-                        calendar_data[date_str] = []
-                    
-                    calendar_data[date_str].append(obj)
-            except json.JSONDecodeError:
+                save_snapshot(data_path)
+            except OSError as e:
+                print(f"❌ 스냅샷 저장 실패: {data_path} ({e})")
                 continue
-    
-    # 각 날짜별로 최신순 정렬
-    for date_str in calendar_data:
-        calendar_data[date_str] = list(reversed(calendar_data[date_str]))
-    
-    return calendar_data
+            self._last[data_path] = signature
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.save()
+
+
+_snapshot_writer: Optional[SnapshotWriter] = None
+
+
+def enable_snapshots(interval_s: float = 300.0) -> None:
+    """
+    웜 스타트 + 주기적 스냅샷 켜기 (프로세스당 한 번, 앱 시작 시 호출)
+    - 파티션마다 처음 열 때(open_partition) 웜 스타트
+    - 조회 캐시(STEP 3-C)는 켜고 끄는 것과 상관없이 항상 동작
+      (CACHE_MAX_FILE_BYTES 이하 세그먼트를 LRU로 CACHE_MAX_SEGMENTS개까지)
+      → 스냅샷은 재시작 직후 그 캐시를 파싱 없이 다시 채우는 역할만 함
+    """
+    global _snapshot_writer
+    if _snapshot_writer is None:
+        _snapshot_writer = SnapshotWriter(interval_s)
+
+
+# ---------------------------------------------------------
+# STEP 3-O. 사용자별 파티션
+# - 사용자마다 논리 경로를 따로: data/users/<user_id>/mood_log.jsonl
+#   → 세그먼트, 날짜/id 인덱스, 요약, 최근 기록 링, 스냅샷이 전부 사용자 폴더 안에 생김
+#   → 조회/24시간 제한/캘린더가 그 사용자 기록만 건드림 (전체 사용자 수와 무관)
+# - 파티션별 시작 작업(복구, 웜 스타트)은 프로세스에서 처음 쓸 때 한 번만
+# ---------------------------------------------------------
+
+USERS_DIR = "users"
+_USER_ID_RE = re.compile(r"^[0-9A-Za-z_-]{1,64}$")
+
+_OPENED_PARTITIONS: set = set()
+_PARTITION_LOCK = threading.Lock()
+
+
+def user_data_path(data_path: str, user_id: str) -> str:
+    """("data/mood_log.jsonl", "abc") → data/users/abc/mood_log.jsonl"""
+    if not _USER_ID_RE.match(user_id or ""):
+        raise ValueError(f"사용할 수 없는 사용자 id: {user_id!r}")
+    root = os.path.dirname(data_path)
+    return os.path.join(root, USERS_DIR, user_id, os.path.basename(data_path))
+
+
+def list_partitions(data_path: str) -> List[str]:
+    """존재하는 사용자 파티션의 논리 경로 목록 (관리 명령 / 백그라운드 작업용)"""
+    users_dir = os.path.join(os.path.dirname(data_path), USERS_DIR)
+    try:
+        user_ids = sorted(os.listdir(users_dir))
+    except FileNotFoundError:
+        return []
+    return [
+        user_data_path(data_path, user_id)
+        for user_id in user_ids
+        if _USER_ID_RE.match(user_id) and os.path.isdir(os.path.join(users_dir, user_id))
+    ]
+
+
+def open_partition(data_path: str) -> None:
+    """
+    파티션을 이 프로세스에서 처음 쓸 때 한 번만 시작 작업
+    - 잘린 마지막 줄 복구 (STEP 3-L)
+    - 스냅샷이 켜져 있으면 웜 스타트 + 주기적 저장 대상에 추가 (STEP 3-N)
+    """
+    key = os.path.abspath(data_path)
+    with _PARTITION_LOCK:
+        if key in _OPENED_PARTITIONS:
+            return
+        _OPENED_PARTITIONS.add(key)
+    recover(data_path)
+    if _snapshot_writer is not None:
+        _snapshot_writer.add(data_path)
 
 
 # ---------------------------------------------------------
@@ -205,6 +2434,7 @@ def build_record(
 
     기본 필드:
     - date_time
+    - id (ULID, 기록 하나를 가리키는 고유 키)
     - mood_color
     - mood_text
     - mode (write/draw/music)
@@ -218,8 +2448,10 @@ def build_record(
     - ai_response (STEP5: AI 응답)
     - ai_used (STEP5: AI 사용 여부)
     """
+    now = datetime.now()
     return {
-        "date_time": datetime.now().isoformat(timespec="seconds"),
+        "date_time": now.isoformat(timespec="seconds"),
+        "id": new_record_id(now),
         "mood_color": mood_color,
         "mood_text": mood_text,
         "mode": mode,
@@ -238,6 +2470,186 @@ def build_record(
     }
 
 
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32
+
+
+def new_record_id(when: Optional[datetime] = None, entropy: Optional[bytes] = None) -> str:
+    """
+    ULID(26자) 생성
+    - 앞 10자 = 생성 시각(ms) → 문자열 정렬이 곧 시간순, 어느 월 세그먼트인지도 바로 알 수 있음
+    - 뒤 16자 = 무작위 80비트 → 같은 초에 여러 개 만들어도 겹치지 않음
+
+    Args:
+        when: 기준 시각 (기본: 지금)
+        entropy: 무작위 부분으로 쓸 10바이트 (기본: os.urandom)
+    """
+    ms = int((when or datetime.now()).timestamp() * 1000)
+    value = (ms << 80) | int.from_bytes(entropy or os.urandom(10), "big")
+    chars = []
+    for _ in range(26):
+        chars.append(_ULID_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _id_year_month(record_id: str) -> Optional[str]:
+    """ULID 앞 10자(생성 시각)의 "YYYY-MM" (ULID 형식이 아니면 None)"""
+    if len(record_id) != 26:
+        return None
+    ms = 0
+    for ch in record_id[:10].upper():
+        digit = _ULID_ALPHABET.find(ch)
+        if digit == -1:
+            return None
+        ms = ms * 32 + digit
+    try:
+        return datetime.fromtimestamp(ms / 1000).strftime("%Y-%m")
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _with_id(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    id 없는 예전 기록에 id를 붙인 복사본 (date_time 바로 뒤에 배치)
+    - 시각은 date_time, 무작위 부분은 내용 해시
+      → 같은 기록은 몇 번 변환해도(마이그레이션, SQLite 가져오기) 같은 id
+    """
+    try:
+        when = datetime.fromisoformat(obj.get("date_time") or "")
+    except ValueError:
+        when = None
+    digest = hashlib.sha1(
+        json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).digest()[:10]
+    record_id = new_record_id(when, digest)
+
+    result: Dict[str, Any] = {}
+    for key, value in obj.items():
+        if key == "id":
+            continue
+        result[key] = value
+        if key == "date_time":
+            result["id"] = record_id
+    result.setdefault("id", record_id)
+    return result
+
+
+# ---------------------------------------------------------
+# STEP 4-B. 스키마 버전 + 저장 시 정규화
+# - 읽을 때마다 하던 보정(final_color / initial_color_hex / mood_name)을
+#   저장할 때 한 번만 수행하고 schema_version을 기록
+# - 예전 줄은 migrate_schema()로 한 번에 제자리 업그레이드
+# ---------------------------------------------------------
+
+SCHEMA_VERSION = 3
+# v1: build_record + 색 정보 (schema_version 필드 없음)
+# v2: initial_color / final_color / initial_color_hex / mood_name 항상 포함
+# v3: id (ULID) 항상 포함
+
+
+def normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    레코드를 현재 스키마(SCHEMA_VERSION)로 정규화한 복사본 반환
+    - 필드 순서 유지 (date_time이 항상 맨 앞, 그 다음 id)
+    """
+    obj = dict(record)
+    if not obj.get("date_time") and obj.get("timestamp"):
+        obj["date_time"] = obj["timestamp"]
+
+    if not obj.get("id"):
+        obj = _with_id(obj)
+
+    # 시작 색: 없으면 mood_color
+    if not obj.get("initial_color") and obj.get("mood_color"):
+        obj["initial_color"] = obj["mood_color"]
+
+    # 최종 색: 없으면 mood_color의 원색
+    if not obj.get("final_color") and obj.get("mood_color"):
+        color_rgb = COLOR_MAP.get(obj["mood_color"])
+        obj["final_color"] = rgb_to_hex(*color_rgb) if color_rgb else "#808080"
+
+    # 시작 색 HEX + 감정 이름 (색상 이름이면 변환, HEX면 그대로)
+    initial = obj.get("initial_color")
+    if initial and not initial.startswith("#"):
+        obj["initial_color_hex"] = lighten_color(initial, 0.0)
+        obj["mood_name"] = MOOD_NAME_MAP.get(initial, initial)
+    else:
+        obj["initial_color_hex"] = initial
+        obj["mood_name"] = initial
+
+    obj["schema_version"] = SCHEMA_VERSION
+    return obj
+
+
+def _needs_upgrade(obj: Any) -> bool:
+    return (
+        isinstance(obj, dict)
+        and not _is_tombstone(obj)
+        and obj.get("schema_version", 1) < SCHEMA_VERSION
+    )
+
+
+def migrate_schema(data_path: str) -> int:
+    """
+    모든 세그먼트(+ 마이그레이션 전 단일 파일)의 예전 스키마 줄을 제자리에서 업그레이드
+    - 줄 순서는 그대로, 깨진 줄은 버림
+    - 툼스톤과 지워진 줄은 이 기회에 걷어냄
+      (예전 date_time 툼스톤은 id 없는 기록만 지우므로, id를 붙이기 전에 반영해야 함)
+    - 파일마다 잠금을 잡고 임시 파일 + rename으로 교체
+
+    Returns:
+        업그레이드한 줄 수
+    """
+    upgraded = 0
+    for path in _segment_files(data_path):
+        if _is_compressed(path):
+            upgraded += _migrate_compressed(path)
+            continue
+        with _file_lock(path):
+            objs: List[Any] = []
+            with open(path, "rb") as f:
+                for raw in f:
+                    line = raw.strip()
+                    if not line:
+                        continue
+                    try:
+                        objs.append(_loads(line))
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+            if not any(_needs_upgrade(obj) for obj in objs):
+                continue
+
+            records: List[MoodRecord] = []
+            for obj in objs:
+                _apply_line(records, obj)
+            lines: List[bytes] = []
+            for record in records:
+                obj = record.to_json()
+                if _needs_upgrade(obj):
+                    obj = normalize_record(obj)
+                    upgraded += 1
+                lines.append(_encode_line(obj))
+
+            _atomic_write(path, lines)
+            _invalidate_cache(path)
+            rebuild_date_index(path)
+            # 요약은 원본 서명이 바뀌었으므로 다음 조회 때 새로 만들어짐
+    return upgraded
+
+
+def _migrate_compressed(path: str) -> int:
+    """압축 세그먼트의 예전 스키마 기록을 업그레이드해서 다시 압축"""
+    with _file_lock(path):
+        records = list(_iter_compressed(path))
+        changed = sum(1 for record in records if _needs_upgrade(record))
+        if changed:
+            _write_compressed(
+                path,
+                (normalize_record(r) if _needs_upgrade(r) else r for r in records),
+            )
+    return changed
+
+
 # ---------------------------------------------------------
 # STEP 4. 업로드 파일 저장 유틸 (로컬 저장 방식)
 # - static/uploads에 저장
@@ -289,74 +2701,104 @@ def save_upload_file(
         return None
 
 
-def get_records_last_24h(data_path: str) -> List[Dict[str, Any]]:
+def get_records_last_24h(data_path: str) -> List[MoodRecord]:
     """
     최근 24시간 내 기록 반환 (최신순)
+    - 최근 기록 링의 id로 한 건씩 바로 읽음 (id 없는 예전 기록이 섞여 있으면 구간 읽기)
     """
-    from datetime import timedelta
-    
-    if not os.path.exists(data_path):
-        return []
-    
+    entries = _recent_entries(data_path)
+    if all(record_id for _, record_id in entries):
+        records = [get_record(data_path, record_id) for _, record_id in entries]
+        if all(record is not None for record in records):
+            return records
+    return _scan_records_last_24h(data_path)
+
+
+def _scan_records_last_24h(data_path: str) -> List[MoodRecord]:
+    """날짜 인덱스로 최근 24시간 구간을 읽어서 반환 (최신순)"""
     now = datetime.now()
     cutoff = now - timedelta(hours=24)
     
-    records: List[Dict[str, Any]] = []
-    with open(data_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                record = json.loads(line)
-                # date_time 파싱
-                dt_str = record.get("date_time") or record.get("timestamp")
-                if dt_str:
-                    # ISO 형식: "2026-02-02T18:39:27"
-                    record_dt = datetime.fromisoformat(dt_str)
-                    if record_dt >= cutoff:
-                        records.append(record)
-            except (json.JSONDecodeError, ValueError):
-                continue
+    records: List[MoodRecord] = []
+    # 24시간은 최대 두 달(지난달 말 ~ 이번 달), 이틀치 날짜 구간에만 걸침
+    # → 날짜 인덱스로 그 구간만 읽고, cutoff 이후 줄만 디코딩
+    cutoff_str = cutoff.isoformat(timespec="seconds")
+    for record in iter_records(data_path, start=cutoff_str, reverse=True):
+        # date_time 파싱
+        dt_str = record.get("date_time") or record.get("timestamp")
+        if not dt_str:
+            continue
+        try:
+            # ISO 형식: "2026-02-02T18:39:27"
+            record_dt = datetime.fromisoformat(dt_str)
+        except ValueError:
+            continue
+        if record_dt >= cutoff:
+            records.append(record)
     
     # 최신순 정렬
     records.sort(key=lambda r: r.get("date_time") or r.get("timestamp", ""), reverse=True)
     return records
 
 
+def get_record(data_path: str, record_id: str) -> Optional[MoodRecord]:
+    """
+    id로 기록 하나 반환 (없으면 None)
+    - id 인덱스 조회 + seek 한 번 (ULID 시각으로 세그먼트를 먼저 짚음)
+    """
+    for path in _record_id_files(data_path, record_id):
+        record = _read_record_at(path, record_id)
+        if record is not None:
+            return MoodRecord.from_json(record)
+    return None
+
+
+def delete_record(data_path: str, record_id: str) -> bool:
+    """
+    id로 기록 하나만 삭제 (해당 세그먼트에 id 툼스톤을 append)
+    Returns: 삭제 성공 여부
+    """
+    for path in _record_id_files(data_path, record_id):
+        record = _read_record_at(path, record_id)
+        if record is None:
+            continue
+        if _is_compressed(path):
+            _rewrite_compressed(path, lambda r: r.get("id") != record_id)
+        else:
+            _append_line(path, _build_tombstone(record.get("date_time", ""), record_id))
+            _maybe_compact_in_background(path)
+        print(f"✅ 기록 삭제 완료: {record_id}")
+        return True
+    return False
+
+
 def delete_record_by_datetime(data_path: str, date_time_str: str) -> bool:
     """
     특정 date_time을 가진 기록 삭제
+    - 같은 초에 만든 기록은 모두 지워짐 (하나만 지울 때는 delete_record)
+    - 파일을 다시 쓰지 않고 해당 세그먼트에 기록별 툼스톤을 append
+    - 툼스톤이 많이 쌓이면 백그라운드 컴팩션
     Returns: 삭제 성공 여부
     """
-    if not os.path.exists(data_path):
-        return False
-    
-    # 모든 기록 읽기
-    records: List[Dict[str, Any]] = []
-    with open(data_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                record = json.loads(line)
-                records.append(record)
-            except json.JSONDecodeError:
-                continue
-    
-    # 삭제할 기록 제외하고 필터링
-    original_count = len(records)
-    filtered = [r for r in records if r.get("date_time") != date_time_str]
-    
-    if len(filtered) == original_count:
-        # 삭제할 기록을 못 찾음
-        return False
-    
-    # 파일 다시 쓰기
-    with open(data_path, "w", encoding="utf-8") as f:
-        for record in filtered:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
-    
-    print(f"✅ 기록 삭제 완료: {date_time_str}")
-    return True
+    deleted = False
+    year_month = date_time_str[:7]
+    # 해당 월 세그먼트(+ 마이그레이션 전 단일 파일)만 확인
+    for path in _segment_files(data_path, year_month, year_month):
+        targets = {
+            r.get("id")
+            for r in _iter_file(path, date_time_str, date_time_str)
+            if r.get("date_time") == date_time_str
+        }
+        if not targets:
+            continue
+        if _is_compressed(path):
+            _rewrite_compressed(path, lambda r: r.get("date_time") != date_time_str)
+        else:
+            for record_id in targets:
+                _append_line(path, _build_tombstone(date_time_str, record_id))
+            _maybe_compact_in_background(path)
+        deleted = True
+
+    if deleted:
+        print(f"✅ 기록 삭제 완료: {date_time_str}")
+    return deleted
@@ -0,0 +1,413 @@
+# 경로 : core/storage_sqlite.py
+
+"""
+SQLite 저장소
+
+storage_local.py(jsonl)와 같은 함수 이름/인자/반환 형태를 그대로 제공
+- app.py에서 설정(MOOD2IDEA_STORAGE=sqlite)만 바꾸면 교체 가능
+- WAL 모드: 읽기와 쓰기가 서로 막지 않고, 여러 프로세스가 안전하게 씀
+- date_time / date 컬럼 인덱스로 날짜·기간 조회를 범위 검색으로 처리
+- 기록 id(ULID)는 body 안에 두고 json_extract 식 인덱스로 한 건 조회
+- 레코드 본문은 JSON 그대로 body 컬럼에 저장 (스키마 변경에 유연)
+- 조회 결과는 storage_local과 같이 MoodRecord
+- 사용자별 파티션은 사용자마다 DB 파일 하나 (data/users/<user_id>/mood_log.db)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.models import MoodRecord
+from core.storage_local import (  # noqa: F401 (파티션 경로/커서 형식은 storage_local과 같음)
+    SCHEMA_VERSION,
+    decode_cursor,
+    encode_cursor,
+    list_partitions,
+    normalize_record,
+    user_data_path,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    date_time TEXT NOT NULL,
+    date      TEXT NOT NULL,
+    body      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_date_time ON records (date_time);
+CREATE INDEX IF NOT EXISTS idx_records_date ON records (date);
+CREATE INDEX IF NOT EXISTS idx_records_record_id ON records (json_extract(body, '$.id'));
+CREATE INDEX IF NOT EXISTS idx_records_page ON records (date_time, json_extract(body, '$.id'));
+"""
+
+_local = threading.local()
+
+# 페이지 키 (idx_records_page와 같은 식이어야 인덱스를 탐)
+_RECORD_ID = "json_extract(body, '$.id')"
+_PAGE_KEY = f"(date_time, {_RECORD_ID})"
+
+# 스레드마다 열어 두는 커넥션 수 상한 (사용자 파티션이 많아도 파일 핸들이 쌓이지 않게)
+MAX_CONNECTIONS = 32
+
+# 내구성 정책 → PRAGMA synchronous
+# - fsync: FULL (커밋마다 fsync)
+# - none / periodic: NORMAL (WAL에서는 체크포인트 때만 fsync)
+#   OFF는 전원 장애 시 DB 파일 자체가 깨질 수 있어 쓰지 않음
+_SYNCHRONOUS = {"none": "NORMAL", "fsync": "FULL", "periodic": "NORMAL"}
+_synchronous = "NORMAL"
+
+
+def set_durability(mode: str, interval_s: float = 1.0) -> None:
+    """
+    내구성 정책 설정 (storage_local.set_durability와 같은 인자)
+    - 이후 새로 여는 커넥션부터 적용 (앱 시작 시 호출)
+    - interval_s는 무시 (periodic은 SQLite 체크포인트 주기를 따름)
+    """
+    global _synchronous
+    if mode not in _SYNCHRONOUS:
+        raise ValueError(f"알 수 없는 내구성 모드: {mode} (가능: {', '.join(_SYNCHRONOUS)})")
+    _synchronous = _SYNCHRONOUS[mode]
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """
+    스레드별 커넥션 (같은 스레드에서는 재사용)
+    - 처음 열 때 WAL 모드 + 테이블/인덱스 생성
+    - MAX_CONNECTIONS를 넘으면 가장 오래 안 쓴 커넥션부터 닫음
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = OrderedDict()
+
+    key = os.path.abspath(db_path)
+    conn = connections.get(key)
+    if conn is not None:
+        connections.move_to_end(key)
+    else:
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={_synchronous}")
+        conn.executescript(_SCHEMA)
+        connections[key] = conn
+        while len(connections) > MAX_CONNECTIONS:
+            _, oldest = connections.popitem(last=False)
+            oldest.close()
+    return conn
+
+
+def open_partition(db_path: str) -> None:
+    """storage_local.open_partition과 같은 이름 (SQLite는 연결할 때 필요한 작업을 함)"""
+
+
+def _row_values(record: Dict[str, Any]) -> tuple:
+    """레코드 → (date_time, date, body) 컬럼 값 (현재 스키마로 정규화해서 저장)"""
+    record = normalize_record(record)
+    date_time = record.get("date_time") or record.get("timestamp") or ""
+    return date_time, date_time[:10], json.dumps(record, ensure_ascii=False)
+
+
+def _records(rows: Iterable[tuple]) -> List[MoodRecord]:
+    return [MoodRecord.from_json(json.loads(body)) for (body,) in rows]
+
+
+# ---------------------------------------------------------
+# storage_local과 같은 API
+# ---------------------------------------------------------
+
+def append_record(db_path: str, record: Dict[str, Any]) -> None:
+    """레코드 한 건 저장"""
+    conn = _connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO records (date_time, date, body) VALUES (?, ?, ?)",
+            _row_values(record),
+        )
+
+
+def append_records(db_path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    여러 건을 트랜잭션 하나로 저장 (가져오기용 배치 쓰기)
+
+    Returns:
+        저장한 건수
+    """
+    rows = [_row_values(record) for record in records]
+    conn = _connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO records (date_time, date, body) VALUES (?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def read_last_n(db_path: str, n: int = 1) -> List[MoodRecord]:
+    """최근 n개 레코드 반환 (최신이 먼저 오도록)"""
+    if n <= 0:
+        return []
+    rows = _connect(db_path).execute(
+        "SELECT body FROM records ORDER BY date_time DESC, id DESC LIMIT ?",
+        (n,),
+    )
+    return _records(rows)
+
+
+def iter_records(
+    db_path: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    reverse: bool = False,
+) -> Iterator[MoodRecord]:
+    """
+    기록을 한 건씩 yield (커서에서 바로 꺼내므로 결과 전체를 메모리에 올리지 않음)
+
+    Args:
+        start, end: date_time 범위 (양끝 포함, None이면 제한 없음)
+        reverse: True면 최신순, False면 오래된 순
+    """
+    conditions = []
+    params: List[str] = []
+    if start is not None:
+        conditions.append("date_time >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("date_time <= ?")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    order = "DESC" if reverse else "ASC"
+    rows = _connect(db_path).execute(
+        f"SELECT body FROM records {where}ORDER BY date_time {order}, id {order}",
+        params,
+    )
+    for (body,) in rows:
+        yield MoodRecord.from_json(json.loads(body))
+
+
+def read_page(
+    db_path: str,
+    limit: int = 10,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Tuple[List[MoodRecord], Optional[str], Optional[str]]:
+    """
+    기록 한 페이지 (storage_local.read_page와 같은 인자/반환)
+    - (date_time, id) 인덱스로 키셋 조회 → 몇 페이지째든 LIMIT만큼만 읽음
+    """
+    conn = _connect(db_path)
+    after_key = decode_cursor(after) if after else None
+    if after_key is not None:
+        rows = conn.execute(
+            f"SELECT body FROM records WHERE {_PAGE_KEY} > (?, ?) "
+            f"ORDER BY date_time, {_RECORD_ID} LIMIT ?",
+            (*after_key, limit + 1),
+        )
+        page = _records(rows)
+        records = page[:limit][::-1]
+        if not records:
+            return [], after, None
+        newer_cursor = encode_cursor(records[0]) if len(page) > limit else None
+        return records, encode_cursor(records[-1]), newer_cursor
+
+    before_key = decode_cursor(before) if before else None
+    where = f"WHERE {_PAGE_KEY} < (?, ?) " if before_key is not None else ""
+    rows = conn.execute(
+        f"SELECT body FROM records {where}"
+        f"ORDER BY date_time DESC, {_RECORD_ID} DESC LIMIT ?",
+        (*(before_key or ()), limit + 1),
+    )
+    page = _records(rows)
+    records = page[:limit]
+    older_cursor = encode_cursor(records[-1]) if len(page) > limit else None
+    newer_cursor = encode_cursor(records[0]) if before_key is not None and records else None
+    return records, older_cursor, newer_cursor
+
+
+def read_all_records(db_path: str) -> List[MoodRecord]:
+    """모든 레코드 반환 (최신이 먼저 오도록)"""
+    return list(iter_records(db_path, reverse=True))
+
+
+def read_records_by_date(db_path: str, date_str: str) -> List[MoodRecord]:
+    """특정 날짜(YYYY-MM-DD)의 레코드 반환 (최신순)"""
+    return list(iter_records(db_path, date_str, date_str + "\uffff", reverse=True))
+
+
+def get_calendar_data(db_path: str, year: int, month: int) -> Dict[str, List[MoodRecord]]:
+    """
+    특정 년월의 캘린더 데이터 반환
+
+    Returns:
+        {"2024-01-15": [record1, record2, ...], ...} (날짜별 최신순)
+    """
+    year_month_str = f"{year:04d}-{month:02d}"
+    rows = _connect(db_path).execute(
+        "SELECT date, body FROM records WHERE date BETWEEN ? AND ? "
+        "ORDER BY date_time DESC, id DESC",
+        (f"{year_month_str}-01", f"{year_month_str}-31"),
+    )
+
+    calendar_data: Dict[str, List[MoodRecord]] = {}
+    for date_str, body in rows:
+        calendar_data.setdefault(date_str, []).append(MoodRecord.from_json(json.loads(body)))
+    return calendar_data
+
+
+def get_calendar_summary(db_path: str, year: int, month: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    캘린더 화면용 월별 요약 (본문 전체 대신 필요한 필드만 뽑아서)
+
+    Returns:
+        {"2024-01-15": [{"date_time", "id", "mood_color", "final_color", "color_intensity", "mode"}, ...], ...}
+    """
+    year_month_str = f"{year:04d}-{month:02d}"
+    rows = _connect(db_path).execute(
+        "SELECT date, date_time, json_extract(body, '$.id'), "
+        "json_extract(body, '$.mood_color'), json_extract(body, '$.final_color'), "
+        "json_extract(body, '$.color_intensity'), json_extract(body, '$.mode') "
+        "FROM records WHERE date BETWEEN ? AND ? ORDER BY date_time DESC, id DESC",
+        (f"{year_month_str}-01", f"{year_month_str}-31"),
+    )
+
+    summary: Dict[str, List[Dict[str, Any]]] = {}
+    for date_str, date_time, record_id, mood_color, final_color, color_intensity, mode in rows:
+        summary.setdefault(date_str, []).append({
+            "date_time": date_time,
+            "id": record_id,
+            "mood_color": mood_color,
+            "final_color": final_color,
+            "color_intensity": color_intensity,
+            "mode": mode,
+        })
+    return summary
+
+
+def get_records_last_24h(db_path: str) -> List[MoodRecord]:
+    """최근 24시간 내 기록 반환 (최신순)"""
+    cutoff = (datetime.now() - timedelta(hours=24)).isoformat(timespec="seconds")
+    return list(iter_records(db_path, start=cutoff, reverse=True))
+
+
+def count_records_last_24h(db_path: str) -> int:
+    """최근 24시간 내 기록 수 (date_time 인덱스 범위 COUNT)"""
+    cutoff = (datetime.now() - timedelta(hours=24)).isoformat(timespec="seconds")
+    (count,) = _connect(db_path).execute(
+        "SELECT COUNT(*) FROM records WHERE date_time >= ?",
+        (cutoff,),
+    ).fetchone()
+    return count
+
+
+def get_record(db_path: str, record_id: str) -> Optional[MoodRecord]:
+    """id로 기록 하나 반환 (없으면 None)"""
+    row = _connect(db_path).execute(
+        "SELECT body FROM records WHERE json_extract(body, '$.id') = ? LIMIT 1",
+        (record_id,),
+    ).fetchone()
+    return MoodRecord.from_json(json.loads(row[0])) if row else None
+
+
+def delete_record(db_path: str, record_id: str) -> bool:
+    """
+    id로 기록 하나만 삭제
+    Returns: 삭제 성공 여부
+    """
+    conn = _connect(db_path)
+    with conn:
+        cursor = conn.execute(
+            "DELETE FROM records WHERE json_extract(body, '$.id') = ?",
+            (record_id,),
+        )
+    if cursor.rowcount > 0:
+        print(f"✅ 기록 삭제 완료: {record_id}")
+        return True
+    return False
+
+
+def delete_record_by_datetime(db_path: str, date_time_str: str) -> bool:
+    """
+    특정 date_time을 가진 기록 삭제
+    Returns: 삭제 성공 여부
+    """
+    conn = _connect(db_path)
+    with conn:
+        cursor = conn.execute("DELETE FROM records WHERE date_time = ?", (date_time_str,))
+    if cursor.rowcount > 0:
+        print(f"✅ 기록 삭제 완료: {date_time_str}")
+        return True
+    return False
+
+
+def migrate_schema(db_path: str) -> int:
+    """
+    예전 스키마(schema_version < 현재)로 저장된 행의 body를 제자리 업그레이드
+
+    Returns:
+        업그레이드한 행 수
+    """
+    conn = _connect(db_path)
+    upgraded = 0
+    with conn:
+        rows = conn.execute(
+            "SELECT id, body FROM records "
+            "WHERE IFNULL(json_extract(body, '$.schema_version'), 1) < ?",
+            (SCHEMA_VERSION,),
+        ).fetchall()
+        for row_id, body in rows:
+            date_time, date, new_body = _row_values(json.loads(body))
+            conn.execute(
+                "UPDATE records SET date_time = ?, date = ?, body = ? WHERE id = ?",
+                (date_time, date, new_body, row_id),
+            )
+            upgraded += 1
+    return upgraded
+
+
+# ---------------------------------------------------------
+# jsonl → SQLite 가져오기
+# ---------------------------------------------------------
+
+def import_jsonl(db_path: str, jsonl_path: str) -> int:
+    """
+    storage_local 형식의 기록(단일 파일 + 월별 세그먼트)을 SQLite로 가져옴
+    - 툼스톤으로 지워진 기록은 제외
+    - 이미 같은 id의 기록이 있으면 건너뜀 → 여러 번 실행해도 안전
+      (id 없는 예전 기록도 변환할 때마다 같은 id를 받음)
+
+    Returns:
+        새로 넣은 레코드 수
+    """
+    from core.storage_local import iter_records as iter_jsonl
+
+    conn = _connect(db_path)
+    # 이미 있는 id는 한 번에 읽어 둠 (행마다 SELECT 하지 않음)
+    existing = {
+        record_id
+        for (record_id,) in conn.execute(f"SELECT {_RECORD_ID} FROM records")
+        if record_id
+    }
+    inserted = 0
+
+    def new_rows() -> Iterator[tuple]:
+        nonlocal inserted
+        # 오래된 것부터 넣어야 id 순서가 시간 순서와 맞음
+        for record in iter_jsonl(jsonl_path):
+            record = normalize_record(record.to_json())
+            if record["id"] in existing:
+                continue
+            existing.add(record["id"])
+            inserted += 1
+            yield _row_values(record)
+
+    with conn:
+        conn.executemany("INSERT INTO records (date_time, date, body) VALUES (?, ?, ?)", new_rows())
+    return inserted
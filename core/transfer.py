@@ -0,0 +1,289 @@
+# 경로 : core/transfer.py
+
+"""
+기록 내보내기 / 가져오기 (여러 해 분량의 기록을 한 번에 옮길 때)
+
+- 형식: NDJSON(한 줄 = 기록 하나) / CSV, 둘 다 gzip 압축 선택 가능
+- 내보내기: storage.iter_records를 오래된 순으로 읽어 CHUNK_SIZE씩 잘라서 내보냄
+  → 응답/파일로 흘려보내므로 메모리 사용량이 기록 수와 무관
+- 가져오기: 한 줄씩 읽어 검증 + 정규화 → BATCH_SIZE건씩 storage.append_records
+  → 이미 있는 id는 건너뜀 (여러 번 가져와도 중복 없음)
+- storage 인자는 storage_local / storage_sqlite 모듈 (app.py의 storage)
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import re
+import zlib
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.color import COLOR_MAP
+from core.models import MoodRecord
+from core.storage_local import COMPRESS_LEVEL, TOMBSTONE_KEY, normalize_record
+
+
+FORMATS = ("ndjson", "csv")
+MODES = ("write", "draw", "music")
+
+CHUNK_SIZE = 64 * 1024  # 내보낼 때 한 번에 흘려보내는 바이트
+BATCH_SIZE = 500        # 가져올 때 한 번에 저장하는 건수
+
+# CSV 열: MoodRecord 필드 + 모르는 필드(JSON 문자열)
+CSV_FIELDS = MoodRecord.FIELDS + ("extra",)
+_CSV_BOOL_FIELDS = {"ai_used", "expression_done", "color_confirmed"}
+_CSV_INT_FIELDS = {"ai_interaction_count", "schema_version"}
+_CSV_FLOAT_FIELDS = {"color_intensity"}
+
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# 가져올 때 허용하는 값
+# - date_time: 저장소가 앞 7글자로 월 세그먼트를 고르므로 정확히 YYYY-MM-DDTHH:MM:SS
+# - id: ULID 등 따옴표/이스케이프가 없는 안전한 문자만 (디코딩 없이 id를 꺼내는 경로가 깨지지 않게)
+DATE_TIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}$")
+RECORD_ID_RE = re.compile(r"^[0-9A-Za-z_-]{1,64}$")
+HEX_COLOR_RE = re.compile(r"^#[0-9A-Fa-f]{6}$")
+
+# 값이 있으면 이 타입이어야 하는 필드 (None/빈 값은 '없음'으로 통과)
+_TEXT_FIELDS = (
+    "mood_text", "text_content", "draw_note", "background", "image_filename",
+    "music_keywords", "ai_response", "mood_name",
+)
+_BOOL_FIELDS = ("ai_used", "expression_done", "color_confirmed")
+_INT_FIELDS = ("ai_interaction_count", "schema_version")
+
+# 파일 자체가 잘못됐을 때 import_records가 던질 수 있는 예외 (앱/CLI가 잡아서 안내)
+IMPORT_ERRORS = (OSError, EOFError, UnicodeDecodeError, csv.Error, ValueError, zlib.error)
+
+
+def detect_format(filename: str) -> Tuple[str, bool]:
+    """
+    파일 이름으로 (형식, gzip 여부) 판단
+
+    예: "history.csv.gz" → ("csv", True), "mood_log.jsonl" → ("ndjson", False)
+    """
+    name = filename.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    return ("csv" if name.endswith(".csv") else "ndjson"), compressed
+
+
+def export_filename(fmt: str, compressed: bool) -> str:
+    """내려받을 파일 이름 (예: mood2idea-2026-02-03.ndjson.gz)"""
+    name = f"mood2idea-{datetime.now():%Y-%m-%d}.{fmt}"
+    return name + ".gz" if compressed else name
+
+
+# ---------------------------------------------------------
+# 내보내기
+# ---------------------------------------------------------
+
+def iter_export(
+    records: Iterable[MoodRecord],
+    fmt: str = "ndjson",
+    compressed: bool = False,
+) -> Iterator[bytes]:
+    """
+    기록을 형식에 맞게 인코딩해서 CHUNK_SIZE 안팎의 bytes 조각으로 yield
+    - compressed=True면 gzip 스트림 (조각을 이어 붙이면 .gz 파일 하나)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"알 수 없는 형식: {fmt} (가능: {', '.join(FORMATS)})")
+
+    chunks = _iter_csv(records) if fmt == "csv" else _iter_ndjson(records)
+    if not compressed:
+        yield from chunks
+        return
+
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # 31 = gzip 헤더
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _iter_ndjson(records: Iterable[MoodRecord]) -> Iterator[bytes]:
+    buffer: List[bytes] = []
+    size = 0
+    for record in records:
+        line = (json.dumps(record.to_json(), ensure_ascii=False) + "\n").encode("utf-8")
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _iter_csv(records: Iterable[MoodRecord]) -> Iterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_FIELDS)
+    for record in records:
+        row = ["" if value is None else value for value in (getattr(record, name) for name in MoodRecord.FIELDS)]
+        row.append(json.dumps(record.extra, ensure_ascii=False) if record.extra else "")
+        writer.writerow(row)
+        if out.tell() >= CHUNK_SIZE:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+# ---------------------------------------------------------
+# 가져오기
+# ---------------------------------------------------------
+
+def import_records(
+    storage: Any,
+    data_path: str,
+    stream: IO[bytes],
+    fmt: str = "ndjson",
+    compressed: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    내보낸 파일(또는 같은 형식의 파일)을 읽어서 저장소에 넣음
+
+    Args:
+        storage: storage_local / storage_sqlite 모듈
+        stream: 바이너리 스트림 (업로드 파일, open(..., "rb"), stdin 등)
+
+    Returns:
+        {"imported": 새로 넣은 건수, "duplicates": 이미 있어서 건너뛴 건수, "invalid": 잘못된 줄 수}
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"알 수 없는 형식: {fmt} (가능: {', '.join(FORMATS)})")
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+
+    result = {"imported": 0, "duplicates": 0, "invalid": 0}
+    rows = _read_csv(stream) if fmt == "csv" else _read_ndjson(stream)
+
+    batch: List[Dict[str, Any]] = []
+    batch_ids: set = set()
+    for obj in rows:
+        record = _validate(obj)
+        if record is None:
+            result["invalid"] += 1
+            continue
+        if record["id"] in batch_ids or storage.get_record(data_path, record["id"]) is not None:
+            result["duplicates"] += 1
+            continue
+        batch.append(record)
+        batch_ids.add(record["id"])
+        if len(batch) >= batch_size:
+            result["imported"] += storage.append_records(data_path, batch)
+            batch, batch_ids = [], set()
+    if batch:
+        result["imported"] += storage.append_records(data_path, batch)
+    return result
+
+
+def _read_ndjson(stream: IO[bytes]) -> Iterator[Any]:
+    for raw in stream:
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            yield None
+
+
+def _read_csv(stream: IO[bytes]) -> Iterator[Any]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text):
+        obj: Dict[str, Any] = {}
+        for name, value in row.items():
+            if name is None or value is None or value == "":
+                continue
+            if name == "extra":
+                try:
+                    extra = json.loads(value)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(extra, dict):
+                    obj.update(extra)
+                continue
+            obj[name] = _csv_value(name, value)
+        yield obj
+
+
+def _csv_value(name: str, value: str) -> Any:
+    """CSV 문자열 → 필드 타입 (변환이 안 되면 문자열 그대로 → 검증에서 걸러짐)"""
+    try:
+        if name in _CSV_BOOL_FIELDS:
+            return value.strip().lower() in ("true", "1", "yes")
+        if name in _CSV_INT_FIELDS:
+            return int(value)
+        if name in _CSV_FLOAT_FIELDS:
+            return float(value)
+    except ValueError:
+        return value
+    return value
+
+
+def _validate(obj: Any) -> Optional[Dict[str, Any]]:
+    """
+    가져올 수 있는 기록이면 현재 스키마로 정규화한 dict, 아니면 None
+    - 날짜(YYYY-MM-DDTHH:MM:SS), 감정 색(COLOR_MAP), 표현 방식(write/draw/music)은 필수
+    - 나머지 필드는 있으면 타입 검사 (_fields_typed)
+    - id는 있으면 안전한 문자(RECORD_ID_RE)만, 없으면(예전 기록) 정규화하면서 ULID를 붙임
+    - 툼스톤(삭제 표시)은 가져오지 않음
+    """
+    if not isinstance(obj, dict) or obj.get(TOMBSTONE_KEY):
+        return None
+    date_time = obj.get("date_time") or obj.get("timestamp")
+    if not isinstance(date_time, str) or not DATE_TIME_RE.match(date_time):
+        return None
+    try:
+        datetime.fromisoformat(date_time)
+    except ValueError:
+        return None
+    record_id = obj.get("id")
+    if record_id is not None and (not isinstance(record_id, str) or not RECORD_ID_RE.match(record_id)):
+        return None
+    if obj.get("mood_color") not in COLOR_MAP or obj.get("mode") not in MODES:
+        return None
+    if not _fields_typed(obj):
+        return None
+    try:
+        return normalize_record(obj)
+    except (TypeError, ValueError, AttributeError, KeyError):
+        # 위 검사를 빠져나간 이상한 값도 파일 전체가 아니라 그 줄만 잘못된 줄로 셈
+        return None
+
+
+def _fields_typed(obj: Dict[str, Any]) -> bool:
+    """선택 필드들의 타입/값 검사 (색은 색 이름 또는 #RRGGBB)"""
+    def present(name: str) -> bool:
+        return obj.get(name) not in (None, "")
+
+    if any(present(name) and not isinstance(obj[name], str) for name in _TEXT_FIELDS):
+        return False
+    if any(present(name) and not isinstance(obj[name], bool) for name in _BOOL_FIELDS):
+        return False
+    if any(
+        present(name) and (isinstance(obj[name], bool) or not isinstance(obj[name], int))
+        for name in _INT_FIELDS
+    ):
+        return False
+    intensity = obj.get("color_intensity")
+    if intensity is not None and (isinstance(intensity, bool) or not isinstance(intensity, (int, float))):
+        return False
+    for name in ("initial_color", "initial_color_hex", "final_color"):
+        value = obj.get(name)
+        if not present(name):
+            continue
+        if not isinstance(value, str) or not (value in COLOR_MAP or HEX_COLOR_RE.match(value)):
+            return False
+    return True
@@ -0,0 +1,41 @@
+# 경로 : tests/conftest.py
+
+"""
+테스트 공통 준비
+- 저장소 루트를 import 경로에 추가 (python -m pytest 로 실행)
+- 기록은 매 테스트마다 tmp_path 아래 새 data 폴더에 저장
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "test")  # core.ai_helper가 import 시 클라이언트를 만듦
+
+from core import storage_local  # noqa: E402
+from core.storage_local import build_record, new_record_id  # noqa: E402
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    """논리 경로 data/mood_log.jsonl (실제 기록은 data/YYYY/MM.jsonl)"""
+    return str(tmp_path / "data" / "mood_log.jsonl")
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    """캐시를 거치지 않고 파일에서 바로 읽기 (큰 로그와 같은 경로: 인덱스 seek / 역방향 읽기)"""
+    monkeypatch.setattr(storage_local, "CACHE_MAX_FILE_BYTES", -1)
+    with storage_local._CACHE_LOCK:
+        storage_local._RECORD_CACHE.clear()
+
+
+def make_record(mood_text: str, date_time: str, mood_color: str = "blue", mode: str = "write"):
+    """date_time을 정해서 만든 기록 (id도 그 시각의 ULID)"""
+    record = build_record(mood_color, mood_text, mode)
+    record["date_time"] = date_time
+    record["id"] = new_record_id(datetime.fromisoformat(date_time))
+    return record
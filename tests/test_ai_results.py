@@ -0,0 +1,196 @@
+# 경로 : tests/test_ai_results.py
+
+"""AI 응답 결과를 워커끼리 공유 (결과 파일)"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from core import ai_helper
+
+
+@pytest.fixture
+def results_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_helper, "AI_RESULTS_DIR", None)
+    ai_helper.configure_ai_results(str(tmp_path / "ai_results"))
+    yield tmp_path / "ai_results"
+
+
+@pytest.fixture
+def fake_stream(monkeypatch):
+    monkeypatch.setattr(ai_helper, "stream_ai_response", lambda **kwargs: iter(["오늘의 ", "감정"]))
+
+
+def _forget_in_memory(stream_id):
+    """다른 워커인 척: 이 프로세스의 스트림 버퍼만 지움"""
+    with ai_helper._ai_streams_lock:
+        return ai_helper._ai_streams.pop(stream_id)
+
+
+def test_finished_stream_is_visible_to_other_workers(results_dir, fake_stream):
+    stream_id = ai_helper.start_ai_response_stream(mood_color="blue", mood_text="t", mode="write", interaction_type="chat")
+    assert _forget_in_memory(stream_id).wait(5)
+
+    stream = ai_helper.get_ai_stream(stream_id)
+    assert stream is not None and stream.done
+    assert stream.text == "오늘의 감정"
+    assert list(stream.iter_chunks()) == ["오늘의 감정"]
+
+    ai_helper.discard_ai_stream(stream_id)
+    assert ai_helper.get_ai_stream(stream_id) is None
+    assert list(results_dir.iterdir()) == []
+
+
+def test_running_stream_on_other_worker_is_not_found_yet(results_dir):
+    ai_helper.save_ai_result("abc123", {"kind": "stream", "status": "running", "created": 0})
+
+    assert ai_helper.get_ai_stream("abc123", wait=0.3) is None
+    assert ai_helper.load_ai_result("abc123")["status"] == "running"
+
+
+def test_result_ids_cannot_escape_the_folder(results_dir):
+    ai_helper.save_ai_result("../escape", {"status": "done"})
+
+    assert ai_helper.load_ai_result("../escape") is None
+    assert not (results_dir.parent / "escape.json").exists()
+
+
+@pytest.fixture
+def web(tmp_path_factory, monkeypatch):
+    """app 모듈 (기록/결과 폴더는 임시 폴더)"""
+    root = tmp_path_factory.mktemp("web")
+    monkeypatch.setenv("MOOD2IDEA_DATA_PATH", str(root / "data" / "mood_log.jsonl"))
+    monkeypatch.setenv("MOOD2IDEA_AI_RESULTS_DIR", str(root / "ai_results"))
+    import app as web_app
+    monkeypatch.setattr(ai_helper, "AI_RESULTS_DIR", None)
+    ai_helper.configure_ai_results(str(root / "ai_results"))
+    return web_app
+
+
+def _collect(web, draft, wait=0.0):
+    with web.app.test_request_context():
+        web.session["draft"] = dict(draft)
+        done = web.collect_ai_stream(wait=wait)
+        return done, web.get_draft()
+
+
+def test_stream_running_elsewhere_keeps_draft(web):
+    ai_helper.save_ai_result("feed01", {"kind": "stream", "status": "running", "created": 0})
+    draft = {"ai_stream": "feed01", "ai_stream_started": web.time.time()}
+
+    done, after = _collect(web, draft)
+
+    assert done is False
+    assert after["ai_stream"] == "feed01" and "ai_response" not in after
+
+
+def test_stream_finished_elsewhere_is_collected(web):
+    ai_helper.save_ai_result("feed02", {"kind": "stream", "status": "done", "created": 0, "text": "다른 워커 응답"})
+    draft = {"ai_stream": "feed02", "ai_stream_started": web.time.time()}
+
+    done, after = _collect(web, draft)
+
+    assert done is True
+    assert after["ai_response"] == "다른 워커 응답" and after["ai_stream"] is None
+    assert ai_helper.load_ai_result("feed02") is None
+
+
+def test_unknown_stream_fails_only_after_timeout(web):
+    draft = {"ai_stream": "feed03", "ai_stream_started": web.time.time()}
+    assert _collect(web, draft)[0] is False
+
+    draft["ai_stream_started"] -= ai_helper.AI_STREAM_TIMEOUT + 1
+    done, after = _collect(web, draft)
+    assert done is True
+    assert after["ai_stream"] is None and "불러오지 못했어요" in after["ai_response"]
+
+
+def test_finished_dalle_job_is_visible_to_other_workers(results_dir, tmp_path, monkeypatch):
+    output = tmp_path / "dalle.png"
+
+    def fake_response(**kwargs):
+        output.write_bytes(b"png")
+        return "새 이미지"
+
+    monkeypatch.setattr(ai_helper, "get_ai_response", fake_response)
+    job_id = ai_helper.start_dalle_job(new_image_path=str(output))
+    with ai_helper._dalle_lock:
+        assert ai_helper._dalle_jobs.pop(job_id).wait(5)
+
+    job = ai_helper.get_dalle_job(job_id)
+    assert job.done and job.image_ready and job.message == "새 이미지"
+    assert job.to_json()["image_filename"] == "dalle.png"
+
+
+def _collect_job(web, draft):
+    with web.app.test_request_context():
+        web.session["draft"] = dict(draft)
+        done = web.collect_dalle_job()
+        return done, web.get_draft()
+
+
+def test_unknown_dalle_job_is_pending_until_timeout(web):
+    draft = {"dalle_job": "cafe01", "dalle_job_started": web.time.time()}
+    done, after = _collect_job(web, draft)
+    assert done is False and after["dalle_job"] == "cafe01" and "ai_response" not in after
+
+    ai_helper.save_ai_result("cafe01", {"kind": "dalle", "id": "cafe01", "status": "running", "created": 0})
+    assert _collect_job(web, draft)[0] is False
+
+    draft["dalle_job_started"] -= ai_helper.DALLE_JOB_TIMEOUT + 1
+    done, after = _collect_job(web, draft)
+    assert done is True
+    assert after["dalle_job"] is None and "찾지 못했어요" in after["ai_response"]
+    assert ai_helper.load_ai_result("cafe01") is None
+
+
+def test_job_status_is_404_for_unknown_job(web):
+    client = web.app.test_client()
+    with client.session_transaction() as session:
+        session["draft"] = {"dalle_job": "beef01", "dalle_job_started": web.time.time()}
+
+    # 메모리에도 결과 파일에도 없음 → 가짜 queued 대신 404, 아직 기다리는 중이라 draft는 그대로
+    assert client.get("/jobs/beef01").status_code == 404
+    with client.session_transaction() as session:
+        assert session["draft"]["dalle_job"] == "beef01"
+
+    ai_helper.save_ai_result("beef01", {"kind": "dalle", "id": "beef01", "status": "running", "created": 0})
+    response = client.get("/jobs/beef01")
+    assert response.status_code == 200 and response.get_json()["status"] == "running"
+    assert client.get("/jobs/other").status_code == 404
+
+
+def _fake_download(monkeypatch, content=b"png", error=None):
+    import requests
+
+    image = SimpleNamespace(data=[SimpleNamespace(url="https://example.invalid/a.png")])
+    monkeypatch.setattr(ai_helper.client.images, "generate", lambda **kwargs: image)
+
+    def get(url, timeout):
+        def raise_for_status():
+            if error is not None:
+                raise error
+        return SimpleNamespace(content=content, raise_for_status=raise_for_status)
+
+    monkeypatch.setattr(requests, "get", get)
+
+
+def test_dalle_image_is_written_atomically(tmp_path, monkeypatch):
+    output = tmp_path / "dalle.png"
+    output.write_bytes(b"old")
+    _fake_download(monkeypatch, content=b"new image")
+
+    assert ai_helper.generate_image_with_dalle("prompt", str(output)) is True
+
+    assert output.read_bytes() == b"new image"
+    assert [p.name for p in tmp_path.iterdir()] == ["dalle.png"]
+
+
+def test_failed_dalle_download_leaves_no_file(tmp_path, monkeypatch):
+    import requests
+
+    output = tmp_path / "dalle.png"
+    _fake_download(monkeypatch, content=b"<error page>", error=requests.HTTPError("403"))
+
+    assert ai_helper.generate_image_with_dalle("prompt", str(output)) is False
+    assert list(tmp_path.iterdir()) == []
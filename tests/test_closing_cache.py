@@ -0,0 +1,96 @@
+# 경로 : tests/test_closing_cache.py
+
+"""마무리 메시지 캐시 (변형 모으기 / TTL / 디스크 저장)"""
+
+import json
+import os
+
+from core import ai_helper
+
+KEY = ai_helper.closing_cache_key("기쁨", "write", False)
+
+
+def _fill(cache, key=KEY, count=ai_helper.CLOSING_VARIANTS):
+    for i in range(count):
+        cache.add(key, f"메시지 {i}")
+
+
+def test_get_waits_for_all_variants_then_rotates():
+    cache = ai_helper.ClosingMessageCache(variants=3)
+
+    cache.add(KEY, "메시지 0")
+    cache.add(KEY, "메시지 1")
+    assert cache.get(KEY) is None  # 아직 2개 → 새로 생성하라는 뜻
+
+    cache.add(KEY, "메시지 2")
+    assert [cache.get(KEY) for _ in range(4)] == ["메시지 0", "메시지 1", "메시지 2", "메시지 0"]
+
+    cache.add(KEY, "넘치는 메시지")
+    assert cache._entries[KEY]["messages"] == ["메시지 0", "메시지 1", "메시지 2"]
+
+
+def test_expired_entry_is_dropped():
+    cache = ai_helper.ClosingMessageCache(variants=1, ttl_s=60)
+    cache.add(KEY, "오래된 메시지")
+    assert cache.get(KEY) == "오래된 메시지"
+
+    cache._entries[KEY]["created"] -= 61
+    assert cache.get(KEY) is None
+    assert len(cache) == 0
+
+
+def test_lru_keeps_recent_keys():
+    cache = ai_helper.ClosingMessageCache(max_size=2, variants=1)
+    keys = [ai_helper.closing_cache_key(mood, "draw", True) for mood in ("기쁨", "슬픔", "분노")]
+    cache.add(keys[0], "a")
+    cache.add(keys[1], "b")
+    cache.get(keys[0])  # 최근 사용
+    cache.add(keys[2], "c")
+
+    assert list(cache._entries) == [keys[0], keys[2]]
+
+
+def test_saves_only_when_variants_complete_and_reloads(tmp_path):
+    path = str(tmp_path / "cache" / "closing.json")
+    cache = ai_helper.ClosingMessageCache(variants=3, path=path)
+
+    _fill(cache, count=2)
+    assert not os.path.exists(path)  # 덜 모였을 때는 쓰지 않음
+
+    cache.add(KEY, "메시지 2")
+    mtime = os.stat(path).st_mtime_ns
+    cache.add(KEY, "넘치는 메시지")
+    assert cache.get(KEY) == "메시지 0"
+    assert os.stat(path).st_mtime_ns == mtime  # 바뀐 게 없으면 다시 쓰지 않음
+    assert [name for name in os.listdir(tmp_path / "cache")] == ["closing.json"]  # 임시 파일 안 남음
+
+    reloaded = ai_helper.ClosingMessageCache(variants=3, path=path)
+    assert [reloaded.get(KEY) for _ in range(3)] == ["메시지 0", "메시지 1", "메시지 2"]
+
+
+def test_reload_skips_expired_and_broken_entries(tmp_path):
+    path = tmp_path / "closing.json"
+    other = ai_helper.closing_cache_key("슬픔", "music", True)
+    path.write_text(json.dumps({
+        "version": ai_helper.CLOSING_CACHE_VERSION,
+        "entries": [
+            {"key": list(KEY), "messages": ["a", "b", "c"], "created": 0},
+            {"key": list(other), "messages": ["x", "y", "z"], "created": 9e12},
+            {"key": ["깨진 항목"], "messages": ["?"], "created": 9e12},
+        ],
+    }), encoding="utf-8")
+
+    cache = ai_helper.ClosingMessageCache(variants=3, ttl_s=3600, path=str(path))
+
+    assert list(cache._entries) == [other]
+    assert cache.get(other) == "x"
+
+
+def test_clear_rewrites_file(tmp_path):
+    path = str(tmp_path / "closing.json")
+    cache = ai_helper.ClosingMessageCache(variants=1, path=path)
+    cache.add(KEY, "메시지")
+
+    cache.clear()
+
+    assert len(ai_helper.ClosingMessageCache(variants=1, path=path)) == 0
@@ -0,0 +1,55 @@
+# 경로 : tests/test_closing_prefetch.py
+
+"""마무리 메시지 미리 가져오기 (step 6 → step 7)"""
+
+import threading
+import time
+
+import pytest
+
+from core import ai_helper
+
+
+@pytest.fixture
+def slow_generation(monkeypatch):
+    """API 대신 release될 때까지 멈춰 있는 생성 함수 (호출 횟수 기록)"""
+    monkeypatch.setattr(ai_helper, "_closing_cache", ai_helper.ClosingMessageCache())
+    monkeypatch.setattr(ai_helper, "_closing_table", {})
+    release = threading.Event()
+    calls = []
+
+    def generate(mood_name, mode, ai_used):
+        calls.append((mood_name, mode, ai_used))
+        release.wait(5)
+        return f"{mood_name} 마무리"
+
+    monkeypatch.setattr(ai_helper, "_generate_closing_message", generate)
+    yield release, calls
+    release.set()
+
+
+def test_timeout_does_not_call_api_twice(slow_generation):
+    release, calls = slow_generation
+    token = ai_helper.prefetch_closing_message("기쁨", "#FFD700", "write", False)
+
+    message = ai_helper.take_closing_message(token, "기쁨", "write", False, timeout=0.05)
+    assert message == ai_helper.CLOSING_FALLBACK
+
+    # 두 번째 호출 없이, 늦게 끝난 결과는 캐시 변형으로 들어감
+    release.set()
+    key = ai_helper.closing_cache_key("기쁨", "write", False)
+    for _ in range(500):
+        if key in ai_helper._closing_cache._entries:
+            break
+        time.sleep(0.01)
+    assert ai_helper._closing_cache._entries[key]["messages"] == ["기쁨 마무리"]
+    assert len(calls) == 1
+
+
+def test_changed_draft_discards_prefetch(slow_generation):
+    release, _ = slow_generation
+    release.set()
+    token = ai_helper.prefetch_closing_message("기쁨", "#FFD700", "write", False)
+
+    assert ai_helper.take_closing_message(token, "슬픔", "write", False) is None
+    assert ai_helper.take_closing_message(token, "기쁨", "write", False) is None  # 한 번만 꺼냄
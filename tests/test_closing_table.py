@@ -0,0 +1,59 @@
+# 경로 : tests/test_closing_table.py
+
+"""마무리 메시지 사전 생성 테이블 (--offline 생성 → 읽기 → step 7 조회)"""
+
+import json
+
+import pytest
+
+from core import ai_helper
+
+
+@pytest.fixture
+def no_api(monkeypatch):
+    """테이블에서만 답해야 함 → 캐시는 비우고, 실시간 생성은 실패로 처리"""
+    monkeypatch.setattr(ai_helper, "_closing_cache", ai_helper.ClosingMessageCache())
+    monkeypatch.setattr(ai_helper, "_closing_table", {})
+    monkeypatch.setattr(ai_helper, "_closing_table_next", {})
+
+    def generate(mood_name, mode, ai_used):
+        raise AssertionError(f"API 호출됨: {(mood_name, mode, ai_used)}")
+
+    monkeypatch.setattr(ai_helper, "_generate_closing_message", generate)
+
+
+def test_offline_table_covers_every_key(tmp_path, no_api):
+    path = str(tmp_path / "closing_messages.json")
+    keys = ai_helper.closing_table_keys()
+
+    summary = ai_helper.pregenerate_closing_table(path, offline=True, workers=4)
+
+    assert summary == {
+        "combos": len(keys),
+        "messages": len(keys) * ai_helper.CLOSING_VARIANTS,
+        "failed": 0,
+    }
+    assert len(keys) == len(set(keys)) == 126
+    assert [p.name for p in tmp_path.iterdir()] == ["closing_messages.json"]
+    assert ai_helper.load_closing_table(path) == len(keys)
+
+    for mood_name, mode, ai_used in keys:
+        expected = ai_helper.offline_closing_messages(mood_name, mode, ai_used)
+        seen = [
+            ai_helper.get_closing_message(mood_name, "#FFFFFF", mode, ai_used)
+            for _ in range(ai_helper.CLOSING_VARIANTS)
+        ]
+        assert seen == expected
+        assert all(message and mood_name in message for message in seen)
+    assert len(ai_helper._closing_cache) == 0  # 테이블에서 답했으니 캐시/API를 거치지 않음
+
+
+def test_stale_prompt_version_is_ignored(tmp_path, no_api):
+    path = tmp_path / "closing_messages.json"
+    ai_helper.pregenerate_closing_table(str(path), offline=True)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["prompt_version"] = ai_helper.CLOSING_PROMPT_VERSION - 1
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    assert ai_helper.load_closing_table(str(path)) == 0
+    assert ai_helper.load_closing_table(str(tmp_path / "없음.json")) == 0
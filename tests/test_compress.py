@@ -0,0 +1,72 @@
+# 경로 : tests/test_compress.py
+
+"""지난 달 압축 세그먼트에서의 삭제 / 추가"""
+
+import os
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def compressed_month(data_path, monkeypatch):
+    """2026-03 기록 12건을 작은 블록 여러 개로 압축해 둔 상태"""
+    monkeypatch.setattr(storage_local, "COMPRESS_BLOCK_SIZE", 512)
+    records = [make_record(f"삼월 {day}", f"2026-03-{day:02d}T09:00:00") for day in range(1, 13)]
+    storage_local.append_records(data_path, records)
+    storage_local.compress_segment(data_path, "2026-03")
+
+    packed = storage_local.segment_path(data_path, "2026-03") + storage_local.COMPRESSED_SUFFIX
+    assert os.path.exists(packed)
+    assert len(storage_local._load_block_index(packed)["blocks"]) > 1
+    return records
+
+
+def _ids(data_path):
+    return [r.id for r in storage_local.iter_records(data_path)]
+
+
+def _plain_path(data_path):
+    return storage_local.segment_path(data_path, "2026-03")
+
+
+def test_delete_by_id_in_compressed_month(data_path, compressed_month):
+    target = compressed_month[7]
+
+    assert storage_local.delete_record(data_path, target["id"]) is True
+
+    # 툼스톤 꼬리를 만들지 않고 압축 파일을 다시 씀
+    assert not os.path.exists(_plain_path(data_path))
+    assert storage_local.get_record(data_path, target["id"]) is None
+    assert _ids(data_path) == [r["id"] for r in compressed_month if r is not target]
+    assert storage_local.read_records_by_date(data_path, "2026-03-08") == []
+    assert "2026-03-08" not in storage_local.get_calendar_summary(data_path, 2026, 3)
+    assert storage_local.delete_record(data_path, target["id"]) is False
+
+
+def test_delete_by_datetime_in_compressed_month(data_path, compressed_month):
+    assert storage_local.delete_record_by_datetime(data_path, "2026-03-02T09:00:00") is True
+
+    assert not os.path.exists(_plain_path(data_path))
+    assert _ids(data_path) == [r["id"] for r in compressed_month if r is not compressed_month[1]]
+    assert storage_local.delete_record_by_datetime(data_path, "2026-03-02T09:00:00") is False
+
+
+def test_append_then_delete_in_compressed_month(data_path, compressed_month):
+    added = make_record("늦게 쓴 삼월", "2026-03-05T12:00:00")
+    storage_local.append_record(data_path, added)
+
+    # 압축 파일에 시간순으로 합쳐지고 id로 바로 찾을 수 있음
+    assert not os.path.exists(_plain_path(data_path))
+    assert storage_local.get_record(data_path, added["id"]).mood_text == "늦게 쓴 삼월"
+    expected = compressed_month[:5] + [added] + compressed_month[5:]
+    assert _ids(data_path) == [r["id"] for r in expected]
+    assert [r.id for r in storage_local.read_records_by_date(data_path, "2026-03-05")] == [
+        added["id"], compressed_month[4]["id"],
+    ]
+
+    assert storage_local.delete_record(data_path, added["id"]) is True
+    assert _ids(data_path) == [r["id"] for r in compressed_month]
+    assert storage_local.get_record(data_path, compressed_month[0]["id"]).mood_text == "삼월 1"
@@ -0,0 +1,97 @@
+# 경로 : tests/test_date_index.py
+
+"""날짜별 바이트 오프셋 인덱스 (idx.json 사이드카, 어긋난 인덱스 복구)"""
+
+import json
+import os
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def february(data_path):
+    records = [
+        make_record("1일 아침", "2026-02-01T08:00:00"),
+        make_record("1일 저녁", "2026-02-01T20:00:00"),
+        make_record("2일", "2026-02-02T09:00:00"),
+        make_record("3일", "2026-02-03T09:00:00"),
+    ]
+    storage_local.append_records(data_path, records)
+    return storage_local.segment_path(data_path, "2026-02")
+
+
+def _forget_index(path):
+    """재시작한 워커인 척: 메모리의 인덱스만 버림"""
+    with storage_local._INDEX_LOCK:
+        storage_local._INDEX_CACHE.pop(os.path.abspath(path), None)
+
+
+def _sidecar(path):
+    with open(storage_local.date_index_path(path), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _day_texts(data_path, day):
+    return [r.mood_text for r in storage_local.read_records_by_date(data_path, day)]
+
+
+def test_index_maps_days_to_merged_byte_ranges(february):
+    index = _sidecar(february)
+
+    assert index["size"] == os.path.getsize(february)
+    assert sorted(index["days"]) == ["2026-02-01", "2026-02-02", "2026-02-03"]
+    assert len(index["days"]["2026-02-01"]) == 1  # 이어지는 두 줄은 구간 하나
+    with open(february, "rb") as f:
+        lo, hi = index["days"]["2026-02-02"][0]
+        f.seek(lo)
+        assert json.loads(f.read(hi - lo))["mood_text"] == "2일"
+        assert storage_local._span_windows(f, february, "2026-02-02", "2026-02-03\uffff") == [
+            (lo, os.path.getsize(february))
+        ]
+
+
+def test_range_reads_use_only_indexed_windows(data_path, february, streaming):
+    assert _day_texts(data_path, "2026-02-01") == ["1일 저녁", "1일 아침"]
+    assert _day_texts(data_path, "2026-02-02") == ["2일"]
+    assert _day_texts(data_path, "2026-02-04") == []
+
+
+def test_index_catches_up_with_lines_appended_elsewhere(data_path, february, streaming):
+    _forget_index(february)
+    with open(february, "ab") as f:
+        f.write(storage_local._encode_line(make_record("다른 워커", "2026-02-02T22:00:00")))
+
+    assert _day_texts(data_path, "2026-02-02") == ["다른 워커", "2일"]
+    assert _sidecar(february)["size"] == os.path.getsize(february)
+
+
+@pytest.mark.parametrize("stale", ["inode", "longer", "version", "broken"])
+def test_stale_sidecar_is_rebuilt(data_path, february, streaming, stale):
+    index_path = storage_local.date_index_path(february)
+    index = _sidecar(february)
+    if stale == "inode":
+        index["inode"] += 1
+        index["days"] = {"2026-02-02": [[0, 10]]}  # 엉뚱한 구간
+    elif stale == "longer":
+        index["size"] += 1000
+    elif stale == "version":
+        index["version"] = storage_local.DATE_INDEX_VERSION - 1
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write("{깨진" if stale == "broken" else json.dumps(index))
+    _forget_index(february)
+
+    assert _day_texts(data_path, "2026-02-02") == ["2일"]
+    assert _sidecar(february)["size"] == os.path.getsize(february)
+
+
+def test_rewritten_segment_gets_fresh_index(data_path, february, streaming):
+    storage_local.delete_record(data_path, storage_local.read_records_by_date(data_path, "2026-02-01")[0].id)
+    storage_local.compact(data_path, force=True)
+    _forget_index(february)
+
+    assert _day_texts(data_path, "2026-02-01") == ["1일 아침"]
+    assert storage_local.rebuild_date_index(february) == 3
+    assert storage_local.rebuild_date_index(february + ".없음") == 0
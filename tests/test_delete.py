@@ -0,0 +1,82 @@
+# 경로 : tests/test_delete.py
+
+"""툼스톤 삭제 + 컴팩션"""
+
+import time
+
+from conftest import make_record
+from core import storage_local
+
+
+def _raw_lines(path):
+    with open(path, "rb") as f:
+        return [line for line in f.read().splitlines() if line.strip()]
+
+
+def _wait_for_background_compaction(timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while storage_local._COMPACTING and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not storage_local._COMPACTING
+
+
+def test_delete_hides_record_and_compact_drops_tombstone(data_path):
+    records = [make_record(f"기록 {day}", f"2026-04-{day:02d}T09:00:00") for day in range(1, 6)]
+    for record in records:
+        storage_local.append_record(data_path, record)
+    path = storage_local.segment_path(data_path, "2026-04")
+
+    assert storage_local.delete_record(data_path, records[2]["id"]) is True
+
+    # 파일은 다시 쓰지 않고 툼스톤 한 줄만 붙음, 읽을 때는 바로 사라짐
+    assert len(_raw_lines(path)) == 6
+    assert storage_local.get_record(data_path, records[2]["id"]) is None
+    alive = [r["id"] for r in records if r is not records[2]]
+    assert [r.id for r in storage_local.iter_records(data_path)] == alive
+
+    assert storage_local.compact(data_path, force=True) == {path: 2}
+
+    lines = _raw_lines(path)
+    assert len(lines) == 4
+    assert not any(storage_local._TOMBSTONE_MARK in line for line in lines)
+    assert [r.id for r in storage_local.iter_records(data_path)] == alive
+    assert [r.id for r in storage_local.read_records_by_date(data_path, "2026-04-04")] == [records[3]["id"]]
+
+    # 이미 지운 기록 / 정리할 것이 없는 세그먼트
+    assert storage_local.delete_record(data_path, records[2]["id"]) is False
+    assert storage_local.compact(data_path, force=True) == {}
+
+
+def test_delete_by_datetime_removes_same_second_records_only(data_path):
+    first = make_record("첫째", "2026-04-10T09:00:00")
+    second = make_record("둘째", "2026-04-10T09:00:00")
+    other = make_record("다른 시각", "2026-04-10T09:00:01")
+    for record in (first, second, other):
+        storage_local.append_record(data_path, record)
+
+    # id 삭제는 같은 초의 다른 기록을 건드리지 않음
+    assert storage_local.delete_record(data_path, first["id"]) is True
+    assert [r.id for r in storage_local.iter_records(data_path)] == [second["id"], other["id"]]
+
+    assert storage_local.delete_record_by_datetime(data_path, "2026-04-10T09:00:00") is True
+    assert [r.id for r in storage_local.iter_records(data_path)] == [other["id"]]
+
+    storage_local.compact(data_path, force=True)
+    assert [r.id for r in storage_local.iter_records(data_path)] == [other["id"]]
+    assert storage_local.delete_record_by_datetime(data_path, "2026-04-10T09:00:00") is False
+
+
+def test_many_deletes_compact_in_background(data_path):
+    records = [make_record(f"기록 {i}", f"2026-05-01T09:{i:02d}:00") for i in range(10)]
+    storage_local.append_records(data_path, records)
+    path = storage_local.segment_path(data_path, "2026-05")
+
+    # 4번째 삭제에서 죽은 줄 8 / 14줄 → 임계값(COMPACT_MIN_DEAD, COMPACT_THRESHOLD) 넘음
+    for record in records[:4]:
+        storage_local.delete_record(data_path, record["id"])
+    _wait_for_background_compaction()
+
+    # 임계값을 넘은 뒤 백그라운드에서 다시 써서 툼스톤이 남지 않음
+    assert storage_local.tombstone_share(path) == 0.0
+    assert len(_raw_lines(path)) == 6
+    assert [r.id for r in storage_local.iter_records(data_path)] == [r["id"] for r in records[4:]]
@@ -0,0 +1,79 @@
+# 경로 : tests/test_iter_records.py
+
+"""스트리밍 읽기 (iter_records 제너레이터, 도중에 멈추기)"""
+
+import builtins
+import inspect
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def three_months(data_path):
+    records = [
+        make_record(f"{month}월 {day}일", f"2026-{month:02d}-{day:02d}T09:00:00")
+        for month in (1, 2, 3)
+        for day in (1, 2)
+    ]
+    storage_local.append_records(data_path, records)
+    return [r["mood_text"] for r in records]
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """storage_local이 연 파일 목록 (닫혔는지 확인용)"""
+    files = []
+
+    def tracking_open(*args, **kwargs):
+        f = builtins.open(*args, **kwargs)
+        files.append(f)
+        return f
+
+    monkeypatch.setattr(storage_local, "open", tracking_open, raising=False)
+    return files
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_order_and_range_across_segments(data_path, three_months, monkeypatch, cached):
+    if not cached:
+        monkeypatch.setattr(storage_local, "CACHE_MAX_FILE_BYTES", -1)
+
+    assert inspect.isgenerator(storage_local.iter_records(data_path))
+    assert [r.mood_text for r in storage_local.iter_records(data_path)] == three_months
+    assert [r.mood_text for r in storage_local.iter_records(data_path, reverse=True)] == three_months[::-1]
+    ranged = storage_local.iter_records(data_path, "2026-01-02", "2026-02-01\uffff", reverse=True)
+    assert [r.mood_text for r in ranged] == ["2월 1일", "1월 2일"]
+
+
+def test_early_exit_opens_only_the_newest_segment(data_path, three_months, streaming, opened):
+    records = storage_local.iter_records(data_path, reverse=True)
+
+    first = next(records)
+
+    assert first.mood_text == "3월 2일"
+    segment_reads = [f for f in opened if f.name.endswith(".jsonl")]
+    assert [f.name for f in segment_reads] == [storage_local.segment_path(data_path, "2026-03")]
+    assert not segment_reads[0].closed
+
+    records.close()  # break / islice로 멈춘 것과 같음
+    assert segment_reads[0].closed
+
+
+def test_nothing_is_read_until_iteration_starts(data_path, three_months, streaming, opened):
+    records = storage_local.iter_records(data_path)
+    assert opened == []
+
+    assert next(records).mood_text == "1월 1일"
+    records.close()
+
+
+def test_mixed_compressed_and_plain_segments(data_path, three_months):
+    storage_local.compress_segment(data_path, "2026-01")
+
+    assert [r.mood_text for r in storage_local.iter_records(data_path)] == three_months
+    newest_first = storage_local.iter_records(data_path, reverse=True)
+    assert [next(newest_first).mood_text for _ in range(3)] == ["3월 2일", "3월 1일", "2월 2일"]
+    newest_first.close()
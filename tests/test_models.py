@@ -0,0 +1,109 @@
+# 경로 : tests/test_models.py
+
+"""MoodRecord (읽기 전용 기록 모델)"""
+
+import copy
+import json
+import pickle
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from core.models import MoodRecord
+
+
+def _sample():
+    return {
+        "date_time": "2026-02-03T09:00:00",
+        "id": "01KGGXF0W00000000000000000",
+        "mood_color": "blue",
+        "mood_text": "조용한 아침",
+        "mode": "write",
+        "text_content": "창밖이 흐렸다",
+        "ai_used": False,
+        "color_intensity": 0.0,
+        "ai_interaction_count": 0,
+        "future_field": {"nested": [1, 2]},
+    }
+
+
+def test_json_round_trip_keeps_order_extra_and_falsy_values():
+    obj = _sample()
+    record = MoodRecord.from_json(obj)
+
+    assert record.to_json() == obj
+    assert list(record.to_json())[:2] == ["date_time", "id"]
+    # False / 0 / 0.0 은 "값 없음"이 아님
+    assert record.ai_used is False and record.ai_interaction_count == 0
+    assert record.extra == {"future_field": {"nested": [1, 2]}}
+    assert record.future_field == {"nested": [1, 2]}
+    assert MoodRecord.from_json(json.loads(json.dumps(record.to_json()))) == record
+
+
+def test_none_fields_are_dropped_and_get_returns_default():
+    record = MoodRecord.from_json({**_sample(), "draw_note": None, "background": None})
+
+    out = record.to_json()
+    assert "draw_note" not in out and "background" not in out
+    assert "image_filename" not in out
+    assert record.get("draw_note") is None
+    assert record.get("draw_note", "") == ""
+    assert record.get("future_field") == {"nested": [1, 2]}
+    assert record.get("nowhere", "기본") == "기본"
+    assert MoodRecord(mood_text="x").extra is None
+
+
+def test_getitem_raises_key_error_for_missing_values():
+    record = MoodRecord.from_json(_sample())
+
+    assert record["mood_text"] == "조용한 아침"
+    assert record["future_field"] == {"nested": [1, 2]}
+    assert record["ai_used"] is False
+    with pytest.raises(KeyError):
+        record["draw_note"]
+    with pytest.raises(KeyError):
+        record["nowhere"]
+    with pytest.raises(AttributeError):
+        record.nowhere
+    with pytest.raises(TypeError):
+        iter(record)
+
+
+def test_replace_returns_new_instance():
+    record = MoodRecord.from_json(_sample())
+
+    changed = record.replace(final_color="green", color_intensity=0.4, mood_text=None)
+
+    assert changed is not record
+    assert changed.final_color == "green" and changed.color_intensity == 0.4
+    assert changed.mood_text is None and "mood_text" not in changed.to_json()
+    assert changed.extra == record.extra
+    assert record.final_color is None and record.mood_text == "조용한 아침"
+
+
+def test_record_is_immutable():
+    record = MoodRecord.from_json(_sample())
+
+    with pytest.raises(FrozenInstanceError):
+        record.mood_text = "바꿈"
+    with pytest.raises(FrozenInstanceError):
+        record.brand_new = 1
+    with pytest.raises(FrozenInstanceError):
+        del record.mood_text
+    with pytest.raises(TypeError):
+        hash(record)
+    assert record.mood_text == "조용한 아침"
+
+
+def test_pickle_round_trip_uses_value_tuple():
+    record = MoodRecord.from_json(_sample())
+    plain = MoodRecord(date_time="2026-02-04T10:00:00", mood_text="extra 없음")
+
+    for original in (record, plain):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            restored = pickle.loads(pickle.dumps(original, protocol=protocol))
+            assert restored == original
+            assert restored.extra == original.extra
+            assert restored.to_json() == original.to_json()
+    assert copy.deepcopy(record) == record
+    assert pickle.loads(pickle.dumps([record, record]))[1].future_field == {"nested": [1, 2]}
@@ -0,0 +1,82 @@
+# 경로 : tests/test_paging.py
+
+"""커서 페이지네이션 (월 경계 / 압축 세그먼트 경계)"""
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def history(data_path):
+    """
+    1~2월은 압축, 3월은 일반 세그먼트
+    - 월 경계 바로 앞뒤와 같은 초에 여러 건인 기록을 섞음
+    - 3월에는 툼스톤으로 지운 기록 하나
+    """
+    times = [
+        "2026-01-15T10:00:00",
+        "2026-01-31T23:59:59", "2026-01-31T23:59:59", "2026-01-31T23:59:59",
+        "2026-02-01T00:00:00",
+        "2026-02-14T08:00:00",
+        "2026-02-28T23:59:59", "2026-02-28T23:59:59",
+        "2026-03-01T00:00:00", "2026-03-01T00:00:00",
+        "2026-03-02T07:30:00",
+        "2026-03-20T21:00:00",
+    ]
+    records = [make_record(f"기록 {i}", t) for i, t in enumerate(times)]
+    storage_local.append_records(data_path, records)
+    storage_local.compress_segment(data_path, "2026-01")
+    storage_local.compress_segment(data_path, "2026-02")
+
+    removed = records[10]
+    storage_local.delete_record(data_path, removed["id"])
+    alive = [r for r in records if r is not removed]
+    return sorted(alive, key=lambda r: (r["date_time"], r["id"]), reverse=True)
+
+
+def _walk_older(data_path, limit):
+    """첫 페이지부터 끝까지 → (페이지들, 마지막 페이지의 '더 최근' 커서)"""
+    pages = []
+    cursor = None
+    while True:
+        page, cursor, newer = storage_local.read_page(data_path, limit, before=cursor)
+        pages.append(page)
+        if cursor is None:
+            return pages, newer
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 5, 11, 20])
+def test_walk_older_across_month_and_compressed_boundaries(data_path, history, limit):
+    pages, _ = _walk_older(data_path, limit)
+
+    seen = [r.id for page in pages for r in page]
+    assert seen == [r["id"] for r in history]
+    assert all(0 < len(page) <= limit for page in pages)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 5, 10])
+def test_walk_newer_back_from_oldest_page(data_path, history, limit):
+    pages, newer = _walk_older(data_path, limit)
+    seen = [r.id for r in pages[-1]]
+
+    while newer:
+        page, older, newer = storage_local.read_page(data_path, limit, after=newer)
+        assert older is not None
+        seen = [r.id for r in page] + seen
+
+    assert seen == [r["id"] for r in history]
+
+
+def test_first_page_for_missing_or_bad_cursor(data_path, history):
+    first, older, newer = storage_local.read_page(data_path, 3)
+    assert [r.id for r in first] == [r["id"] for r in history[:3]]
+    assert older is not None and newer is None
+
+    bad, _, _ = storage_local.read_page(data_path, 3, before="!!not-a-cursor")
+    assert [r.id for r in bad] == [r.id for r in first]
+
+    # 가장 최근 기록보다 더 최근 페이지는 비어 있고 커서는 그대로
+    empty, older, newer = storage_local.read_page(data_path, 3, after=storage_local.encode_cursor(first[0]))
+    assert empty == [] and newer is None
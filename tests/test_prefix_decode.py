@@ -0,0 +1,76 @@
+# 경로 : tests/test_prefix_decode.py
+
+"""date_time 앞부분으로 먼저 거르고 맞는 줄만 디코딩"""
+
+import json
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def loads_calls(monkeypatch):
+    """전체 디코딩(_loads)이 몇 번 불렸는지"""
+    calls = []
+    original = storage_local._loads
+
+    def counting(line):
+        calls.append(line)
+        return original(line)
+
+    monkeypatch.setattr(storage_local, "_loads", counting)
+    return calls
+
+
+@pytest.mark.parametrize("line, expected", [
+    (b'{"date_time": "2026-02-03T09:00:00", "id": "01ABC", "mood_text": "x"}', ("2026-02-03T09:00:00", "01ABC")),
+    (b'{"date_time":"2026-02-03T09:00:00","id":"01ABC"}', ("2026-02-03T09:00:00", "01ABC")),
+    (b'{"date_time": "2026-02-03T09:00:00", "mood_text": "no id"}', ("2026-02-03T09:00:00", None)),
+    (b'{"id": "01ABC", "date_time": "2026-02-03T09:00:00"}', (None, None)),
+    (b'{"timestamp": "2026-02-03T09:00:00"}', (None, None)),
+    (b'{"date_time": "2026-02-03T09:0', (None, None)),
+])
+def test_line_prefix_fields(line, expected):
+    assert (storage_local._line_timestamp(line), storage_local._line_id(line)) == expected
+
+
+def test_out_of_range_lines_are_not_decoded(loads_calls):
+    inside = storage_local._encode_line(make_record("안", "2026-02-03T09:00:00")).strip()
+    outside = storage_local._encode_line(make_record("밖", "2026-03-01T09:00:00")).strip()
+    start, end = storage_local._prefix_bounds("2026-02")
+
+    assert storage_local._decode_in_span(outside, start, end) is None
+    assert loads_calls == []
+    assert storage_local._decode_in_span(inside, start, end)["mood_text"] == "안"
+    assert len(loads_calls) == 1
+
+
+def test_lines_without_prefix_fall_back_to_full_decode(loads_calls):
+    start, end = storage_local._prefix_bounds("2026-02-03")
+    reordered = json.dumps({"mood_text": "순서 다름", "date_time": "2026-02-03T10:00:00"}).encode()
+    legacy = json.dumps({"timestamp": "2026-02-04T10:00:00", "mood_text": "다른 날"}).encode()
+
+    assert storage_local._decode_in_span(reordered, start, end)["mood_text"] == "순서 다름"
+    assert storage_local._decode_in_span(legacy, start, end) is None
+    assert storage_local._decode_in_span(b"{broken", None, None) is None
+    assert storage_local._decode_in_span(b"[1, 2]", None, None) is None
+    assert len(loads_calls) == 4
+
+
+def test_month_scan_decodes_only_matching_lines(data_path, streaming, loads_calls):
+    storage_local.append_records(data_path, [
+        make_record("2일", "2026-02-02T09:00:00"),
+        make_record("3일 아침", "2026-02-03T08:00:00"),
+        make_record("3일 저녁", "2026-02-03T21:00:00"),
+        make_record("4일", "2026-02-04T09:00:00"),
+    ])
+    # 날짜 인덱스는 3일 구간 전체(아침 포함)를 읽지만, 시각이 범위 밖인 아침 줄은 디코딩하지 않음
+    start, end = "2026-02-03T12:00:00", "2026-02-03T23:59:59"
+    del loads_calls[:]
+
+    texts = [r.mood_text for r in storage_local.iter_records(data_path, start, end)]
+
+    assert texts == ["3일 저녁"]
+    assert len(loads_calls) == 1
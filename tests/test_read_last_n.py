@@ -0,0 +1,73 @@
+# 경로 : tests/test_read_last_n.py
+
+"""최근 n개 읽기 (파일 끝에서 거꾸로, 세그먼트 경계 넘기)"""
+
+import io
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def two_months(data_path):
+    """2월 3건 + 3월 2건 (3월 첫 기록은 삭제)"""
+    feb = [make_record(f"2월 {day}", f"2026-02-{day:02d}T09:00:00") for day in (1, 2, 3)]
+    mar = [make_record(f"3월 {day}", f"2026-03-{day:02d}T09:00:00") for day in (1, 2)]
+    storage_local.append_records(data_path, feb + mar)
+    storage_local.delete_record(data_path, mar[0]["id"])
+    return feb, mar
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_last_n_crosses_segment_boundary(data_path, two_months, monkeypatch, cached):
+    if not cached:
+        monkeypatch.setattr(storage_local, "CACHE_MAX_FILE_BYTES", -1)
+
+    texts = [r.mood_text for r in storage_local.read_last_n(data_path, 3)]
+
+    assert texts == ["3월 2", "2월 3", "2월 2"]
+    assert [r.mood_text for r in storage_local.read_last_n(data_path, 10)] == ["3월 2", "2월 3", "2월 2", "2월 1"]
+    assert storage_local.read_last_n(data_path, 0) == []
+
+
+def test_last_n_ignores_torn_tail(data_path, two_months, streaming):
+    with open(storage_local.segment_path(data_path, "2026-03"), "ab") as f:
+        f.write(b'{"date_time": "2026-03-09T09:00:00", "mood_te')
+
+    assert [r.mood_text for r in storage_local.read_last_n(data_path, 2)] == ["3월 2", "2월 3"]
+
+
+def test_last_n_decodes_only_the_tail(data_path, streaming, monkeypatch):
+    storage_local.append_records(
+        data_path,
+        [make_record(f"기록 {i}", f"2026-02-{1 + i // 10:02d}T{i % 10:02d}:00:00") for i in range(60)],
+    )
+    decoded = []
+    original = storage_local._decode_in_span
+
+    def counting(line, start, end):
+        decoded.append(line)
+        return original(line, start, end)
+
+    monkeypatch.setattr(storage_local, "_decode_in_span", counting)
+
+    assert [r.mood_text for r in storage_local.read_last_n(data_path, 2)] == ["기록 59", "기록 58"]
+    assert len(decoded) == 2
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 7, 64])
+def test_reverse_lines_match_forward_for_any_block_size(block_size):
+    data = b'{"a":1}\n\n{"b":22}\n  \n{"c":333}\n{"torn'
+    f = io.BytesIO(data)
+
+    forward = [line for _, line in storage_local._iter_lines_forward(f)]
+    backward = list(storage_local._iter_lines_reverse(f, block_size=block_size))
+
+    assert forward == [b'{"a":1}', b'{"b":22}', b'{"c":333}']
+    assert backward == list(reversed(forward))
+    # 구간 [lo, hi) 안에서만
+    lo = data.index(b'{"b"')
+    hi = data.index(b'{"c"')
+    assert list(storage_local._iter_lines_reverse(f, lo, hi, block_size=block_size)) == [b'{"b":22}']
@@ -0,0 +1,94 @@
+# 경로 : tests/test_recent_ring.py
+
+"""최근 기록 링 (recent.json, 24시간 제한용)"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """링을 처음부터 다시 만든 횟수"""
+    calls = []
+    original = storage_local._build_recent
+
+    def counting(data_path, now):
+        calls.append(now)
+        return original(data_path, now)
+
+    monkeypatch.setattr(storage_local, "_build_recent", counting)
+    return calls
+
+
+def _ago(minutes):
+    return (datetime.now() - timedelta(minutes=minutes)).isoformat(timespec="seconds")
+
+
+def _ring(data_path):
+    with open(storage_local._recent_file(data_path), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_append_updates_ring_in_place(data_path, builds):
+    storage_local.append_record(data_path, make_record("어제 전", _ago(25 * 60)))
+    for minutes in (90, 60, 30):
+        storage_local.append_record(data_path, make_record(f"{minutes}분 전", _ago(minutes)))
+
+    assert storage_local.count_records_last_24h(data_path) == 3
+    assert len(builds) == 1
+
+    latest = make_record("방금", _ago(1))
+    storage_local.append_record(data_path, latest)
+
+    assert storage_local.count_records_last_24h(data_path) == 4
+    assert len(builds) == 1  # 로그를 다시 읽지 않고 링만 갱신
+    assert _ring(data_path)["entries"][0] == [latest["date_time"], latest["id"]]
+    assert [r.id for r in storage_local.get_records_last_24h(data_path)][0] == latest["id"]
+
+
+def test_delete_removes_entry_without_rebuild(data_path, builds):
+    records = [make_record(f"{m}분 전", _ago(m)) for m in (50, 40, 30)]
+    for record in records:
+        storage_local.append_record(data_path, record)
+    assert storage_local.count_records_last_24h(data_path) == 3
+
+    storage_local.delete_record(data_path, records[1]["id"])
+
+    assert storage_local.count_records_last_24h(data_path) == 2
+    assert len(builds) == 1
+    assert records[1]["id"] not in [e[1] for e in _ring(data_path)["entries"]]
+
+
+def test_segment_changed_outside_the_app_rebuilds_ring(data_path, builds):
+    storage_local.append_record(data_path, make_record("앱에서", _ago(20)))
+    assert storage_local.count_records_last_24h(data_path) == 1
+
+    # 다른 프로세스/손으로 줄을 붙임 → 링의 sources 서명과 어긋남
+    outside = make_record("밖에서", _ago(10))
+    segment = storage_local.segment_path(data_path, outside["date_time"][:7])
+    with open(segment, "ab") as f:
+        f.write(storage_local._encode_line(outside))
+
+    assert storage_local.count_records_last_24h(data_path) == 2
+    assert len(builds) == 2
+    assert outside["id"] in [e[1] for e in _ring(data_path)["entries"]]
+
+
+def test_more_than_ring_size_inside_window(data_path):
+    count = storage_local.RECENT_SIZE + 5
+    records = [make_record(f"{m}분 전", _ago(m)) for m in range(count, 0, -1)]
+    storage_local.append_records(data_path, records)
+
+    assert storage_local.count_records_last_24h(data_path) == count
+    ring = _ring(data_path)
+    assert len(ring["entries"]) <= storage_local.RECENT_SIZE
+    # 잘린 만큼 floor가 올라가서 링만으로는 답하지 않음 → 다음 조회도 정확
+    assert ring["floor"] >= storage_local._recent_cutoff()
+    storage_local.append_record(data_path, make_record("하나 더", _ago(0)))
+    assert storage_local.count_records_last_24h(data_path) == count + 1
+    assert len(storage_local.get_records_last_24h(data_path)) == count + 1
@@ -0,0 +1,161 @@
+# 경로 : tests/test_record_cache.py
+
+"""파싱된 레코드 캐시 (LRU / 이어 읽기 / 무효화 / 잠금 밖 파싱)"""
+
+import os
+import threading
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    def clear():
+        with storage_local._CACHE_LOCK:
+            storage_local._RECORD_CACHE.clear()
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture
+def parsed_from(monkeypatch):
+    """_parse_lines가 파일의 어느 위치부터 읽었는지 기록"""
+    offsets = []
+    original = storage_local._parse_lines
+
+    def spy(f, entry):
+        offsets.append((os.path.basename(f.name), f.tell()))
+        return original(f, entry)
+
+    monkeypatch.setattr(storage_local, "_parse_lines", spy)
+    return offsets
+
+
+def _segment(data_path, year_month):
+    return storage_local.segment_path(data_path, year_month)
+
+
+def _write_raw(path, *records):
+    storage_local.ensure_parent_dir(path)
+    with open(path, "ab") as f:
+        for record in records:
+            f.write(storage_local._encode_line(record))
+
+
+def test_lru_evicts_least_recently_used_segment(data_path, monkeypatch):
+    monkeypatch.setattr(storage_local, "CACHE_MAX_SEGMENTS", 2)
+    paths = []
+    for month in (1, 2, 3):
+        storage_local.append_record(data_path, make_record(f"{month}월", f"2026-{month:02d}-01T09:00:00"))
+        paths.append(os.path.abspath(_segment(data_path, f"2026-{month:02d}")))
+
+    storage_local._load_records(paths[0])
+    storage_local._load_records(paths[1])
+    storage_local._load_records(paths[0])  # 1월을 최근 사용으로
+    storage_local._load_records(paths[2])
+
+    assert list(storage_local._RECORD_CACHE) == [paths[0], paths[2]]
+
+
+def test_growth_outside_the_app_parses_only_the_tail(data_path, parsed_from):
+    path = _segment(data_path, "2026-02")
+    _write_raw(path, make_record("첫째", "2026-02-01T09:00:00"))
+    first = storage_local._cache_entry(path)
+    size = first.size
+
+    _write_raw(path, make_record("둘째", "2026-02-02T09:00:00"))
+    second = storage_local._cache_entry(path)
+
+    assert parsed_from == [("02.jsonl", 0), ("02.jsonl", size)]
+    assert [r.mood_text for r in second.records] == ["첫째", "둘째"]
+    assert second is not first and len(first.records) == 1  # 읽고 있던 리스트는 그대로
+    assert storage_local._cache_entry(path) is second
+    assert len(parsed_from) == 2
+
+
+def test_append_through_the_app_extends_cache_without_reparsing(data_path, parsed_from):
+    storage_local.append_record(data_path, make_record("첫째", "2026-02-01T09:00:00"))
+    path = _segment(data_path, "2026-02")
+    storage_local._cache_entry(path)
+    parsed = len(parsed_from)
+
+    storage_local.append_record(data_path, make_record("둘째", "2026-02-02T09:00:00"))
+
+    assert [r.mood_text for r in storage_local._load_records(path)] == ["첫째", "둘째"]
+    assert len(parsed_from) == parsed
+
+
+def test_rewrite_with_same_size_is_detected_by_mtime(data_path, parsed_from):
+    path = _segment(data_path, "2026-02")
+    _write_raw(path, make_record("가나", "2026-02-01T09:00:00"))
+    storage_local._cache_entry(path)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "r+b") as f:  # 같은 inode, 같은 크기, 내용만 바뀜
+        f.write(data.replace("가나".encode(), "다라".encode()))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert [r.mood_text for r in storage_local._load_records(path)] == ["다라"]
+    assert parsed_from[-1] == ("02.jsonl", 0)
+
+
+def test_shrunk_or_replaced_file_is_reparsed(data_path):
+    path = _segment(data_path, "2026-02")
+    _write_raw(path, make_record("하나", "2026-02-01T09:00:00"), make_record("둘", "2026-02-02T09:00:00"))
+    assert len(storage_local._load_records(path)) == 2
+
+    os.remove(path)
+    _write_raw(path, make_record("새 파일", "2026-02-03T09:00:00"))
+
+    assert [r.mood_text for r in storage_local._load_records(path)] == ["새 파일"]
+    os.remove(path)
+    assert storage_local._cache_entry(path) is None
+    assert os.path.abspath(path) not in storage_local._RECORD_CACHE
+
+
+def test_large_file_is_parsed_but_not_cached(data_path, monkeypatch):
+    monkeypatch.setattr(storage_local, "CACHE_MAX_FILE_BYTES", 64)
+    path = _segment(data_path, "2026-02")
+    _write_raw(path, make_record("큰 파일", "2026-02-01T09:00:00"))
+
+    assert [r.mood_text for r in storage_local._load_records(path)] == ["큰 파일"]
+    assert os.path.abspath(path) not in storage_local._RECORD_CACHE
+
+
+def test_parsing_does_not_hold_the_cache_lock(data_path, monkeypatch):
+    slow = _segment(data_path, "2026-02")
+    fast = _segment(data_path, "2026-03")
+    _write_raw(slow, make_record("느린 달", "2026-02-01T09:00:00"))
+    _write_raw(fast, make_record("빠른 달", "2026-03-01T09:00:00"))
+
+    entered, release = threading.Event(), threading.Event()
+    original = storage_local._parse_lines
+
+    def blocking(f, entry):
+        if f.name == slow:
+            entered.set()
+            release.wait(5)
+        return original(f, entry)
+
+    monkeypatch.setattr(storage_local, "_parse_lines", blocking)
+    reader = threading.Thread(target=storage_local._load_records, args=(slow,))
+    reader.start()
+    try:
+        assert entered.wait(2)
+        # 2월을 파싱하는 중에도 3월은 바로 읽힘
+        result = []
+        other = threading.Thread(target=lambda: result.append(storage_local._load_records(fast)))
+        other.start()
+        other.join(2)
+        assert not other.is_alive()
+        assert [r.mood_text for r in result[0]] == ["빠른 달"]
+    finally:
+        release.set()
+        reader.join(5)
+    assert os.path.abspath(slow) in storage_local._RECORD_CACHE
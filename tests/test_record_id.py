@@ -0,0 +1,49 @@
+# 경로 : tests/test_record_id.py
+
+"""ULID id로 기록 하나 찾기"""
+
+from datetime import datetime
+
+from conftest import make_record
+from core import storage_local
+
+
+def test_ids_sort_by_creation_time():
+    earlier = storage_local.new_record_id(datetime(2026, 1, 1, 9, 0, 0))
+    later = storage_local.new_record_id(datetime(2026, 1, 1, 9, 0, 1))
+    assert len(earlier) == 26 and earlier < later
+
+
+def test_get_record_in_plain_and_compressed_segments(data_path):
+    january = make_record("일월", "2026-01-10T09:00:00")
+    february = make_record("이월", "2026-02-10T09:00:00")
+    storage_local.append_records(data_path, [january, february])
+    storage_local.compress_segment(data_path, "2026-01")
+
+    assert storage_local.get_record(data_path, january["id"]).mood_text == "일월"
+    assert storage_local.get_record(data_path, february["id"]).mood_text == "이월"
+    assert storage_local.get_record(data_path, storage_local.new_record_id()) is None
+
+
+def test_get_record_when_id_month_differs_from_date_time(data_path):
+    # 나중에 날짜를 바꿔 적은 기록: id 시각(5월)과 저장된 월 세그먼트(3월)가 다름
+    record = make_record("날짜 고침", "2026-03-03T09:00:00")
+    record["id"] = storage_local.new_record_id(datetime(2026, 5, 1, 12, 0, 0))
+    storage_local.append_records(data_path, [record, make_record("오월", "2026-05-01T12:00:00")])
+
+    assert storage_local.get_record(data_path, record["id"]).mood_text == "날짜 고침"
+    assert storage_local.delete_record(data_path, record["id"]) is True
+    assert storage_local.get_record(data_path, record["id"]) is None
+    assert [r.mood_text for r in storage_local.iter_records(data_path)] == ["오월"]
+
+
+def test_legacy_record_gets_stable_id():
+    legacy = {"date_time": "2025-11-02T08:00:00", "mood_color": "yellow", "mood_text": "예전", "mode": "write"}
+
+    first = storage_local.normalize_record(dict(legacy))
+    second = storage_local.normalize_record(dict(legacy))
+
+    assert first["id"] == second["id"]
+    # 앞 10자(시각)는 date_time에서 옴
+    assert first["id"][:10] == storage_local.new_record_id(datetime(2025, 11, 2, 8, 0, 0))[:10]
+    assert list(first)[:2] == ["date_time", "id"]
@@ -0,0 +1,38 @@
+# 경로 : tests/test_recovery.py
+
+"""잘린 마지막 줄(torn tail) 복구"""
+
+from conftest import make_record
+from core import storage_local
+
+
+def _texts(data_path):
+    return [record.mood_text for record in storage_local.iter_records(data_path)]
+
+
+def test_append_after_torn_tail_keeps_new_record(data_path):
+    storage_local.append_record(data_path, make_record("첫 기록", "2026-03-01T09:00:00"))
+    segment = storage_local.segment_path(data_path, "2026-03")
+    # 실행 중에 잘린 쓰기 (디스크 가득 참 / 쓰던 워커가 죽음)
+    with open(segment, "ab") as f:
+        f.write(b'{"date_time": "2026-03-01T09:30:00", "id": "0')
+
+    storage_local.append_record(data_path, make_record("다음 기록", "2026-03-01T10:00:00"))
+
+    assert _texts(data_path) == ["첫 기록", "다음 기록"]
+    with open(segment + ".torn", "rb") as f:
+        assert f.read().startswith(b'{"date_time": "2026-03-01T09:30:00"')
+    assert storage_local.recover(data_path) == {}
+
+
+def test_recover_quarantines_torn_tail_at_startup(data_path):
+    storage_local.append_record(data_path, make_record("첫 기록", "2026-03-01T09:00:00"))
+    segment = storage_local.segment_path(data_path, "2026-03")
+    with open(segment, "ab") as f:
+        f.write(b'{"date_time": "2026-03-0')
+
+    assert storage_local.recover(data_path) == {segment: len(b'{"date_time": "2026-03-0')}
+    assert _texts(data_path) == ["첫 기록"]
+
+    storage_local.append_record(data_path, make_record("다음 기록", "2026-03-02T10:00:00"))
+    assert _texts(data_path) == ["첫 기록", "다음 기록"]
@@ -0,0 +1,90 @@
+# 경로 : tests/test_replace.py
+
+"""24시간 제한 교체 (/replace-selection → /replace-record)"""
+
+import json
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def web(data_path, monkeypatch):
+    import app as web_app
+    monkeypatch.setattr(web_app, "DATA_PATH", data_path)
+    monkeypatch.setattr(web_app, "PER_USER", False)
+    return web_app
+
+
+def _recent(minutes):
+    return (datetime.now() - timedelta(minutes=minutes)).isoformat(timespec="seconds")
+
+
+def _fill_window(data_path):
+    """같은 초에 만든 기록 2개 + id 없는 예전 기록 1개"""
+    same_second = _recent(30)
+    first = make_record("첫째", same_second)
+    second = dict(make_record("둘째", same_second), id=storage_local.new_record_id())
+    storage_local.append_records(data_path, [first, second])
+    legacy = {"date_time": _recent(10), "mood_color": "red", "mood_text": "예전 기록", "mode": "write"}
+    path = storage_local.segment_path(data_path, legacy["date_time"][:7])
+    with open(path, "ab") as f:
+        f.write((json.dumps(legacy, ensure_ascii=False) + "\n").encode("utf-8"))
+    return first, second, legacy
+
+
+def _choose(client, text):
+    """교체 화면에서 text가 들어 있는 기록의 순번과 같이 보낼 필드"""
+    page = client.get("/replace-selection").get_data(as_text=True)
+    options = re.findall(
+        r'name="selected" value="(\d+)".*?name="record_id" value="([^"]*)".*?'
+        r'name="record_date_time" value="([^"]*)".*?class="mood-text">"([^"]*)"',
+        page, re.S,
+    )
+    assert len(options) == 3
+    form = {
+        "record_id": [o[1] for o in options],
+        "record_date_time": [o[2] for o in options],
+    }
+    form["selected"] = next(o[0] for o in options if o[3] == text)
+    return form
+
+
+def _texts(data_path):
+    return sorted(r.mood_text for r in storage_local.get_records_last_24h(data_path))
+
+
+def test_replace_by_id_keeps_record_from_same_second(web, data_path):
+    _fill_window(data_path)
+    client = web.app.test_client()
+
+    response = client.post("/replace-record", data=_choose(client, "첫째"))
+
+    assert response.status_code == 302
+    assert _texts(data_path) == ["둘째", "예전 기록"]
+
+
+def test_replace_legacy_record_uses_date_time(web, data_path):
+    _fill_window(data_path)
+    client = web.app.test_client()
+
+    form = _choose(client, "예전 기록")
+    assert form["record_id"][int(form["selected"])] == ""
+
+    client.post("/replace-record", data=form)
+
+    assert _texts(data_path) == ["둘째", "첫째"]
+
+
+def test_bad_selection_deletes_nothing(web, data_path):
+    first, _, _ = _fill_window(data_path)
+    client = web.app.test_client()
+
+    client.post("/replace-record", data={"selected": "7", "record_id": [first["id"]]})
+    client.post("/replace-record", data={"selected_id": first["id"]})
+
+    assert len(_texts(data_path)) == 3
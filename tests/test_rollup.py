@@ -0,0 +1,84 @@
+# 경로 : tests/test_rollup.py
+
+"""월별 캘린더 요약 (rollup.json)"""
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """요약을 원본에서 다시 만든 횟수"""
+    calls = []
+    original = storage_local._build_rollup
+
+    def counting(data_path, year_month):
+        calls.append(year_month)
+        return original(data_path, year_month)
+
+    monkeypatch.setattr(storage_local, "_build_rollup", counting)
+    return calls
+
+
+def _ids(summary, day):
+    return [item["id"] for item in summary.get(day, [])]
+
+
+def test_append_updates_rollup_in_place(data_path, builds):
+    first = make_record("첫 기록", "2026-02-03T09:00:00", mood_color="red")
+    storage_local.append_record(data_path, first)
+    assert _ids(storage_local.get_calendar_summary(data_path, 2026, 2), "2026-02-03") == [first["id"]]
+    assert builds == ["2026-02"]
+
+    second = make_record("둘째", "2026-02-03T21:00:00", mood_color="green")
+    other_day = make_record("다른 날", "2026-02-10T12:00:00")
+    storage_local.append_records(data_path, [second, other_day])
+
+    summary = storage_local.get_calendar_summary(data_path, 2026, 2)
+    assert builds == ["2026-02"]  # 원본을 다시 읽지 않음
+    assert _ids(summary, "2026-02-03") == [second["id"], first["id"]]  # 날짜별 최신순
+    assert summary["2026-02-03"][0]["mood_color"] == "green"
+    assert _ids(summary, "2026-02-10") == [other_day["id"]]
+    assert set(summary["2026-02-10"][0]) == set(storage_local.ROLLUP_FIELDS)
+
+
+def test_tombstone_removes_item_and_empty_day(data_path, builds):
+    keep = make_record("남김", "2026-02-05T08:00:00")
+    drop = make_record("지움", "2026-02-05T20:00:00")
+    alone = make_record("혼자", "2026-02-06T08:00:00")
+    storage_local.append_records(data_path, [keep, drop, alone])
+    storage_local.get_calendar_summary(data_path, 2026, 2)
+
+    storage_local.delete_record(data_path, drop["id"])
+    storage_local.delete_record(data_path, alone["id"])
+
+    summary = storage_local.get_calendar_summary(data_path, 2026, 2)
+    assert builds == ["2026-02"]
+    assert _ids(summary, "2026-02-05") == [keep["id"]]
+    assert "2026-02-06" not in summary
+
+
+def test_stale_signature_rebuilds_from_log(data_path, builds):
+    storage_local.append_record(data_path, make_record("앱에서", "2026-02-07T10:00:00"))
+    storage_local.get_calendar_summary(data_path, 2026, 2)
+
+    # 앱을 거치지 않고 세그먼트에 줄을 붙임 → 요약의 (inode, size) 서명이 어긋남
+    outside = make_record("밖에서", "2026-02-08T10:00:00")
+    with open(storage_local.segment_path(data_path, "2026-02"), "ab") as f:
+        f.write(storage_local._encode_line(outside))
+
+    # 이 상태의 append는 요약을 건드리지 않고 다음 조회 때 재생성에 맡김
+    later = make_record("그 뒤", "2026-02-09T10:00:00")
+    storage_local.append_record(data_path, later)
+
+    summary = storage_local.get_calendar_summary(data_path, 2026, 2)
+    assert builds == ["2026-02", "2026-02"]
+    assert _ids(summary, "2026-02-08") == [outside["id"]]
+    assert _ids(summary, "2026-02-09") == [later["id"]]
+
+
+def test_month_without_records_is_empty(data_path):
+    storage_local.append_record(data_path, make_record("2월", "2026-02-07T10:00:00"))
+    assert storage_local.get_calendar_summary(data_path, 2026, 3) == {}
@@ -0,0 +1,89 @@
+# 경로 : tests/test_schema_migration.py
+
+"""예전 스키마 기록 업그레이드 (migrate_schema / normalize_record)"""
+
+import json
+import os
+
+from conftest import make_record
+from core import storage_local
+
+
+LEGACY = [
+    {"date_time": "2025-10-01T09:00:00", "mood_color": "blue", "mood_text": "첫 기록", "mode": "write"},
+    {"timestamp": "2025-10-02T09:00:00", "mood_color": "pink", "mood_text": "timestamp 키", "mode": "draw"},
+    {"date_time": "2025-10-03T09:00:00", "mood_color": "red", "mood_text": "지울 기록", "mode": "write"},
+    {"date_time": "2025-10-04T09:00:00", "mood_color": "mint", "mood_text": "최종 색 있음",
+     "mode": "music", "final_color": "#abcdef"},
+]
+
+
+def _write_legacy_log(data_path):
+    """마이그레이션 전 단일 파일 data/mood_log.jsonl (id / final_color / schema_version 없음)"""
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    with open(data_path, "w", encoding="utf-8") as f:
+        for obj in LEGACY:
+            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        # 예전 툼스톤: id 없이 date_time으로 지움
+        f.write(json.dumps({"date_time": "2025-10-03T09:00:00", "_tombstone": True}) + "\n")
+        f.write("{깨진 줄\n")
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_legacy_lines_read_without_id_until_migrated(data_path):
+    _write_legacy_log(data_path)
+
+    records = storage_local.read_all_records(data_path)
+
+    assert [r.mood_text for r in records] == ["최종 색 있음", "timestamp 키", "첫 기록"]
+    assert all(r.id is None and r.mood_name is None and r.schema_version is None for r in records)
+    assert "지울 기록" not in [r.mood_text for r in records]
+
+
+def test_migrate_schema_assigns_stable_ids_and_drops_tombstones(data_path):
+    _write_legacy_log(data_path)
+    expected_ids = [storage_local.normalize_record(obj)["id"] for obj in LEGACY]
+
+    assert storage_local.migrate_schema(data_path) == 3
+
+    records = list(storage_local.iter_records(data_path))
+    assert [r.mood_text for r in records] == ["첫 기록", "timestamp 키", "최종 색 있음"]
+    assert [r.id for r in records] == [expected_ids[0], expected_ids[1], expected_ids[3]]
+    assert records[1].date_time == "2025-10-02T09:00:00"
+    assert records[0].final_color == "#1e90ff" and records[2].final_color == "#abcdef"
+    assert records[0].initial_color == "blue" and records[0].mood_name
+    assert all(r.schema_version == storage_local.SCHEMA_VERSION for r in records)
+
+    # 툼스톤 / 깨진 줄은 걷어내고 id로 바로 찾을 수 있음
+    lines = _read_bytes(data_path).splitlines()
+    assert len(lines) == 3 and not any(b"_tombstone" in line for line in lines)
+    assert storage_local.get_record(data_path, expected_ids[3]).mood_text == "최종 색 있음"
+
+
+def test_migrate_schema_is_idempotent(data_path):
+    _write_legacy_log(data_path)
+    storage_local.append_record(data_path, make_record("새 기록", "2026-01-05T09:00:00"))
+    assert storage_local.migrate_schema(data_path) == 3
+    before = _read_bytes(data_path)
+    ids = [r.id for r in storage_local.iter_records(data_path)]
+
+    assert storage_local.migrate_schema(data_path) == 0
+    assert _read_bytes(data_path) == before
+    assert [r.id for r in storage_local.iter_records(data_path)] == ids
+
+
+def test_migrate_schema_in_compressed_segment(data_path):
+    path = storage_local.segment_path(data_path, "2025-10")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(LEGACY[0], ensure_ascii=False) + "\n")
+    storage_local.compress_segment(data_path, "2025-10")
+
+    # 압축할 때 이미 정규화됨 → 업그레이드할 것 없음
+    (record,) = storage_local.iter_records(data_path)
+    assert record.id == storage_local.normalize_record(LEGACY[0])["id"]
+    assert storage_local.migrate_schema(data_path) == 0
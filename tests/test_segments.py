@@ -0,0 +1,72 @@
+# 경로 : tests/test_segments.py
+
+"""단일 파일 로그 → 월별 세그먼트 (migrate_to_segments)"""
+
+import json
+import os
+
+from conftest import make_record
+from core import storage_local
+
+
+def _write_legacy(data_path, lines):
+    storage_local.ensure_parent_dir(data_path)
+    with open(data_path, "wb") as f:
+        for line in lines:
+            f.write(line if isinstance(line, bytes) else (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def _segment_texts(path):
+    with open(path, "rb") as f:
+        return [json.loads(line)["mood_text"] for line in f.read().splitlines() if line.strip()]
+
+
+def test_legacy_log_is_split_into_month_segments(data_path):
+    _write_legacy(data_path, [
+        make_record("1월 말", "2026-01-31T23:00:00"),
+        make_record("2월 초", "2026-02-01T00:10:00"),
+        {"timestamp": "2025-12-24T20:00:00", "mood_text": "예전 timestamp 키", "mood_color": "red"},
+        b"\n",
+        b"{broken\n",
+        {"mood_text": "날짜 없음"},
+        make_record("2월 중순", "2026-02-14T12:00:00"),
+    ])
+    storage_local.rebuild_date_index(data_path)
+
+    moved = storage_local.migrate_to_segments(data_path)
+
+    assert moved == {"2025-12": 1, "2026-01": 1, "2026-02": 2}
+    assert [ym for ym, _ in storage_local.list_segments(data_path)] == ["2025-12", "2026-01", "2026-02"]
+    assert _segment_texts(storage_local.segment_path(data_path, "2026-02")) == ["2월 초", "2월 중순"]
+    # 원본은 백업으로, 날짜 없는 줄도 백업에는 남음
+    assert not os.path.exists(data_path)
+    assert not os.path.exists(storage_local.date_index_path(data_path))
+    with open(data_path + ".migrated", "rb") as f:
+        assert "날짜 없음".encode("utf-8") in f.read()
+
+    texts = [r.mood_text for r in storage_local.iter_records(data_path)]
+    assert texts == ["예전 timestamp 키", "1월 말", "2월 초", "2월 중순"]
+    assert [r.mood_text for r in storage_local.read_records_by_date(data_path, "2026-02-14")] == ["2월 중순"]
+
+
+def test_legacy_lines_go_before_existing_segment_lines(data_path):
+    _write_legacy(data_path, [make_record("옛 로그", "2026-03-01T09:00:00")])
+    newer = make_record("이미 세그먼트", "2026-03-05T09:00:00")
+    segment = storage_local.segment_path(data_path, "2026-03")
+    storage_local.ensure_parent_dir(segment)
+    with open(segment, "wb") as f:
+        f.write(storage_local._encode_line(newer))
+    assert [r.mood_text for r in storage_local.iter_records(data_path)] == ["옛 로그", "이미 세그먼트"]
+
+    assert storage_local.migrate_to_segments(data_path) == {"2026-03": 1}
+
+    assert _segment_texts(segment) == ["옛 로그", "이미 세그먼트"]
+    assert [r.mood_text for r in storage_local.read_last_n(data_path, 2)] == ["이미 세그먼트", "옛 로그"]
+    assert storage_local.get_record(data_path, newer["id"]).mood_text == "이미 세그먼트"
+
+
+def test_migration_without_legacy_file_is_noop(data_path):
+    storage_local.append_record(data_path, make_record("세그먼트만", "2026-03-01T09:00:00"))
+
+    assert storage_local.migrate_to_segments(data_path) == {}
+    assert [r.mood_text for r in storage_local.iter_records(data_path)] == ["세그먼트만"]
@@ -0,0 +1,78 @@
+# 경로 : tests/test_snapshot.py
+
+"""스냅샷 + 로그 꼬리 재생 (웜 스타트)"""
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+@pytest.fixture
+def cold_cache():
+    """재시작한 워커인 척: 파싱된 레코드 캐시 비우기"""
+    def clear():
+        with storage_local._CACHE_LOCK:
+            storage_local._RECORD_CACHE.clear()
+    clear()
+    yield clear
+    clear()
+
+
+def _march(day):
+    return make_record(f"삼월 {day}", f"2026-03-{day:02d}T09:00:00")
+
+
+def test_snapshot_round_trip_replays_only_the_tail(data_path, cold_cache):
+    storage_local.append_records(data_path, [_march(day) for day in range(1, 6)])
+    storage_local.append_record(data_path, make_record("사월", "2026-04-01T09:00:00"))
+    assert storage_local.save_snapshot(data_path) == 6
+
+    # 스냅샷 뒤에 붙은 꼬리 2줄 (기록 1 + 툼스톤 1)
+    tail = _march(20)
+    storage_local.append_record(data_path, tail)
+    storage_local.delete_record(data_path, storage_local.read_records_by_date(data_path, "2026-03-01")[0].id)
+    cold_cache()
+
+    assert storage_local.warm_start(data_path) == {"restored": 6, "replayed": 2}
+
+    texts = [r.mood_text for r in storage_local.iter_records(data_path)]
+    assert texts == ["삼월 2", "삼월 3", "삼월 4", "삼월 5", "삼월 20", "사월"]
+    assert storage_local.get_record(data_path, tail["id"]).mood_text == "삼월 20"
+
+
+def test_rewritten_segment_is_parsed_from_scratch(data_path, cold_cache):
+    records = [_march(day) for day in range(1, 6)]
+    storage_local.append_records(data_path, records)
+    storage_local.save_snapshot(data_path)
+    storage_local.delete_record(data_path, records[0]["id"])
+    storage_local.compact(data_path, force=True)  # 새 inode
+    cold_cache()
+
+    assert storage_local.warm_start(data_path) == {"restored": 0, "replayed": 4}
+    assert [r.id for r in storage_local.iter_records(data_path)] == [r["id"] for r in records[1:]]
+
+
+def test_checksum_mismatch_ignores_snapshot(data_path, cold_cache):
+    records = [_march(day) for day in range(1, 4)]
+    storage_local.append_records(data_path, records)
+    storage_local.save_snapshot(data_path)
+
+    path = storage_local.snapshot_path(data_path)
+    with open(path, "r+b") as f:
+        f.seek(-1, 2)
+        last = f.read(1)
+        f.seek(-1, 2)
+        f.write(bytes([last[0] ^ 0xFF]))
+    cold_cache()
+
+    assert storage_local._read_snapshot(path) is None
+    assert storage_local.warm_start(data_path) == {"restored": 0, "replayed": 3}
+    assert [r.id for r in storage_local.iter_records(data_path)] == [r["id"] for r in records]
+
+
+def test_missing_snapshot_is_a_cold_start(data_path, cold_cache):
+    storage_local.append_record(data_path, _march(1))
+    cold_cache()
+
+    assert storage_local.warm_start(data_path) == {"restored": 0, "replayed": 1}
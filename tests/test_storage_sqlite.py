@@ -0,0 +1,131 @@
+# 경로 : tests/test_storage_sqlite.py
+
+"""SQLite 저장소 (storage_local과 같은 API)"""
+
+import json
+
+import pytest
+
+from conftest import make_record
+from core import storage_local, storage_sqlite
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "data" / "mood_log.db")
+
+
+def _ids(records):
+    return [r.id for r in records]
+
+
+def _newest_first(records):
+    return sorted(records, key=lambda r: (r["date_time"], r["id"]), reverse=True)
+
+
+def test_append_and_read_back(db_path):
+    first = make_record("처음", "2026-02-01T09:00:00")
+    later = [make_record(f"나중 {i}", f"2026-02-0{i + 2}T09:00:00") for i in range(3)]
+
+    storage_sqlite.append_record(db_path, first)
+    assert storage_sqlite.append_records(db_path, later) == 3
+
+    assert _ids(storage_sqlite.read_last_n(db_path, 2)) == [later[2]["id"], later[1]["id"]]
+    assert storage_sqlite.get_record(db_path, first["id"]).mood_text == "처음"
+    assert storage_sqlite.get_record(db_path, "nope") is None
+    # 저장할 때 현재 스키마로 정규화
+    assert storage_sqlite.get_record(db_path, first["id"]).schema_version == storage_local.SCHEMA_VERSION
+
+
+def test_read_page_walks_both_directions(db_path):
+    times = ["2026-01-31T23:59:59", "2026-01-31T23:59:59", "2026-02-01T00:00:00", "2026-02-10T12:00:00",
+             "2026-03-01T00:00:00", "2026-03-01T00:00:00", "2026-03-05T08:00:00"]
+    records = [make_record(f"기록 {i}", t) for i, t in enumerate(times)]
+    storage_sqlite.append_records(db_path, records)
+    expected = [r["id"] for r in _newest_first(records)]
+
+    seen, cursor = [], None
+    while True:
+        page, cursor, newer = storage_sqlite.read_page(db_path, 3, before=cursor)
+        seen.extend(r.id for r in page)
+        last_page = page
+        if cursor is None:
+            break
+    assert seen == expected
+
+    back = [r.id for r in last_page]
+    while newer:
+        page, _, newer = storage_sqlite.read_page(db_path, 3, after=newer)
+        back = [r.id for r in page] + back
+    assert back == expected
+
+
+def test_calendar_summary(db_path):
+    records = [
+        make_record("아침", "2026-04-03T08:00:00", mood_color="red"),
+        make_record("저녁", "2026-04-03T21:00:00", mood_color="mint", mode="draw"),
+        make_record("다른 달", "2026-05-01T08:00:00"),
+    ]
+    storage_sqlite.append_records(db_path, records)
+
+    summary = storage_sqlite.get_calendar_summary(db_path, 2026, 4)
+
+    assert list(summary) == ["2026-04-03"]
+    assert [(s["id"], s["mood_color"], s["mode"]) for s in summary["2026-04-03"]] == [
+        (records[1]["id"], "mint", "draw"),
+        (records[0]["id"], "red", "write"),
+    ]
+    assert summary["2026-04-03"][1]["final_color"] == "#dc143c"
+
+
+def test_delete_by_id_and_by_datetime(db_path):
+    a = make_record("a", "2026-06-01T09:00:00")
+    b = make_record("b", "2026-06-01T09:00:00")
+    c = make_record("c", "2026-06-02T09:00:00")
+    storage_sqlite.append_records(db_path, [a, b, c])
+
+    assert storage_sqlite.delete_record(db_path, a["id"]) is True
+    assert storage_sqlite.delete_record(db_path, a["id"]) is False
+    assert _ids(storage_sqlite.read_all_records(db_path)) == [c["id"], b["id"]]
+
+    assert storage_sqlite.delete_record_by_datetime(db_path, "2026-06-02T09:00:00") is True
+    assert storage_sqlite.delete_record_by_datetime(db_path, "2026-06-02T09:00:00") is False
+    assert _ids(storage_sqlite.read_all_records(db_path)) == [b["id"]]
+
+
+def test_import_jsonl_is_idempotent(data_path, db_path):
+    kept = make_record("남김", "2026-07-01T09:00:00")
+    removed = make_record("지움", "2026-07-02T09:00:00")
+    storage_local.append_records(data_path, [kept, removed])
+    storage_local.delete_record(data_path, removed["id"])
+    # id 없는 예전 줄 → 변환할 때마다 같은 id
+    path = storage_local.segment_path(data_path, "2026-07")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"date_time": "2026-07-03T09:00:00", "mood_color": "blue", "mood_text": "예전", "mode": "write"}) + "\n")
+    storage_local._invalidate_cache(path)
+
+    assert storage_sqlite.import_jsonl(db_path, data_path) == 2
+    assert storage_sqlite.import_jsonl(db_path, data_path) == 0
+
+    records = storage_sqlite.read_all_records(db_path)
+    assert [r.mood_text for r in records] == ["예전", "남김"]
+    assert records[1].id == kept["id"] and records[0].id
+
+
+def test_migrate_schema_upgrades_old_rows_once(db_path):
+    legacy = {"date_time": "2025-12-24T20:00:00", "mood_color": "green", "mood_text": "예전", "mode": "write"}
+    conn = storage_sqlite._connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO records (date_time, date, body) VALUES (?, ?, ?)",
+            (legacy["date_time"], legacy["date_time"][:10], json.dumps(legacy, ensure_ascii=False)),
+        )
+    storage_sqlite.append_record(db_path, make_record("새 기록", "2026-01-01T09:00:00"))
+
+    assert storage_sqlite.migrate_schema(db_path) == 1
+    assert storage_sqlite.migrate_schema(db_path) == 0
+
+    (upgraded,) = storage_sqlite.read_records_by_date(db_path, "2025-12-24")
+    assert upgraded.id == storage_local.normalize_record(legacy)["id"]
+    assert upgraded.mood_name and upgraded.final_color == "#32cd32"
+    assert upgraded.schema_version == storage_local.SCHEMA_VERSION
@@ -0,0 +1,140 @@
+# 경로 : tests/test_transfer.py
+
+"""기록 내보내기 / 가져오기"""
+
+import io
+import os
+
+from conftest import make_record
+from core import storage_local, transfer
+from core.models import MoodRecord
+
+
+def _export(records, fmt="ndjson", compressed=False):
+    return io.BytesIO(b"".join(transfer.iter_export(
+        (MoodRecord.from_json(r) for r in records), fmt, compressed,
+    )))
+
+
+def _walk_pages(data_path, limit):
+    seen, cursor = [], None
+    while True:
+        page, cursor, _ = storage_local.read_page(data_path, limit, before=cursor)
+        seen.extend(page)
+        if cursor is None:
+            return seen
+
+
+def test_import_into_compressed_month_keeps_paging_order(data_path):
+    existing = [make_record(f"기존 {day}", f"2026-03-{day:02d}T09:00:00") for day in range(1, 21)]
+    for record in existing:
+        storage_local.append_record(data_path, record)
+    storage_local.compress_segment(data_path, "2026-03")
+
+    # 압축된 달의 기존 기록 사이사이 시각으로 가져오기
+    imported = [make_record(f"가져온 {day}", f"2026-03-{day:02d}T12:00:00") for day in range(1, 20)]
+    result = transfer.import_records(storage_local, data_path, _export(imported))
+
+    assert result == {"imported": 19, "duplicates": 0, "invalid": 0}
+    plain = storage_local.segment_path(data_path, "2026-03")
+    assert not os.path.exists(plain)  # 압축 파일에 합쳐짐 (일반 파일 꼬리 없음)
+
+    expected = sorted(existing + imported, key=lambda r: (r["date_time"], r["id"]), reverse=True)
+    seen = _walk_pages(data_path, limit=7)
+    assert [r.id for r in seen] == [r["id"] for r in expected]
+
+
+def test_backdated_append_into_compressed_month_stays_ordered(data_path):
+    for day in (1, 10, 20):
+        storage_local.append_record(data_path, make_record(f"기존 {day}", f"2026-03-{day:02d}T09:00:00"))
+    storage_local.compress_segment(data_path, "2026-03")
+
+    storage_local.append_record(data_path, make_record("끼워넣기", "2026-03-05T09:00:00"))
+
+    newest_first = [r.mood_text for r in storage_local.iter_records(data_path, reverse=True)]
+    assert newest_first == ["기존 20", "기존 10", "끼워넣기", "기존 1"]
+
+
+def _fields(record):
+    return (record.id, record.date_time, record.mood_color, record.mood_text, record.mode)
+
+
+def test_export_then_import_round_trip(tmp_path, data_path):
+    records = [
+        make_record("쉼표, \"따옴표\"\n줄바꿈", "2026-01-31T23:59:59", mood_color="red"),
+        make_record("그림", "2026-02-01T00:00:00", mode="draw"),
+        make_record("음악", "2026-02-14T12:30:00", mode="music"),
+    ]
+    for record in records:
+        storage_local.append_record(data_path, record)
+    original = [_fields(r) for r in storage_local.iter_records(data_path)]
+
+    for fmt in ("ndjson", "csv"):
+        for compressed in (False, True):
+            payload = b"".join(transfer.iter_export(storage_local.iter_records(data_path), fmt, compressed))
+            target = str(tmp_path / f"{fmt}-{compressed}" / "mood_log.jsonl")
+            result = transfer.import_records(storage_local, target, io.BytesIO(payload), fmt, compressed)
+            assert result == {"imported": 3, "duplicates": 0, "invalid": 0}
+            assert [_fields(r) for r in storage_local.iter_records(target)] == original
+
+            # 같은 파일을 한 번 더 가져오면 전부 중복
+            again = transfer.import_records(storage_local, target, io.BytesIO(payload), fmt, compressed)
+            assert again == {"imported": 0, "duplicates": 3, "invalid": 0}
+
+
+def test_import_rejects_unsafe_id_and_compact_date(data_path):
+    good = make_record("정상", "2026-03-01T09:00:00")
+    rows = [
+        good,
+        dict(make_record("따옴표 id", "2026-03-02T09:00:00"), id='01ABC", "x'),
+        dict(make_record("숫자 id", "2026-03-03T09:00:00"), id=12345),
+        dict(make_record("붙여 쓴 날짜", "2026-03-04T09:00:00"), date_time="20260304"),
+        dict(make_record("날짜만", "2026-03-05T09:00:00"), date_time="2026-03-05"),
+    ]
+    stream = io.BytesIO("".join(transfer.json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8"))
+
+    result = transfer.import_records(storage_local, data_path, stream)
+
+    assert result == {"imported": 1, "duplicates": 0, "invalid": 4}
+    assert [r.id for r in storage_local.iter_records(data_path)] == [good["id"]]
+
+
+def test_import_without_id_assigns_one(data_path):
+    legacy = {"date_time": "2025-12-24T20:00:00", "mood_color": "green", "mood_text": "예전 기록", "mode": "write"}
+    stream = io.BytesIO((transfer.json.dumps(legacy, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    assert transfer.import_records(storage_local, data_path, stream)["imported"] == 1
+    (record,) = storage_local.iter_records(data_path)
+    assert transfer.RECORD_ID_RE.match(record.id)
+
+
+def test_malformed_csv_raises_import_error(data_path):
+    # csv 모듈의 필드 길이 제한을 넘는 칸 → csv.Error
+    broken = io.BytesIO(b"date_time,mood_text\n2026-03-01T09:00:00," + b"x" * (1 << 18) + b"\n")
+    try:
+        transfer.import_records(storage_local, data_path, broken, "csv")
+    except transfer.IMPORT_ERRORS:
+        pass
+    else:
+        raise AssertionError("깨진 CSV는 IMPORT_ERRORS로 알려야 함")
+
+
+def test_import_counts_badly_typed_fields_as_invalid(data_path):
+    base = {"date_time": "2026-01-01T10:00:00", "mood_color": "blue", "mode": "write"}
+    rows = [
+        dict(base, initial_color=5),
+        dict(base, mood_color="zzz"),
+        dict(base, ai_used="yes"),
+        dict(base, mood_text=["목록"]),
+        dict(base, final_color="not-a-color"),
+        dict(base, ai_interaction_count=True),
+        dict(base, color_intensity="0.3"),
+        dict(base, date_time="2026-01-01T11:00:00", initial_color="#1e90ff", final_color="#aabbcc", ai_used=True),
+    ]
+    stream = io.BytesIO("".join(transfer.json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8"))
+
+    result = transfer.import_records(storage_local, data_path, stream)
+
+    assert result == {"imported": 1, "duplicates": 0, "invalid": 7}
+    (record,) = storage_local.iter_records(data_path)
+    assert record.final_color == "#aabbcc" and record.ai_used is True
@@ -0,0 +1,73 @@
+# 경로 : tests/test_write_lock.py
+
+"""쓰기 잠금 (파일별 잠금 / 여러 스레드 동시 append)"""
+
+import json
+import threading
+
+import pytest
+
+from conftest import make_record
+from core import storage_local
+
+
+def _lines(path):
+    with open(path, "rb") as f:
+        return [json.loads(raw) for raw in f.read().splitlines()]
+
+
+def _concurrent_appends(data_path, threads=8, per_thread=25):
+    """스레드마다 2월/3월 세그먼트에 번갈아 append → 쓴 id 목록"""
+    start = threading.Barrier(threads)
+    written = [[] for _ in range(threads)]
+
+    def worker(n):
+        start.wait()
+        for i in range(per_thread):
+            month = 2 + (n + i) % 2
+            record = make_record(f"스레드 {n}-{i} " + "가" * 200, f"2026-{month:02d}-0{1 + n % 9}T10:{i:02d}:00")
+            storage_local.append_record(data_path, record)
+            written[n].append(record["id"])
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join(30)
+    return [record_id for ids in written for record_id in ids]
+
+
+@pytest.mark.parametrize("group_commit", [False, True])
+def test_threaded_appends_lose_and_interleave_nothing(data_path, monkeypatch, group_commit):
+    if group_commit:
+        monkeypatch.setattr(storage_local, "_group_writer", storage_local.GroupCommitWriter(2.0))
+
+    ids = _concurrent_appends(data_path)
+
+    on_disk = []
+    for month in ("2026-02", "2026-03"):
+        # 줄마다 JSON 하나로 온전히 읽혀야 함 (섞인 줄이 있으면 json.loads 실패)
+        on_disk += [obj["id"] for obj in _lines(storage_local.segment_path(data_path, month))]
+    assert len(ids) == 200
+    assert sorted(on_disk) == sorted(ids)
+    assert {r.id for r in storage_local.iter_records(data_path)} == set(ids)
+
+
+def test_lock_is_per_path(tmp_path):
+    feb = str(tmp_path / "2026" / "02.jsonl")
+    mar = str(tmp_path / "2026" / "03.jsonl")
+    other_done = threading.Event()
+    same_done = threading.Event()
+
+    def take(path, done):
+        with storage_local._file_lock(path):
+            done.set()
+
+    with storage_local._file_lock(feb):
+        threading.Thread(target=take, args=(mar, other_done), daemon=True).start()
+        threading.Thread(target=take, args=(feb, same_done), daemon=True).start()
+        assert other_done.wait(2)          # 다른 파일은 기다리지 않음
+        assert not same_done.wait(0.2)     # 같은 파일은 풀릴 때까지 기다림
+        with storage_local._file_lock(feb):  # 같은 스레드가 다시 잡으면 그대로 통과
+            pass
+    assert same_done.wait(2)